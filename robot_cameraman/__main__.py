@@ -4,6 +4,7 @@ import signal
 import threading
 # noinspection Mypy
 from pathlib import Path
+from typing import Optional, List, TextIO
 
 import PIL.Image
 import PIL.ImageFont
@@ -19,23 +20,43 @@ from robot_cameraman.camera_observable import \
 from robot_cameraman.cameraman import Cameraman
 from robot_cameraman.cameraman_mode_manager import CameramanModeManager
 from robot_cameraman.configuration import read_configuration_file
+from robot_cameraman.detection_engine.cam_shift import CamShiftDetectionEngine
 from robot_cameraman.detection_engine.color import ColorDetectionEngine, \
     ColorDetectionEngineUI
-from robot_cameraman.gimbal import SimpleBgcGimbal, DummyGimbal
+from robot_cameraman.detection_engine.open_cv import \
+    OpenCvDnnDetectionEngine, OpenCvDnnModelType
+from robot_cameraman.detection_engine.panasonic import \
+    PanasonicCameraDetectionEngine
+from robot_cameraman.detection_engine.tflite import TfLiteDetectionEngine
+from robot_cameraman.ego_motion import EgoMotion
+from robot_cameraman.gimbal import SimpleBgcGimbal, DummyGimbal, \
+    CoalescingGimbal, PipelinedSimpleBgcGimbal, Gimbal
 from robot_cameraman.image_detection import DummyDetectionEngine, \
-    EdgeTpuDetectionEngine
+    EdgeTpuDetectionEngine, FusedDetectionEngine
 from robot_cameraman.live_view import WebcamLiveView, PanasonicLiveView, \
     ImageSize
 from robot_cameraman.max_speed_and_acceleration_updater import \
     MaxSpeedAndAccelerationUpdater
-from robot_cameraman.object_tracking import ObjectTracker
+from robot_cameraman.motion_gate import MotionGate
+from robot_cameraman.object_tracking import ObjectTracker, \
+    AssignmentObjectTracker, KalmanObjectTracker
+from robot_cameraman.pid import PidGains
+from robot_cameraman.reidentification import AppearanceReIdentifier
 from robot_cameraman.resource import read_label_file
 from robot_cameraman.server import run_server, ImageContainer
 from robot_cameraman.tracking import Destination, StopIfLostTrackingStrategy, \
     RotateSearchTargetStrategy, CameraSpeeds, ConfigurableTrackingStrategy, \
-    ConfigurableAlignTrackingStrategy, ConfigurableTrackingStrategyUi, ZoomSpeed
+    ConfigurableAlignTrackingStrategy, ConfigurableTrackingStrategyUi, \
+    ZoomSpeed, PredictiveTrackingStrategy, PredictiveTrackingStrategyUi, \
+    PidTrackingStrategy
+from robot_cameraman.trajectory import Trajectories
 from robot_cameraman.ui import ShowSpeedsInStatusBar
 from robot_cameraman.updatable_configuration import UpdatableConfiguration
+from robot_cameraman.zoom import ClosedLoopZoomController, \
+    ClosedLoopZoomTrackingStrategy
+from robot_cameraman.zoom_command_worker import ZoomCommandWorker
+from simplebgc.data_stream import GimbalStateLog
+from simplebgc.transport import SerialTransport
 
 to_exit: threading.Event
 server_image: ImageContainer
@@ -52,11 +73,42 @@ def create_video_writer(output_file: Path, image_size: ImageSize):
 class RobotCameramanArguments(Protocol):
     config: Path
     detectionEngine: str
+    fuseCameraDetection: bool
+    cameraDetectionCoordinatesWidth: int
+    cameraDetectionCoordinatesHeight: int
     model: Path
+    modelConfig: Path
+    modelType: str
+    labelIdOffset: Optional[int]
+    asynchronousInference: bool
     labels: Path
     maxObjects: int
+    inferenceThreads: int
+    inferenceInputWidth: int
+    inferenceInputHeight: int
     confidence: float
+    objectTracker: str
+    egoMotionCompensation: bool
+    cameraHorizontalFieldOfView: float
+    reIdentification: bool
+    reIdentificationMaxAge: float
+    reIdentificationGracePeriod: float
+    trajectories: bool
+    trajectoryLog: Optional[Path]
+    predictiveTracking: bool
+    pidTracking: bool
+    pidPanGains: List[float]
+    pidTiltGains: List[float]
+    closedLoopZoom: bool
+    maxZoomRatio: float
+    motionGate: bool
+    motionGateSensitivity: int
+    motionGateRefreshInterval: float
     gimbal: str
+    gimbalKeepAliveInterval: float
+    serialRecording: Optional[Path]
+    gimbalStreamInterval: Optional[float]
+    gimbalStateLog: Optional[Path]
     liveView: str
     ip: str
     port: int
@@ -69,6 +121,9 @@ class RobotCameramanArguments(Protocol):
     rotatingSearchSpeed: int
     rotationalAccelerationPerSecond: int
     tiltingAccelerationPerSecond: int
+    stopControlRate: float
+    stopTimeout: float
+    firmwareStopRamp: bool
     variance: int
     liveViewWith: int
     liveViewHeight: int
@@ -81,6 +136,7 @@ class RobotCameramanArguments(Protocol):
 def parse_arguments() -> RobotCameramanArguments:
     resources: Path = Path(__file__).parent / 'resources'
     mobilenet = 'mobilenet_ssd_v2_coco_quant_postprocess_edgetpu.tflite'
+    cpu_mobilenet = 'mobilenet_ssd_v2_coco_quant_postprocess.tflite'
     parser = argparse.ArgumentParser(
         description="Detect objects in a video file using Google Coral USB.")
     parser.add_argument(
@@ -93,12 +149,59 @@ def parse_arguments() -> RobotCameramanArguments:
                         default='EdgeTPU',
                         help="The detection engine to use."
                              " Either 'EdgeTPU' (Google Coral),"
-                             " 'Color' or 'Dummy'")
+                             " 'TFLite' (CPU), 'OpenCV' (CPU), 'Color',"
+                             " 'CamShift', 'Panasonic' or 'Dummy'."
+                             " The target of 'CamShift' has to be selected"
+                             " in the web UI (menu 'region tracking')."
+                             " 'Panasonic' uses the"
+                             " rectangles (e.g. faces) detected by the"
+                             " camera and requires the Panasonic live view.")
+    parser.add_argument('--fuseCameraDetection',
+                        action='store_true',
+                        help="Combine the candidates of the detection engine"
+                             " with the rectangles detected by the Panasonic"
+                             " camera.")
+    parser.add_argument('--cameraDetectionCoordinatesWidth', type=int,
+                        default=1000,
+                        help="Width of the coordinate system of rectangles"
+                             " detected by the Panasonic camera.")
+    parser.add_argument('--cameraDetectionCoordinatesHeight', type=int,
+                        default=1000,
+                        help="Height of the coordinate system of rectangles"
+                             " detected by the Panasonic camera.")
     parser.add_argument(
         '--model',
         type=Path,
-        default=resources / mobilenet,
-        help="Path to the neural network graph file.")
+        default=None,
+        help="Path to the neural network graph file."
+             f" Defaults to {mobilenet} for EdgeTPU"
+             f" and {cpu_mobilenet} for TFLite.")
+    parser.add_argument(
+        '--modelConfig',
+        type=Path,
+        default=None,
+        help="Path to the network configuration file of the OpenCV detection"
+             " engine (e.g. .prototxt, .pbtxt or .cfg), if the model format"
+             " requires one.")
+    parser.add_argument(
+        '--modelType',
+        type=str,
+        default='SSD',
+        help="Output format of the model used by the OpenCV detection engine."
+             " Either 'SSD' or 'YOLO'")
+    parser.add_argument(
+        '--labelIdOffset',
+        type=int,
+        default=None,
+        help="Offset that is added to the label IDs of the OpenCV detection"
+             " engine to match the labels file. Defaults to -1 for SSD models,"
+             " since they use 0 as background, and 0 for YOLO models.")
+    parser.add_argument(
+        '--asynchronousInference',
+        action='store_true',
+        help="Infer the next frame of the OpenCV detection engine in a worker"
+             " thread. This increases the frame rate, but the detected"
+             " candidates are one frame late.")
     parser.add_argument(
         '--labels',
         type=Path,
@@ -107,12 +210,148 @@ def parse_arguments() -> RobotCameramanArguments:
     parser.add_argument('--maxObjects', type=int,
                         default=10,
                         help="Maximum objects to infer in each frame of video.")
+    parser.add_argument('--inferenceThreads', type=int,
+                        default=4,
+                        help="Number of threads used by the TFLite and OpenCV"
+                             " detection engine.")
+    parser.add_argument('--inferenceInputWidth', type=int,
+                        default=None,
+                        help="Resize the input of the TFLite model to this"
+                             " width. Defaults to the input size of the model"
+                             " (TFLite) or 300 (OpenCV).")
+    parser.add_argument('--inferenceInputHeight', type=int,
+                        default=None,
+                        help="Resize the input of the TFLite model to this"
+                             " height. Defaults to the input size of the"
+                             " model (TFLite) or 300 (OpenCV).")
     parser.add_argument('--confidence', type=float,
                         default=0.50,
                         help="Minimum confidence threshold to tag objects.")
+    parser.add_argument('--objectTracker', type=str,
+                        default='Centroid',
+                        help="The object tracker to use. Either 'Centroid'"
+                             " (greedy matching of closest centers),"
+                             " 'Assignment' (optimal assignment) or 'Kalman'"
+                             " (optimal assignment to predicted objects).")
+    parser.add_argument('--egoMotionCompensation',
+                        action='store_true',
+                        help="Move tracked objects by the motion in the image"
+                             " that is caused by panning, tilting and zooming"
+                             " before candidates are assigned. Only supported"
+                             " by the 'Assignment' and 'Kalman' object"
+                             " tracker.")
+    parser.add_argument('--cameraHorizontalFieldOfView',
+                        type=float, default=84.0,
+                        help="Horizontal field of view in degree of the used"
+                             " camera at zoom ratio 1.0x, which is used for"
+                             " the ego-motion compensation and predictive"
+                             " tracking.")
+    parser.add_argument('--reIdentification',
+                        action='store_true',
+                        help="Restore the ID of the target by its appearance,"
+                             " if it is detected again after it has been lost"
+                             " (e.g. left the frame or has been occluded)."
+                             " Another object is not tracked instead, while"
+                             " the target might be re-identified (see"
+                             " --reIdentificationGracePeriod).")
+    parser.add_argument('--reIdentificationMaxAge', type=float,
+                        default=60.0,
+                        help="Seconds after which a lost object is not"
+                             " re-identified anymore.")
+    parser.add_argument('--reIdentificationGracePeriod', type=float,
+                        default=5.0,
+                        help="Seconds to wait for the re-identification of"
+                             " the lost target, before another object is"
+                             " tracked instead.")
+    parser.add_argument('--trajectories',
+                        action='store_true',
+                        help="Keep the recent trajectory of each tracked"
+                             " object and draw the trail of the target.")
+    parser.add_argument('--trajectoryLog', type=Path,
+                        default=None,
+                        help="Write the trajectories of all tracked objects"
+                             " to this CSV file (implies --trajectories).")
+    parser.add_argument('--predictiveTracking',
+                        action='store_true',
+                        help="Compensate the latency of the pipeline by"
+                             " computing pan and tilt speed from the predicted"
+                             " position of the target (based on its velocity)"
+                             " and add a velocity feed-forward term."
+                             " The velocity is estimated by the 'Kalman'"
+                             " object tracker. Otherwise, it implies"
+                             " --trajectories.")
+    parser.add_argument('--pidTracking',
+                        action='store_true',
+                        help="Control pan and tilt speed by PID controllers."
+                             " Gains can be tuned by"
+                             " python -m robot_cameraman.pid")
+    parser.add_argument('--pidPanGains', type=float, nargs=3,
+                        default=[24.0, 0.0, 0.0],
+                        metavar=('P', 'I', 'D'),
+                        help="Gains of the PID controller of the pan speed"
+                             " at zoom ratio 1.0x.")
+    parser.add_argument('--pidTiltGains', type=float, nargs=3,
+                        default=[16.0, 0.0, 0.0],
+                        metavar=('P', 'I', 'D'),
+                        help="Gains of the PID controller of the tilt speed"
+                             " at zoom ratio 1.0x.")
+    parser.add_argument('--closedLoopZoom',
+                        action='store_true',
+                        help="Zoom to the zoom ratio that frames the target"
+                             " at the desired size based on the zoom ratio"
+                             " reported by the camera (requires Panasonic"
+                             " live view) instead of comparing the target"
+                             " size with the destination.")
+    parser.add_argument('--maxZoomRatio', type=float,
+                        default=30.0,
+                        help="Maximum zoom ratio of the camera that is used"
+                             " by the closed loop zoom.")
+    parser.add_argument('--motionGate',
+                        action='store_true',
+                        help="Skip detection and reuse the previous result,"
+                             " if the camera does not move and the scene did"
+                             " not change, e.g. while waiting for a target.")
+    parser.add_argument('--motionGateSensitivity', type=int,
+                        default=10,
+                        help="Minimum difference of gray values (0-255) of a"
+                             " pixel in the downscaled frame to be considered"
+                             " as changed by the motion gate.")
+    parser.add_argument('--motionGateRefreshInterval', type=float,
+                        default=2.0,
+                        help="Run detection at least every given seconds,"
+                             " even if the motion gate does not detect"
+                             " changes.")
     parser.add_argument('--gimbal', type=str,
                         default='SimpleBGC',
-                        help="The gimbal to use. Either 'SimpleBGC' or 'Dummy'")
+                        help="The gimbal to use. Either 'SimpleBGC',"
+                             " 'PipelinedSimpleBGC' or 'Dummy'."
+                             " 'PipelinedSimpleBGC' does not wait for the"
+                             " confirmation of control commands, but sends"
+                             " commands and reads responses in a separate"
+                             " thread.")
+    parser.add_argument('--gimbalKeepAliveInterval', type=float,
+                        default=1.0,
+                        help="Control commands that do not change the speeds"
+                             " or angles of the gimbal (in units of the"
+                             " SimpleBGC serial protocol) are only sent again"
+                             " after this interval in seconds.")
+    parser.add_argument('--serialRecording', type=Path,
+                        default=None,
+                        help="Write all bytes that are received from the"
+                             " gimbal to this file (only PipelinedSimpleBGC),"
+                             " e.g. to benchmark simplebgc.frame_parser.")
+    parser.add_argument('--gimbalStreamInterval', type=float,
+                        default=None,
+                        help="Let the gimbal stream its angles every given"
+                             " seconds (only PipelinedSimpleBGC) instead of"
+                             " requesting them in each update. The streamed"
+                             " speeds are used to estimate the ego-motion"
+                             " (see --egoMotionCompensation and"
+                             " --predictiveTracking).")
+    parser.add_argument('--gimbalStateLog', type=Path,
+                        default=None,
+                        help="Write the streamed angles of the gimbal to this"
+                             " CSV file (requires --gimbalStreamInterval).")
     parser.add_argument('--liveView', type=str,
                         default='Panasonic',
                         help="The live view (camera) to use."
@@ -158,6 +397,19 @@ def parse_arguments() -> RobotCameramanArguments:
                         type=int, default=400,
                         help="Defines how fast the gimbal may accelerate"
                              " in tilting direction per second")
+    parser.add_argument('--stopControlRate', type=float,
+                        default=25.0,
+                        help="Commands per second that are sent to the gimbal"
+                             " while it is slowed down to stop.")
+    parser.add_argument('--stopTimeout', type=float,
+                        default=5.0,
+                        help="Seconds after which the gimbal is stopped"
+                             " immediately, if it is still slowed down.")
+    parser.add_argument('--firmwareStopRamp',
+                        action='store_true',
+                        help="Stop the gimbal by a single command and let the"
+                             " firmware of the gimbal slow down according to"
+                             " its configured acceleration limits.")
     parser.add_argument('--variance',
                         type=int, default=80,
                         help="Defines the variance up to which no movement"
@@ -188,8 +440,30 @@ def parse_arguments() -> RobotCameramanArguments:
         type=Path,
         default=resources / 'server.pem',
         help="Path to server SSL-certificate file.")
+    args = parser.parse_args()
+    if args.model is None:
+        args.model = resources / (
+            cpu_mobilenet if args.detectionEngine == 'TFLite' else mobilenet)
     # noinspection PyTypeChecker
-    return parser.parse_args()
+    return args
+
+
+def create_object_tracker(
+        name: str,
+        ego_motion: Optional[EgoMotion]) -> ObjectTracker:
+    if name == 'Centroid':
+        if ego_motion is not None:
+            print("Centroid object tracker does not support"
+                  " ego-motion compensation")
+            exit(1)
+        return ObjectTracker(max_disappeared=25)
+    elif name == 'Assignment':
+        return AssignmentObjectTracker(max_disappeared=25,
+                                       ego_motion=ego_motion)
+    elif name == 'Kalman':
+        return KalmanObjectTracker(max_disappeared=25, ego_motion=ego_motion)
+    print(f"Unknown object tracker {name}")
+    exit(1)
 
 
 def quit(sig=None, frame=None):
@@ -204,6 +478,23 @@ def quit(sig=None, frame=None):
         print('wait for camera manager thread')
         camera_manager.cancel()
         camera_manager.join()
+    if open_cv_detection_engine is not None:
+        open_cv_detection_engine.close()
+    if trajectory_log is not None:
+        trajectory_log.close()
+    print('wait for zoom command worker thread')
+    zoom_command_worker.cancel()
+    zoom_command_worker.join(timeout=5)
+    print(f'zoom commands: {zoom_command_worker.statistics()}')
+    print(f'gimbal commands: {gimbal.statistics}')
+    if motion_gate is not None:
+        print(f'motion gate: {motion_gate.detected_frames} detected,'
+              f' {motion_gate.skipped_frames} skipped frames')
+    if isinstance(decorated_gimbal, PipelinedSimpleBgcGimbal):
+        decorated_gimbal.close()
+        statistics = decorated_gimbal.transport.statistics()
+        print(f'serial transport: {statistics}')
+        print(f'round trip times: {statistics.round_trip_times}')
     exit(0)
 
 
@@ -241,28 +532,103 @@ destination = Destination(live_view_image_size, variance=args.variance)
 camera_manager = PanasonicCameraManager(
     identify_as=args.identifyToPanasonicCameraAs)
 max_speed_and_acceleration_updater = MaxSpeedAndAccelerationUpdater()
-configurable_tracking_strategy = \
-    ConfigurableTrackingStrategy(
-        destination, live_view_image_size, max_allowed_speed=24)
-tracking_strategy = StopIfLostTrackingStrategy(
-    destination,
-    max_speed_and_acceleration_updater.add(
-        configurable_tracking_strategy),
-    slow_down_time=1)
-gimbal = SimpleBgcGimbal() if args.gimbal == 'SimpleBGC' else DummyGimbal()
 rotate_speed_manager = max_speed_and_acceleration_updater.add(
     SpeedManager(args.rotationalAccelerationPerSecond))
 tilt_speed_manager = max_speed_and_acceleration_updater.add(
     SpeedManager(args.tiltingAccelerationPerSecond))
+if args.predictiveTracking and args.pidTracking:
+    print("Predictive and PID tracking can not be combined")
+    exit(1)
+if ((args.gimbalStreamInterval is not None
+     or args.serialRecording is not None)
+        and args.gimbal != 'PipelinedSimpleBGC'):
+    print("--gimbalStreamInterval and --serialRecording require"
+          " --gimbal PipelinedSimpleBGC")
+    exit(1)
+if args.gimbalStateLog is not None and args.gimbalStreamInterval is None:
+    print("--gimbalStateLog requires --gimbalStreamInterval")
+    exit(1)
+decorated_gimbal: Gimbal
+if args.gimbal == 'SimpleBGC':
+    decorated_gimbal = SimpleBgcGimbal()
+elif args.gimbal == 'PipelinedSimpleBGC':
+    serial_transport = SerialTransport(
+        recording=(None if args.serialRecording is None
+                   else args.serialRecording.open('wb')))
+    serial_transport.start()
+    decorated_gimbal = PipelinedSimpleBgcGimbal(
+        serial_transport,
+        angles_stream_interval=args.gimbalStreamInterval)
+    if args.gimbalStateLog is not None:
+        assert decorated_gimbal.angles_stream is not None
+        decorated_gimbal.angles_stream.add_listener(GimbalStateLog(
+            args.gimbalStateLog.open('w', newline='', buffering=1)))
+else:
+    decorated_gimbal = DummyGimbal()
+gimbal = CoalescingGimbal(decorated_gimbal,
+                          keep_alive_interval=args.gimbalKeepAliveInterval)
+# estimates the motion in the image that is caused by the camera
+ego_motion: Optional[EgoMotion] = None
+if args.egoMotionCompensation or args.predictiveTracking:
+    ego_motion = EgoMotion(
+        image_size=live_view_image_size,
+        horizontal_field_of_view=args.cameraHorizontalFieldOfView,
+        pan_speed_manager=rotate_speed_manager,
+        tilt_speed_manager=tilt_speed_manager,
+        # speeds streamed by the gimbal instead of the commanded speeds
+        measured_speeds=(
+            decorated_gimbal.speeds
+            if isinstance(decorated_gimbal, PipelinedSimpleBgcGimbal)
+            and decorated_gimbal.angles_stream is not None
+            else None))
+if args.pidTracking:
+    configurable_tracking_strategy = PidTrackingStrategy(
+        destination, live_view_image_size,
+        pan_gains=PidGains(*args.pidPanGains),
+        tilt_gains=PidGains(*args.pidTiltGains),
+        pan_acceleration=lambda: rotate_speed_manager.acceleration_per_second,
+        tilt_acceleration=lambda: tilt_speed_manager.acceleration_per_second,
+        max_allowed_speed=24)
+elif args.predictiveTracking:
+    assert ego_motion is not None
+    configurable_tracking_strategy = PredictiveTrackingStrategy(
+        destination, live_view_image_size, max_allowed_speed=24,
+        camera_velocity=ego_motion.velocity)
+else:
+    configurable_tracking_strategy = ConfigurableTrackingStrategy(
+        destination, live_view_image_size, max_allowed_speed=24)
+zoom_controller: Optional[ClosedLoopZoomController] = None
+if args.closedLoopZoom:
+    zoom_controller = ClosedLoopZoomController(
+        max_zoom_ratio=args.maxZoomRatio)
+    tracking_strategy = StopIfLostTrackingStrategy(
+        destination,
+        ClosedLoopZoomTrackingStrategy(
+            destination,
+            max_speed_and_acceleration_updater.add(
+                configurable_tracking_strategy),
+            zoom_controller),
+        slow_down_time=1)
+else:
+    tracking_strategy = StopIfLostTrackingStrategy(
+        destination,
+        max_speed_and_acceleration_updater.add(
+            configurable_tracking_strategy),
+        slow_down_time=1)
 configurable_align_tracking_strategy = \
     ConfigurableAlignTrackingStrategy(
         destination, live_view_image_size, max_allowed_speed=16)
+zoom_command_worker = ZoomCommandWorker(camera_manager)
 cameraman_mode_manager = CameramanModeManager(
     camera_controller=SmoothCameraController(
         gimbal,
         camera_manager,
         rotate_speed_manager=rotate_speed_manager,
-        tilt_speed_manager=tilt_speed_manager),
+        tilt_speed_manager=tilt_speed_manager,
+        zoom_command_worker=zoom_command_worker,
+        control_rate=args.stopControlRate,
+        stop_timeout=args.stopTimeout,
+        is_firmware_stop_ramp=args.firmwareStopRamp),
     align_tracking_strategy=max_speed_and_acceleration_updater.add(
         configurable_align_tracking_strategy),
     tracking_strategy=tracking_strategy,
@@ -276,6 +642,9 @@ user_interfaces.append(
     ConfigurableTrackingStrategyUi(
         tracking_strategy=configurable_tracking_strategy,
         align_strategy=configurable_align_tracking_strategy))
+if isinstance(configurable_tracking_strategy, PredictiveTrackingStrategy):
+    user_interfaces.append(
+        PredictiveTrackingStrategyUi(configurable_tracking_strategy))
 # noinspection PyProtectedMember
 user_interfaces.append(
     ShowSpeedsInStatusBar(
@@ -283,8 +652,19 @@ user_interfaces.append(
         tilt_speed_manager=tilt_speed_manager,
         camera_speeds=cameraman_mode_manager._camera_speeds))
 
+camera_detection_engine: Optional[PanasonicCameraDetectionEngine] = None
+if args.detectionEngine == 'Panasonic' or args.fuseCameraDetection:
+    camera_detection_engine = PanasonicCameraDetectionEngine(
+        target_label_id=args.targetLabelId,
+        camera_coordinates_size=ImageSize(
+            args.cameraDetectionCoordinatesWidth,
+            args.cameraDetectionCoordinatesHeight))
+
+open_cv_detection_engine: Optional[OpenCvDnnDetectionEngine] = None
 if args.detectionEngine == 'Dummy':
     detection_engine = DummyDetectionEngine()
+elif args.detectionEngine == 'Panasonic':
+    detection_engine = camera_detection_engine
 elif args.detectionEngine == 'Color':
     detection_engine = ColorDetectionEngine(
         target_label_id=args.targetLabelId,
@@ -293,14 +673,45 @@ elif args.detectionEngine == 'Color':
     user_interfaces.append(
         ColorDetectionEngineUI(engine=detection_engine,
                                configuration_file=args.config))
+elif args.detectionEngine == 'CamShift':
+    detection_engine = CamShiftDetectionEngine(
+        target_label_id=args.targetLabelId)
+elif args.detectionEngine == 'TFLite':
+    detection_engine = TfLiteDetectionEngine(
+        model=args.model,
+        confidence=args.confidence,
+        max_objects=args.maxObjects,
+        num_threads=args.inferenceThreads,
+        input_size=(
+            ImageSize(args.inferenceInputWidth, args.inferenceInputHeight)
+            if args.inferenceInputWidth and args.inferenceInputHeight
+            else None),
+        label_ids={args.targetLabelId})
+elif args.detectionEngine == 'OpenCV':
+    cv2.setNumThreads(args.inferenceThreads)
+    detection_engine = open_cv_detection_engine = OpenCvDnnDetectionEngine(
+        model=args.model,
+        config=args.modelConfig,
+        model_type=OpenCvDnnModelType[args.modelType],
+        input_size=ImageSize(args.inferenceInputWidth or 300,
+                             args.inferenceInputHeight or 300),
+        confidence=args.confidence,
+        max_objects=args.maxObjects,
+        label_ids={args.targetLabelId},
+        label_id_offset=args.labelIdOffset,
+        asynchronous=args.asynchronousInference)
 elif args.detectionEngine == 'EdgeTPU':
     detection_engine = EdgeTpuDetectionEngine(
         model=args.model,
         confidence=args.confidence,
-        max_objects=args.maxObjects)
+        max_objects=args.maxObjects,
+        label_ids={args.targetLabelId})
 else:
     print(f"Unknown detection engine {args.detectionEngine}")
     exit(1)
+if args.fuseCameraDetection and args.detectionEngine != 'Panasonic':
+    detection_engine = FusedDetectionEngine(
+        [camera_detection_engine, detection_engine])
 
 if args.liveView == 'Webcam':
     live_view = WebcamLiveView()
@@ -309,28 +720,81 @@ elif args.liveView == 'Panasonic':
     camera_observable = PanasonicCameraObservable(
         min_focal_length=args.cameraMinFocalLength)
     live_view.add_ex_header_listener(camera_observable.on_ex_header)
+    if camera_detection_engine is not None:
+        live_view.add_ex_header_listener(
+            camera_detection_engine.on_ex_header)
     camera_observable.add_listener(
         ObservableCameraProperty.ZOOM_RATIO,
         max_speed_and_acceleration_updater.on_zoom_ratio)
+    if ego_motion is not None:
+        camera_observable.add_listener(
+            ObservableCameraProperty.ZOOM_RATIO, ego_motion.on_zoom_ratio)
+    if zoom_controller is not None:
+        camera_observable.add_listener(
+            ObservableCameraProperty.ZOOM_RATIO, zoom_controller.on_zoom_ratio)
+    if isinstance(configurable_tracking_strategy, PidTrackingStrategy):
+        camera_observable.add_listener(
+            ObservableCameraProperty.ZOOM_RATIO,
+            configurable_tracking_strategy.on_zoom_ratio)
 else:
     print(f"Unknown live view {args.liveView}")
     exit(1)
+if camera_detection_engine is not None and args.liveView != 'Panasonic':
+    print("Detection of the camera requires the Panasonic live view")
+    exit(1)
 
 manual_camera_speeds = max_speed_and_acceleration_updater.add(
     CameraSpeeds(pan_speed=8, tilt_speed=4, zoom_speed=ZoomSpeed.ZOOM_IN_SLOW))
+object_tracker = create_object_tracker(
+    args.objectTracker,
+    ego_motion if args.egoMotionCompensation else None)
+trajectories: Optional[Trajectories] = None
+trajectory_log: Optional[TextIO] = None
+if args.trajectoryLog is not None:
+    # line buffered, so that the log is complete, even if the process is killed
+    trajectory_log = args.trajectoryLog.open('w', newline='', buffering=1)
+    trajectories = Trajectories(log=trajectory_log)
+elif (args.trajectories
+      or (args.predictiveTracking and args.objectTracker != 'Kalman')):
+    # the velocity of the target is estimated by its trajectory, if the
+    # object tracker does not estimate it
+    trajectories = Trajectories()
+motion_gate: Optional[MotionGate] = None
+if args.motionGate:
+    motion_gate = MotionGate(
+        sensitivity=args.motionGateSensitivity,
+        refresh_interval=args.motionGateRefreshInterval)
 # noinspection PyUnboundLocalVariable
 cameraman = Cameraman(
     live_view=live_view,
-    annotator=ImageAnnotator(args.targetLabelId, labels, font),
+    annotator=ImageAnnotator(
+        args.targetLabelId, labels, font,
+        gimbal_state=(lambda: decorated_gimbal.state)
+        if isinstance(decorated_gimbal, PipelinedSimpleBgcGimbal) else None),
     detection_engine=detection_engine,
     destination=destination,
     mode_manager=cameraman_mode_manager,
-    object_tracker=ObjectTracker(max_disappeared=25),
-    target_label_id=args.targetLabelId,
+    object_tracker=object_tracker,
     output=create_video_writer(args.output, live_view_image_size),
     user_interfaces=user_interfaces,
     # TODO get max speeds from separate CLI arguments
-    manual_camera_speeds=manual_camera_speeds)
+    manual_camera_speeds=manual_camera_speeds,
+    motion_gate=motion_gate,
+    re_identifier=AppearanceReIdentifier(
+        object_tracker, max_age=args.reIdentificationMaxAge)
+    if args.reIdentification else None,
+    re_identification_grace_period=args.reIdentificationGracePeriod,
+    trajectories=trajectories,
+    latency_listener=(
+        configurable_tracking_strategy.on_pipeline_latency
+        if isinstance(configurable_tracking_strategy,
+                      PredictiveTrackingStrategy)
+        else None),
+    target_velocity_listener=(
+        configurable_tracking_strategy.on_target_velocity
+        if isinstance(configurable_tracking_strategy,
+                      PredictiveTrackingStrategy)
+        else None))
 
 to_exit = threading.Event()
 server_image = ImageContainer(
@@ -340,6 +804,7 @@ signal.signal(signal.SIGINT, quit)
 signal.signal(signal.SIGTERM, quit)
 
 camera_manager.start()
+zoom_command_worker.start()
 cameraman_thread = threading.Thread(target=run_cameraman, daemon=True)
 cameraman_thread.start()
 print('Open https://localhost:9000/index.html in your browser')
@@ -1,4 +1,4 @@
-from typing import Optional, Dict, NamedTuple
+from typing import Optional, Dict, NamedTuple, Callable
 
 import PIL.Image
 import PIL.ImageDraw
@@ -9,6 +9,8 @@ from robot_cameraman.box import Point
 from robot_cameraman.color import Color
 from robot_cameraman.image_detection import DetectionCandidate
 from robot_cameraman.tracking import Destination
+from robot_cameraman.trajectory import TrajectoryRingBuffer
+from simplebgc.data_stream import GimbalState
 
 
 class _Target(NamedTuple):
@@ -23,19 +25,36 @@ class ImageAnnotator:
             self,
             target_label_id: int,
             labels: Dict[int, str],
-            font: FreeTypeFont) -> None:
+            font: FreeTypeFont,
+            gimbal_state: Optional[Callable[[], Optional[GimbalState]]]
+            = None) -> None:
+        """
+        :param gimbal_state: returns the latest (streamed) state of the
+            gimbal, which is shown below the mode name
+        """
         self.target_label_id = target_label_id
         self.labels = labels
         self.font = font
+        self.gimbal_state = gimbal_state
 
     def annotate(
             self,
             image: PIL.Image.Image,
             target_id: Optional[int],
             candidates: Dict[int, DetectionCandidate],
-            mode_name: str) -> None:
+            mode_name: str,
+            target_trajectory: Optional[TrajectoryRingBuffer] = None) -> None:
         draw = PIL.ImageDraw.Draw(image)
         draw.text((0, 0), mode_name, font=self.font)
+        if self.gimbal_state is not None:
+            state = self.gimbal_state()
+            if state is not None:
+                draw.text((0, self.font.size),
+                          f'pan {state.pan_angle:.1f}°'
+                          f' tilt {state.tilt_angle:.1f}°',
+                          font=self.font)
+        if target_trajectory is not None:
+            draw_trail(draw, target_trajectory, (0, 255, 0))
         # Iterate through result list. Note that results are already sorted by
         # confidence score (highest to lowest) and records with a lower score
         # than the threshold are already removed.
@@ -98,3 +117,13 @@ def draw_point(
         radius: int = 3) -> None:
     x, y = point
     draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=color)
+
+
+def draw_trail(
+        draw: ImageDraw,
+        trajectory: TrajectoryRingBuffer,
+        color: Color,
+        length: int = 32) -> None:
+    centers = trajectory.recent(length)[:, 1:3]
+    if len(centers) > 1:
+        draw.line([tuple(c) for c in centers.tolist()], fill=color, width=2)
@@ -1,14 +1,17 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Iterable, List
+from typing import Iterable, List, Optional
 
 from math import sqrt
 from typing_extensions import Protocol
 
+from robot_cameraman import geometry
+
 
 @dataclass
 class Point:
+    __slots__ = ('x', 'y')
     x: float
     y: float
 
@@ -25,6 +28,7 @@ class Point:
 
 
 class Box(Protocol):
+    __slots__ = ()
     x: float
     y: float
     width: float
@@ -53,12 +57,10 @@ class Box(Protocol):
         return CenterSizeBox(center, width, height)
 
     def contains_point(self, point: Point):
-        x, y = point
-        return (self.x <= x <= self.x + self.width
-                and self.y <= y <= self.y + self.height)
+        return geometry.contains_point(self, point.x, point.y)
 
     def area(self):
-        return self.width * self.height
+        return geometry.area(self)
 
     def intersect(self, other: Box) -> Box:
         x1 = max(self.x, other.x)
@@ -71,20 +73,32 @@ class Box(Protocol):
         return Box.from_coordinates(x1, y1, x2, y2)
 
     def percental_intersection_area(self, other: Box):
-        return self.intersect(other).area() / min(self.area(), other.area())
+        return geometry.percental_intersection_area(self, other)
 
 
 class TwoPointsBox(Box):
+    __slots__ = ('x', 'y', 'width', 'height',
+                 '_center_x', '_center_y', '_center')
 
     def __init__(self, x1: float, y1: float, x2: float, y2: float) -> None:
         self.x = x1
         self.y = y1
         self.width = abs(x2 - x1)
         self.height = abs(y2 - y1)
-        self.center = Point(abs(x1 + x2) / 2, abs(y1 + y2) / 2)
+        self._center_x = abs(x1 + x2) / 2
+        self._center_y = abs(y1 + y2) / 2
+        # created on first access, since most boxes never need it
+        self._center: Optional[Point] = None
+
+    @property
+    def center(self) -> Point:
+        if self._center is None:
+            self._center = Point(self._center_x, self._center_y)
+        return self._center
 
 
 class CenterSizeBox(Box):
+    __slots__ = ('x', 'y', 'width', 'height', 'center')
 
     def __init__(self, center: Point, width: float, height: float) -> None:
         half_width = width / 2
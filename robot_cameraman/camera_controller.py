@@ -4,7 +4,7 @@ from dataclasses import dataclass
 from enum import Enum, auto
 from logging import Logger
 from math import isclose
-from time import time
+from time import time, sleep
 from typing import List, Optional
 
 import numpy
@@ -15,6 +15,8 @@ from panasonic_camera.camera_manager import PanasonicCameraManager
 from robot_cameraman.angle import get_delta_angle_clockwise, \
     get_delta_angle_counter_clockwise
 from robot_cameraman.tracking import CameraSpeeds, ZoomSpeed
+from robot_cameraman.zoom_command_worker import ZoomCommandWorker, \
+    send_zoom_command
 from simplebgc.commands import GetAnglesInCmd
 from simplebgc.gimbal import Gimbal, ControlMode
 from simplebgc.units import to_degree, to_degree_per_sec
@@ -117,17 +119,41 @@ class SmoothCameraController(CameraController):
                  gimbal: Gimbal,
                  camera_manager: PanasonicCameraManager,
                  rotate_speed_manager: SpeedManager,
-                 tilt_speed_manager: SpeedManager):
+                 tilt_speed_manager: SpeedManager,
+                 zoom_command_worker: Optional[ZoomCommandWorker] = None,
+                 control_rate: float = 25.0,
+                 stop_timeout: float = 5.0,
+                 is_firmware_stop_ramp: bool = False):
+        """
+        :param zoom_command_worker: sends zoom commands without blocking.
+            If it is not given, zoom commands are sent synchronously.
+        :param control_rate: commands per second that are sent to the gimbal
+            while the camera is slowed down by stop
+        :param stop_timeout: seconds after which the gimbal is stopped
+            immediately, if it is still slowed down by stop
+        :param is_firmware_stop_ramp: stop sends a single command with speed 0
+            and leaves deceleration to the acceleration limits configured in
+            the firmware of the gimbal
+        """
         self._gimbal = gimbal
         self._camera_manager = camera_manager
         self._rotate_speed_manager = rotate_speed_manager
         self._tilt_speed_manager = tilt_speed_manager
+        self._zoom_command_worker = zoom_command_worker
+        self.control_rate = control_rate
+        self.stop_timeout = stop_timeout
+        self.is_firmware_stop_ramp = is_firmware_stop_ramp
+        self.last_stop_duration: Optional[float] = None
 
     def start(self) -> None:
         self._rotate_speed_manager.reset()
         self._tilt_speed_manager.reset()
 
     def update(self, camera_speeds: CameraSpeeds) -> None:
+        self._update_gimbal(camera_speeds)
+        self._update_zoom(camera_speeds)
+
+    def _update_gimbal(self, camera_speeds: CameraSpeeds) -> None:
         logger.debug('new speeds: pan %5d, tilt %5d',
                      camera_speeds.pan_speed,
                      camera_speeds.tilt_speed)
@@ -148,27 +174,18 @@ class SmoothCameraController(CameraController):
             logger.error(f'failed to control gimbal: {e}')
             self._rotate_speed_manager.current_speed = old_speed
             self._tilt_speed_manager.current_speed = old_tilt_speed
+
+    def _update_zoom(self, camera_speeds: CameraSpeeds) -> None:
+        if self._zoom_command_worker is not None:
+            self._zoom_command_worker.submit(camera_speeds.zoom_speed)
+            return
         try:
             camera = self._camera_manager.camera
             if camera is not None:
                 logger.debug('zoom: new {: >5}, old {: >5}'.format(
                     camera_speeds.zoom_speed, self._old_zoom_speed))
                 if camera_speeds.zoom_speed is not self._old_zoom_speed:
-                    if camera_speeds.zoom_speed is ZoomSpeed.ZOOM_IN_FAST:
-                        logger.debug('zoom in fast')
-                        camera.zoom_in_fast()
-                    elif camera_speeds.zoom_speed is ZoomSpeed.ZOOM_IN_SLOW:
-                        logger.debug('zoom in slow')
-                        camera.zoom_in_fast()
-                    elif camera_speeds.zoom_speed is ZoomSpeed.ZOOM_STOPPED:
-                        logger.debug('zoom stop')
-                        camera.zoom_stop()
-                    elif camera_speeds.zoom_speed is ZoomSpeed.ZOOM_OUT_SLOW:
-                        logger.debug('zoom out slow')
-                        camera.zoom_out_slow()
-                    elif camera_speeds.zoom_speed is ZoomSpeed.ZOOM_OUT_FAST:
-                        logger.debug('zoom out fast')
-                        camera.zoom_out_fast()
+                    send_zoom_command(camera, camera_speeds.zoom_speed)
                 self._old_zoom_speed = camera_speeds.zoom_speed
         except Exception as e:
             logger.error('failed to zoom camera: %s', e)
@@ -178,8 +195,47 @@ class SmoothCameraController(CameraController):
                 or self._tilt_speed_manager.current_speed != 0)
 
     def stop(self, camera_speeds: CameraSpeeds) -> None:
-        while self.is_camera_moving():
-            self.update(camera_speeds)
+        """
+        Slow down the gimbal to the given speeds (usually 0) at the control
+        rate. The zoom speed is only sent once. If the speeds are not reached
+        before stop_timeout, the gimbal is stopped immediately.
+        """
+        start_time = time()
+        self._update_zoom(camera_speeds)
+        if self.is_firmware_stop_ramp:
+            self._stop_immediately(camera_speeds)
+        else:
+            interval = 1 / self.control_rate
+            deadline = start_time + self.stop_timeout
+            next_update_time = start_time
+            while self.is_camera_moving():
+                if time() >= deadline:
+                    logger.warning(f'camera did not stop within'
+                                   f' {self.stop_timeout}s, stop immediately')
+                    self._stop_immediately(camera_speeds)
+                    break
+                self._update_gimbal(camera_speeds)
+                if not self.is_camera_moving():
+                    break
+                next_update_time += interval
+                delay = next_update_time - time()
+                if delay > 0:
+                    sleep(delay)
+        self.last_stop_duration = time() - start_time
+        logger.info(f'stopped camera in {self.last_stop_duration:.2f}s')
+
+    def _stop_immediately(self, camera_speeds: CameraSpeeds) -> None:
+        try:
+            self._gimbal.control(yaw_speed=camera_speeds.pan_speed,
+                                 pitch_speed=-camera_speeds.tilt_speed)
+        except serial.serialutil.SerialException as e:
+            logger.error(f'failed to stop gimbal: {e}')
+            return
+        for speed_manager, speed in (
+                (self._rotate_speed_manager, camera_speeds.pan_speed),
+                (self._tilt_speed_manager, camera_speeds.tilt_speed)):
+            speed_manager.target_speed = speed
+            speed_manager.current_speed = speed
 
 
 @dataclass()
@@ -190,6 +246,8 @@ class PointOfMotion:
     tilt_clockwise: bool = True
     time: float = 0.0
     zoom_factor: float = 1.0
+    pan_turns: int = 0
+    """Number of additional full rotations (360°) to pan."""
 
 
 # TODO pass to controllers instead of CameraSpeeds only
@@ -280,6 +338,8 @@ class PathOfMotionCameraController(ABC):
 # TODO wait if same point as before is given, but with a time > 0
 # TODO zoom
 # TODO move more than 360° (e.g. 0 -> 180 -> 360)
+# See motion_planning.PlannedPathOfMotionCameraController, which considers
+# acceleration, full rotations and zoom.
 class BaseCamPathOfMotionCameraController(PathOfMotionCameraController):
     class _State(Enum):
         """The controller has to be started using """
@@ -540,7 +600,6 @@ def is_angle_between(
 
 
 def _main():
-    from time import sleep
     logging.basicConfig(
         level=logging.DEBUG,
         format='%(asctime)s %(name)-50s %(levelname)-8s %(message)s')
@@ -3,7 +3,7 @@ import os
 import threading
 import time
 from logging import Logger
-from typing import Optional, Iterable, List
+from typing import Optional, Iterable, List, Callable, Dict
 
 import PIL.Image
 import PIL.ImageDraw
@@ -14,16 +14,19 @@ import numpy
 from imutils.video import FPS
 
 from robot_cameraman.annotation import ImageAnnotator, draw_destination
-from robot_cameraman.box import Box
+from robot_cameraman.box import Box, Point
 from robot_cameraman.cameraman_mode_manager import CameramanModeManager
 from robot_cameraman.candidate_filter import filter_intersections
 from robot_cameraman.detection_engine.color import ColorDetectionEngine
 from robot_cameraman.image_detection import DetectionCandidate, \
-    DetectionEngine
+    DetectionEngine, DetectionBatch
 from robot_cameraman.live_view import LiveView, ImageSize
+from robot_cameraman.motion_gate import MotionGate
 from robot_cameraman.object_tracking import ObjectTracker
+from robot_cameraman.reidentification import AppearanceReIdentifier
 from robot_cameraman.server import ImageContainer, ServerImageSource
 from robot_cameraman.tracking import Destination, CameraSpeeds, ZoomSpeed
+from robot_cameraman.trajectory import Trajectories, TrajectoryRingBuffer
 from robot_cameraman.ui import UserInterface, create_attribute_checkbox
 
 logger: Logger = logging.getLogger(__name__)
@@ -41,25 +44,57 @@ class Cameraman:
             destination: Destination,
             mode_manager: CameramanModeManager,
             object_tracker: ObjectTracker,
-            target_label_id: int,
             output: Optional[cv2.VideoWriter],
             user_interfaces: List[UserInterface],
-            manual_camera_speeds: CameraSpeeds) -> None:
+            manual_camera_speeds: CameraSpeeds,
+            motion_gate: Optional[MotionGate] = None,
+            re_identifier: Optional[AppearanceReIdentifier] = None,
+            re_identification_grace_period: float = 5.0,
+            trajectories: Optional[Trajectories] = None,
+            latency_listener: Optional[Callable[[float], None]] = None,
+            target_velocity_listener:
+            Optional[Callable[[Optional[Point]], None]] = None) -> None:
         self._live_view = live_view
         self.annotator = annotator
         self.detection_engine = detection_engine
         self._destination = destination
         self._mode_manager = mode_manager
         self._object_tracker = object_tracker
-        self._target_label_id = target_label_id
         self._output = output
         self._user_interfaces = user_interfaces
         self._manual_camera_speeds = manual_camera_speeds
+        self._motion_gate = motion_gate
+        self._re_identifier = re_identifier
+        self._re_identification_grace_period = re_identification_grace_period
+        self._target_lost_time: Optional[float] = None
+        self._trajectories = trajectories
+        self._latency_listener = latency_listener
+        self._target_velocity_listener = target_velocity_listener
+        self._candidates: Dict[int, DetectionCandidate] = {}
         self._window_title = 'Robot Cameraman'
 
     def _is_target_id_registered(self) -> bool:
-        return (self._target_id is not None
-                and self._object_tracker.is_registered(self._target_id))
+        if self._target_id is None:
+            return False
+        if self._re_identifier is not None:
+            return self._re_identifier.is_registered(self._target_id)
+        return self._object_tracker.is_registered(self._target_id)
+
+    def _is_target_re_identifiable(self, timestamp: float) -> bool:
+        """
+        Whether the target is lost, but might be re-identified. In this case,
+        another object should not be tracked instead. However, if the target
+        is not re-identified within the grace period, another object may be
+        tracked, e.g. if the appearance of the target changed.
+        """
+        if (self._target_id is None
+                or self._re_identifier is None
+                or not self._re_identifier.is_lost(self._target_id)):
+            return False
+        if self._target_lost_time is None:
+            self._target_lost_time = timestamp
+        return (timestamp - self._target_lost_time
+                < self._re_identification_grace_period)
 
     def run(self,
             server_image: ImageContainer,
@@ -100,37 +135,63 @@ class Cameraman:
                 # Perform inference and note time taken
                 start_ms = time.time()
                 try:
-                    inference_results = self.detection_engine.detect(image)
-                    target_inference_results = [
-                        obj for obj in inference_results
-                        if obj.label_id == self._target_label_id]
-                    self.log_candidates('candidates', target_inference_results)
-                    filtered_candidates = filter_intersections(
-                        target_inference_results)
-                    self.log_candidates('filtered_candidates',
-                                        filtered_candidates)
-                    candidates = self._object_tracker.update(
-                        filtered_candidates)
+                    if self._is_detection_required(image):
+                        candidates = self._track(
+                            image, self.detection_engine.detect(image),
+                            start_ms)
+                        self._candidates = candidates
+                        if self._trajectories is not None:
+                            self._trajectories.update(candidates, start_ms)
+                    else:
+                        # The camera does not move and the scene did not
+                        # change. Hence, neither the tracker nor the
+                        # trajectories are updated with the same candidates
+                        # again. The tracker would count it as a frame in
+                        # which unmatched objects disappeared and the
+                        # trajectories would get duplicate samples.
+                        logger.debug('scene did not change, reuse previous'
+                                     ' detection and tracking result')
+                        candidates = self._candidates
                     is_target_lost = False
                     if self._is_target_id_registered():
+                        self._target_lost_time = None
                         if self._target_id in candidates:
                             target = candidates[self._target_id]
                             self._target_box = target.bounding_box
+                    elif self._is_target_re_identifiable(start_ms):
+                        logger.debug('wait for re-identification of target'
+                                     ' %d', self._target_id)
+                        is_target_lost = True
+                        self._target_box = None
                     else:
                         ts = candidates.items()
                         if ts:
                             (self._target_id, target) = next(iter(ts))
                             self._target_box = target.bounding_box
+                            self._target_lost_time = None
                             logger.debug('track target %d', self._target_id)
                         else:
                             is_target_lost = True
                             self._target_box = None
+                    target_trajectory = None
+                    if (self._trajectories is not None
+                            and self._target_id is not None):
+                        target_trajectory = self._trajectories.get(
+                            self._target_id)
+                    if self._target_velocity_listener is not None:
+                        self._target_velocity_listener(
+                            self._target_velocity(target_trajectory))
                     # The mode manager updates the destination as a side effect.
                     # The destination has to be drawn afterwards.
                     self._mode_manager.update(self._target_box, is_target_lost)
+                    # time from receiving the live view image till the
+                    # camera speeds are updated
+                    if self._latency_listener is not None:
+                        self._latency_listener(time.time() - start_ms)
                     draw_destination(image, self._destination)
                     self.annotator.annotate(image, self._target_id, candidates,
-                                            self._mode_manager.mode_name)
+                                            self._mode_manager.mode_name,
+                                            target_trajectory)
                 except OSError as e:
                     logger.error(e)
 
@@ -160,6 +221,56 @@ class Cameraman:
 
         cv2.destroyAllWindows()
 
+    def _target_velocity(
+            self,
+            target_trajectory: Optional[TrajectoryRingBuffer]) \
+            -> Optional[Point]:
+        """
+        :return: velocity of the target in the image (pixels per second)
+            estimated by the object tracker (e.g. KalmanObjectTracker) or
+            by the trajectory of the target. None, if it is unknown.
+        """
+        if self._target_id is None or self._target_box is None:
+            return None
+        tracker_id: Optional[int] = self._target_id
+        if self._re_identifier is not None:
+            tracker_id = self._re_identifier.tracker_id(self._target_id)
+        if tracker_id is not None:
+            velocity = self._object_tracker.velocity(tracker_id)
+            if velocity is not None:
+                return velocity
+        if target_trajectory is None:
+            return None
+        trajectory_velocity = target_trajectory.velocity()
+        if trajectory_velocity is None:
+            return None
+        return Point(*trajectory_velocity)
+
+    def _is_detection_required(self, image) -> bool:
+        return (self._motion_gate is None
+                or self._motion_gate.is_detection_required(
+                    image, self._mode_manager.is_camera_moving()))
+
+    def _track(
+            self,
+            image,
+            inference_results: DetectionBatch,
+            timestamp: float) -> Dict[int, DetectionCandidate]:
+        """
+        :param timestamp: time when the image has been received, which is
+            used by the tracker to predict the objects to this frame
+        """
+        # detection engines only return candidates of the target label
+        self.log_candidates('candidates', inference_results)
+        filtered_candidates = filter_intersections(inference_results)
+        self.log_candidates('filtered_candidates', filtered_candidates)
+        candidates = self._object_tracker.update(
+            filtered_candidates, timestamp)
+        if self._re_identifier is not None:
+            candidates = self._re_identifier.update(
+                image, candidates, timestamp)
+        return candidates
+
     def update_server_image(self, server_image, image):
         if server_image.source is ServerImageSource.LIVE_VIEW:
             server_image.image = image
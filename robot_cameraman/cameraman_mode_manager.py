@@ -90,6 +90,9 @@ class CameramanModeManager:
     def manual_zoom(self, zoom_speed: ZoomSpeed) -> None:
         self._camera_speeds.zoom_speed = zoom_speed
 
+    def is_camera_moving(self) -> bool:
+        return self._camera_controller.is_camera_moving()
+
     def is_manual_mode(self):
         return self.mode_name == 'manual'
 
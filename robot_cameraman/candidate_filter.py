@@ -1,32 +1,25 @@
-from typing import List, Set
+from typing import List, Sequence
 
-from robot_cameraman.image_detection import DetectionCandidate
+import numpy
 
+from robot_cameraman.image_detection import DetectionCandidate, \
+    DetectionBatch
+from robot_cameraman.suppression import suppress_intersections
 
-def filter_intersections(candidates: List[DetectionCandidate]):
-    count = len(candidates)
-    if count == 0:
+
+def filter_intersections(candidates: Sequence[DetectionCandidate]) \
+        -> List[DetectionCandidate]:
+    """
+    Exclude candidates that have a bounding box with a smaller area than the
+    area of the intersected bounding box of another candidate.
+    See suppress_intersections for details.
+    """
+    if len(candidates) == 0:
         return []
-    # Indices of candidates that have a bounding box with a smaller area than
-    # the area of the intersected bounding box of another candidate
-    excluded: Set[int] = set()
-    result: List[DetectionCandidate] = []
-    for c in range(0, count - 1):
-        if c in excluded:
-            continue
-        current = candidates[c]
-        for o in range(c + 1, count):
-            other = candidates[o]
-            intersection = current.bounding_box.percental_intersection_area(
-                other.bounding_box)
-            if intersection > 0.3:
-                if current.bounding_box.area() < other.bounding_box.area():
-                    excluded.add(c)
-                    break
-                else:
-                    excluded.add(o)
-        else:
-            result.append(current)
-    if (count - 1) not in excluded:
-        result.append(candidates[count - 1])
-    return result
+    if isinstance(candidates, DetectionBatch):
+        coordinates = candidates.coordinates()
+    else:
+        coordinates = numpy.array(
+            [c.bounding_box.coordinates() for c in candidates], dtype=float)
+    indices = suppress_intersections(coordinates)
+    return [candidates[i] for i in indices.tolist()]
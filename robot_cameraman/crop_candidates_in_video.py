@@ -9,42 +9,51 @@ import PIL.ImageFont
 import cv2
 
 from robot_cameraman.box import Box
-from robot_cameraman.image_detection import EdgeTpuDetectionEngine
+from robot_cameraman.detection_cache import create_edge_tpu_video_detector
 
 
 def main(args):
-    detection_engine = EdgeTpuDetectionEngine(
+    detector = create_edge_tpu_video_detector(
+        video=Path(args.input),
         model=args.model,
         confidence=args.confidence,
-        max_objects=args.maxObjects)
+        max_objects=args.maxObjects,
+        cache_directory=args.detectionCache)
     vs = cv2.VideoCapture(str(args.input))
     candidate_counter = 0
-    while True:
-        try:
-            success, frame = vs.read()
-            if not success:
-                break
-            image = PIL.Image.fromarray(frame)
-            inference_results = detection_engine.detect(image)
-            candidates = [
-                obj for obj in inference_results
-                if obj.label_id == args.targetLabelId]
-            image = PIL.Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
-            for candidate in candidates:
-                out_file = args.output / '{:0>3}.jpg'.format(candidate_counter)
-                candidate_counter += 1
-                b = candidate.bounding_box
-                size = max(b.width, b.height)
-                box = Box.from_center_and_size(b.center, size, size)
-                image.crop(box.coordinates()).save(out_file)
-            if args.showVideo:
-                cv2.imshow('NCS Improved live inference', frame)
-                if cv2.waitKey(5) & 0xFF == ord('q'):
+    frame_index = 0
+    try:
+        while True:
+            try:
+                success, frame = vs.read()
+                if not success:
                     break
-        except KeyboardInterrupt:
-            break
-    vs.release()
-    cv2.destroyAllWindows()
+                frame_index += 1
+                image = PIL.Image.fromarray(frame)
+                inference_results = detector.detect(frame_index, image)
+                candidates = inference_results.filter(
+                    label_id=args.targetLabelId)
+                image = PIL.Image.fromarray(
+                    cv2.cvtColor(frame, cv2.COLOR_RGB2BGR))
+                for candidate in candidates:
+                    out_file = args.output / '{:0>3}.jpg'.format(
+                        candidate_counter)
+                    candidate_counter += 1
+                    b = candidate.bounding_box
+                    size = max(b.width, b.height)
+                    box = Box.from_center_and_size(b.center, size, size)
+                    image.crop(box.coordinates()).save(out_file)
+                if args.showVideo:
+                    cv2.imshow('NCS Improved live inference', frame)
+                    if cv2.waitKey(5) & 0xFF == ord('q'):
+                        break
+            except KeyboardInterrupt:
+                break
+    finally:
+        vs.release()
+        cv2.destroyAllWindows()
+        hits, misses = detector.save()
+        print(f'detection cache: {hits} hits, {misses} misses')
 
 
 def str2bool(v: Any) -> bool:
@@ -88,6 +97,19 @@ def parse_arguments():
     parser.add_argument('--confidence', type=float,
                         default=0.50,
                         help="Minimum confidence threshold to tag objects.")
+    parser.add_argument(
+        '--detectionCache',
+        type=Path,
+        default=Path(__file__).parent.parent / '.detection-cache',
+        help="Directory of the detection cache. Detection candidates of"
+             " each frame are cached and reused in subsequent runs on the"
+             " same video with the same model and confidence.")
+    parser.add_argument(
+        '--noDetectionCache',
+        dest='detectionCache',
+        action='store_const',
+        const=None,
+        help="Do not use the detection cache.")
     parser.add_argument('--targetLabelId', type=int,
                         default=0,
                         help="ID of label to track.")
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+from logging import Logger
+from pathlib import Path
+from typing import Optional, Dict, Callable, Tuple
+
+import numpy
+
+from robot_cameraman.image_detection import DetectionEngine, \
+    EdgeTpuDetectionEngine, DetectionBatch
+
+logger: Logger = logging.getLogger(__name__)
+
+
+def hash_file_content(file: Path, chunk_size: int = 1 << 20) -> str:
+    sha256 = hashlib.sha256()
+    with open(file, 'rb') as file_descriptor:
+        for chunk in iter(lambda: file_descriptor.read(chunk_size), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class DetectionCache:
+    """
+    Store the detection candidates of each frame of a video file on disk,
+    so that offline tools do not have to run the detection engine again,
+    e.g. if only parameters of the tracker or filters are changed.
+
+    A cache file is identified by the hash of the video file content and the
+    parameters that influence the detection result (engine, model, confidence
+    and maximum number of objects). Candidates of all frames are stored in
+    a single structured array (see DETECTION_DTYPE) with the frame indices and
+    offsets of the frames in this array in an uncompressed npz file, which is
+    fast to load.
+    """
+
+    FORMAT_VERSION = 2
+
+    def __init__(
+            self,
+            directory: Path,
+            video: Path,
+            engine_name: str,
+            model: Path,
+            confidence: float,
+            max_objects: int) -> None:
+        model_hash = hash_file_content(model) if model.exists() else model.name
+        parameters = (f'{self.FORMAT_VERSION}|{engine_name}|{model_hash}'
+                      f'|{confidence}|{max_objects}')
+        parameters_hash = hashlib.sha256(parameters.encode()).hexdigest()[:16]
+        video_hash = hash_file_content(video)
+        self.file = directory / f'{video_hash}-{parameters_hash}.npz'
+        self._candidates: Dict[int, DetectionBatch] = {}
+        self._is_modified = False
+        if self.file.exists():
+            self._load()
+            logger.info(f'loaded detections of {len(self._candidates)} frames'
+                        f' from {self.file}')
+
+    def _load(self) -> None:
+        with numpy.load(self.file) as data:
+            frames = data['frames']
+            offsets = data['offsets']
+            detections = data['detections']
+        for frame_index, start, end in zip(
+                frames.tolist(), offsets[:-1].tolist(), offsets[1:].tolist()):
+            self._candidates[frame_index] = DetectionBatch(
+                detections[start:end])
+
+    def get(self, frame_index: int) -> Optional[DetectionBatch]:
+        return self._candidates.get(frame_index)
+
+    def put(
+            self,
+            frame_index: int,
+            candidates: DetectionBatch) -> None:
+        self._candidates[frame_index] = candidates
+        self._is_modified = True
+
+    def save(self) -> None:
+        if not self._is_modified:
+            return
+        frames = sorted(self._candidates)
+        batches = [self._candidates[frame_index] for frame_index in frames]
+        offsets = numpy.zeros(len(frames) + 1, dtype=numpy.int64)
+        numpy.cumsum([len(b) for b in batches], out=offsets[1:])
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+        numpy.savez(
+            self.file,
+            frames=numpy.asarray(frames, dtype=numpy.int64),
+            offsets=offsets,
+            detections=DetectionBatch.concatenate(batches).array)
+        self._is_modified = False
+        logger.info(f'saved detections of {len(frames)} frames'
+                    f' to {self.file}')
+
+
+class CachedVideoDetector:
+    """
+    Detect candidates in frames of a video using the cache if possible.
+    The detection engine is only created on the first cache miss. Hence, no
+    detection hardware (e.g. Google Coral) is required, if all frames are
+    cached.
+    """
+
+    def __init__(
+            self,
+            cache: Optional[DetectionCache],
+            create_detection_engine: Callable[[], DetectionEngine]) -> None:
+        self._cache = cache
+        self._create_detection_engine = create_detection_engine
+        self._detection_engine: Optional[DetectionEngine] = None
+        self.hits = 0
+        self.misses = 0
+
+    def detect(self, frame_index: int, image) -> DetectionBatch:
+        if self._cache is not None:
+            candidates = self._cache.get(frame_index)
+            if candidates is not None:
+                self.hits += 1
+                return candidates
+        self.misses += 1
+        if self._detection_engine is None:
+            self._detection_engine = self._create_detection_engine()
+        candidates = self._detection_engine.detect(image)
+        if self._cache is not None:
+            self._cache.put(frame_index, candidates)
+        return candidates
+
+    def save(self) -> Tuple[int, int]:
+        """
+        Save cache (if any).
+
+        :return: number of cache hits and misses
+        """
+        if self._cache is not None:
+            self._cache.save()
+        return self.hits, self.misses
+
+
+def create_edge_tpu_video_detector(
+        video: Path,
+        model: Path,
+        confidence: float,
+        max_objects: int,
+        cache_directory: Optional[Path]) -> CachedVideoDetector:
+    cache = None
+    if cache_directory is not None:
+        cache = DetectionCache(
+            directory=cache_directory,
+            video=video,
+            engine_name='EdgeTPU',
+            model=model,
+            confidence=confidence,
+            max_objects=max_objects)
+    return CachedVideoDetector(
+        cache,
+        lambda: EdgeTpuDetectionEngine(
+            model=model,
+            confidence=confidence,
+            max_objects=max_objects))
@@ -0,0 +1,174 @@
+# inspired by the OpenCV tutorial "Meanshift and Camshift"
+# https://docs.opencv.org/4.x/d7/d00/tutorial_meanshift.html
+
+import logging
+from logging import Logger
+from typing import Optional, Tuple
+
+import cv2
+import numpy
+
+from robot_cameraman.box import Box
+from robot_cameraman.image_detection import DetectionEngine, DetectionBatch, \
+    DetectionCandidate
+
+logger: Logger = logging.getLogger(__name__)
+
+# (x, y, width, height) as used by OpenCV
+Window = Tuple[int, int, int, int]
+
+
+class CamShiftDetectionEngine(DetectionEngine):
+    """
+    Learn a hue-saturation histogram of a selected region (e.g. a box that is
+    drawn by the user in the web UI) and track the region using histogram
+    back-projection and CamShift within a search window. Only the search
+    window has to be back-projected, which is much cheaper than thresholding
+    and filtering the whole frame as done by the ColorDetectionEngine.
+
+    If the target is lost (i.e. too little of the back-projection falls into
+    the search window), the whole frame is searched again.
+    """
+
+    def __init__(
+            self,
+            target_label_id: int,
+            hue_bins: int = 16,
+            saturation_bins: int = 16,
+            min_saturation: int = 60,
+            min_value: int = 32,
+            max_value: int = 255,
+            min_back_projection_mass: float = 0.1,
+            search_window_margin: float = 0.5) -> None:
+        self.target_label_id = target_label_id
+        self.hue_bins = hue_bins
+        self.saturation_bins = saturation_bins
+        self.min_saturation = min_saturation
+        self.min_value = min_value
+        self.max_value = max_value
+        self.min_back_projection_mass = min_back_projection_mass
+        self.search_window_margin = search_window_margin
+        self.back_projection: Optional[numpy.ndarray] = None
+        self._histogram: Optional[numpy.ndarray] = None
+        self._region: Optional[Box] = None
+        self._track_window: Optional[Window] = None
+        self._termination_criteria = (
+            cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 1)
+
+    def is_initialized(self) -> bool:
+        return self._histogram is not None
+
+    def select_region(self, region: Box) -> None:
+        """
+        Select a new region to learn the histogram of. The histogram is learned
+        from the next image passed to detect.
+        """
+        logger.debug(f'select region {region.coordinates()}')
+        self._region = region
+
+    def reset(self) -> None:
+        self._histogram = None
+        self._region = None
+        self._track_window = None
+
+    def _hsv_mask(self, hsv: numpy.ndarray) -> numpy.ndarray:
+        # ignore dark and unsaturated pixels, since their hue is unreliable
+        return cv2.inRange(
+            hsv,
+            numpy.array((0, self.min_saturation, self.min_value)),
+            numpy.array((180, 255, self.max_value)))
+
+    def _learn_histogram(self, hsv: numpy.ndarray, region: Box) -> None:
+        window = _to_window(region, hsv.shape)
+        if window is None:
+            logger.warning('selected region is empty')
+            return
+        x, y, w, h = window
+        roi = hsv[y:y + h, x:x + w]
+        histogram = cv2.calcHist(
+            [roi], [0, 1], self._hsv_mask(roi),
+            [self.hue_bins, self.saturation_bins], [0, 180, 0, 256])
+        cv2.normalize(histogram, histogram, 0, 255, cv2.NORM_MINMAX)
+        self._histogram = histogram
+        self._track_window = window
+
+    def _full_frame_window(self, hsv: numpy.ndarray) -> Window:
+        height, width = hsv.shape[:2]
+        return 0, 0, width, height
+
+    def _search_window(self, hsv: numpy.ndarray) -> Window:
+        x, y, w, h = self._track_window
+        dx = int(w * self.search_window_margin)
+        dy = int(h * self.search_window_margin)
+        return _clip_window((x - dx, y - dy, w + 2 * dx, h + 2 * dy),
+                            hsv.shape)
+
+    def detect(self, image) -> DetectionBatch:
+        if self._region is None and self._histogram is None:
+            return DetectionBatch()
+        image_array = numpy.asarray(image)
+        hsv = cv2.cvtColor(image_array, cv2.COLOR_RGB2HSV)
+        if self._region is not None:
+            self._learn_histogram(hsv, self._region)
+            self._region = None
+            if self._histogram is None:
+                return DetectionBatch()
+        box = None
+        if self._track_window is not None:
+            box = self._cam_shift(hsv, self._search_window(hsv))
+            if box is None:
+                logger.debug('target lost in search window,'
+                             ' search whole frame')
+        if box is None:
+            self._track_window = None
+            box = self._cam_shift(hsv, self._full_frame_window(hsv))
+        if box is None:
+            return DetectionBatch()
+        return DetectionBatch.from_candidates([DetectionCandidate(
+            label_id=self.target_label_id,
+            score=1.0,
+            bounding_box=box)])
+
+    def _cam_shift(self, hsv: numpy.ndarray, search_window: Window) \
+            -> Optional[Box]:
+        sx, sy, sw, sh = search_window
+        search_hsv = hsv[sy:sy + sh, sx:sx + sw]
+        back_projection = cv2.calcBackProject(
+            [search_hsv], [0, 1], self._histogram, [0, 180, 0, 256], 1)
+        back_projection &= self._hsv_mask(search_hsv)
+        self.back_projection = back_projection
+        if self._track_window is None:
+            # start with the whole search area to find the target anywhere
+            window = 0, 0, sw, sh
+        else:
+            x, y, w, h = self._track_window
+            window = x - sx, y - sy, w, h
+        _rotated_box, window = cv2.CamShift(
+            back_projection, window, self._termination_criteria)
+        x, y, w, h = window
+        if w <= 0 or h <= 0:
+            return None
+        mass = back_projection[y:y + h, x:x + w].sum() / (255 * w * h)
+        if mass < self.min_back_projection_mass:
+            return None
+        self._track_window = x + sx, y + sy, w, h
+        return Box.from_coordinates(x + sx, y + sy, x + sx + w, y + sy + h)
+
+
+def _clip_window(window: Window, shape) -> Window:
+    height, width = shape[:2]
+    x, y, w, h = window
+    x1 = max(0, x)
+    y1 = max(0, y)
+    x2 = min(width, x + w)
+    y2 = min(height, y + h)
+    return x1, y1, max(0, x2 - x1), max(0, y2 - y1)
+
+
+def _to_window(box: Box, shape) -> Optional[Window]:
+    x1, y1, x2, y2 = box.coordinates()
+    window = _clip_window(
+        (int(x1), int(y1), int(round(x2 - x1)), int(round(y2 - y1))), shape)
+    if window[2] == 0 or window[3] == 0:
+        return None
+    return window
@@ -13,7 +13,8 @@ import numpy
 from robot_cameraman.box import Box
 from robot_cameraman.configuration import read_configuration_file, \
     save_configuration_file
-from robot_cameraman.image_detection import DetectionEngine, DetectionCandidate
+from robot_cameraman.image_detection import DetectionEngine, DetectionBatch, \
+    DetectionCandidate
 from robot_cameraman.ui import UserInterface, create_attribute_checkbox
 
 logger: Logger = logging.getLogger(__name__)
@@ -29,7 +30,7 @@ class ColorDetectionEngine(DetectionEngine):
         self.is_single_object_detection = True
         self.minimum_contour_size = 20
 
-    def detect(self, image) -> Iterable[DetectionCandidate]:
+    def detect(self, image) -> DetectionBatch:
         image_array = numpy.asarray(image)
         # reduce high frequency noise
         # to focus on the structural objects inside the frame
@@ -45,9 +46,11 @@ class ColorDetectionEngine(DetectionEngine):
                                     cv2.CHAIN_APPROX_SIMPLE)
         contours = imutils.grab_contours(contours)
 
-        return self._contours_to_detection_candidates(contours)
+        return DetectionBatch.from_candidates(
+            self._contours_to_detection_candidates(contours))
 
-    def _contours_to_detection_candidates(self, contours):
+    def _contours_to_detection_candidates(self, contours) \
+            -> Iterable[DetectionCandidate]:
         if self.is_single_object_detection and len(contours) > 0:
             contours = [max(contours, key=cv2.contourArea)]
         for contour in contours:
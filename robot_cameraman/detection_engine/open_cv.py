@@ -0,0 +1,181 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from enum import Enum, auto
+from logging import Logger
+from pathlib import Path
+from typing import Optional, List, Set, Tuple
+
+import cv2
+import numpy
+
+from robot_cameraman.image_detection import DetectionEngine, DetectionBatch
+from robot_cameraman.live_view import ImageSize
+
+logger: Logger = logging.getLogger(__name__)
+
+
+class OpenCvDnnModelType(Enum):
+    SSD = auto()
+    """Output of shape [1, 1, N, 7], where each detection is
+    [image_id, label_id, score, x1, y1, x2, y2] in relative coordinates."""
+
+    YOLO = auto()
+    """Outputs of shape [N, 5 + number of classes], where each row is
+    [center_x, center_y, width, height, objectness, class scores...]
+    in relative coordinates."""
+
+
+class OpenCvDnnDetectionEngine(DetectionEngine):
+    """
+    Detect objects using a neural network that is run by the DNN module of
+    OpenCV, e.g. SSD (Caffe, TensorFlow) or YOLO (Darknet) models.
+
+    The label ID offset is added to the label IDs of the model to match the
+    labels file. It defaults to -1 for SSD models, since they output 1-based
+    COCO label IDs (0 is the background), and to 0 for YOLO models.
+
+    If asynchronous is enabled, the inference is done in a worker thread.
+    The image passed to detect is inferred, while the caller decodes the next
+    frame. However, the result of the previous call is returned. Hence,
+    candidates are one frame late and do not match the image they are
+    returned with, e.g. when they are annotated or re-identified by their
+    appearance. Therefore, it has to be enabled explicitly.
+    """
+
+    def __init__(
+            self,
+            model: Path,
+            config: Optional[Path],
+            model_type: OpenCvDnnModelType,
+            input_size: ImageSize,
+            confidence: float,
+            max_objects: int,
+            label_ids: Optional[Set[int]] = None,
+            label_id_offset: Optional[int] = None,
+            scale_factor: float = 1 / 127.5,
+            mean: Tuple[float, float, float] = (127.5, 127.5, 127.5),
+            swap_rb: bool = False,
+            nms_threshold: float = 0.4,
+            asynchronous: bool = False) -> None:
+        self._net = cv2.dnn.readNet(
+            str(model), '' if config is None else str(config))
+        self._output_names = self._net.getUnconnectedOutLayersNames()
+        self._model_type = model_type
+        self.input_size = input_size
+        self.confidence = confidence
+        self.max_objects = max_objects
+        self.label_ids = label_ids
+        if label_id_offset is None:
+            label_id_offset = -1 if model_type is OpenCvDnnModelType.SSD else 0
+        self._label_id_offset = label_id_offset
+        self._scale_factor = scale_factor
+        self._mean = numpy.asarray(mean, dtype=numpy.float32)
+        self._swap_rb = swap_rb
+        self._nms_threshold = nms_threshold
+        width, height = input_size
+        # Buffers are reused to avoid allocations in each frame.
+        # Two blobs are used alternately, since one blob might still be in use
+        # by the worker thread while the next one is prepared.
+        self._resized = numpy.empty((height, width, 3), dtype=numpy.uint8)
+        self._normalized = numpy.empty((height, width, 3), dtype=numpy.float32)
+        self._blobs = [numpy.empty((1, 3, height, width), dtype=numpy.float32)
+                       for _ in range(2)]
+        self._blob_index = 0
+        self._executor: Optional[ThreadPoolExecutor] = \
+            ThreadPoolExecutor(max_workers=1) if asynchronous else None
+        self._pending: Optional[Future] = None
+
+    def _prepare_blob(self, image_array: numpy.ndarray) -> numpy.ndarray:
+        width, height = self.input_size
+        cv2.resize(image_array, (width, height), dst=self._resized)
+        if self._swap_rb:
+            cv2.cvtColor(self._resized, cv2.COLOR_RGB2BGR, dst=self._resized)
+        numpy.subtract(self._resized, self._mean, out=self._normalized)
+        self._normalized *= self._scale_factor
+        blob = self._blobs[self._blob_index]
+        self._blob_index = (self._blob_index + 1) % len(self._blobs)
+        # HWC -> NCHW
+        blob[0] = self._normalized.transpose(2, 0, 1)
+        return blob
+
+    def _infer(self, blob: numpy.ndarray, image_size: ImageSize) \
+            -> DetectionBatch:
+        self._net.setInput(blob)
+        outputs = self._net.forward(self._output_names)
+        if self._model_type is OpenCvDnnModelType.SSD:
+            return self._ssd_candidates(outputs[0], image_size)
+        return self._yolo_candidates(outputs, image_size)
+
+    def detect(self, image) -> DetectionBatch:
+        image_array = numpy.asarray(image)
+        height, width = image_array.shape[:2]
+        image_size = ImageSize(width, height)
+        blob = self._prepare_blob(image_array)
+        if self._executor is None:
+            return self._infer(blob, image_size)
+        previous = self._pending
+        self._pending = self._executor.submit(self._infer, blob, image_size)
+        if previous is None:
+            return DetectionBatch()
+        return previous.result()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    def _is_selected(self, label_ids: numpy.ndarray, scores: numpy.ndarray) \
+            -> numpy.ndarray:
+        is_selected = scores >= self.confidence
+        if self.label_ids is not None:
+            is_selected &= numpy.isin(label_ids, list(self.label_ids))
+        return is_selected
+
+    def _filter(self, label_ids: numpy.ndarray, scores: numpy.ndarray) \
+            -> numpy.ndarray:
+        indices = numpy.flatnonzero(self._is_selected(label_ids, scores))
+        # sort by score (highest to lowest)
+        indices = indices[numpy.argsort(-scores[indices], kind='stable')]
+        return indices[:self.max_objects]
+
+    def _ssd_candidates(self, output: numpy.ndarray, image_size: ImageSize) \
+            -> DetectionBatch:
+        detections = output.reshape(-1, 7)
+        label_ids = detections[:, 1].astype(int) + self._label_id_offset
+        scores = detections[:, 2]
+        indices = self._filter(label_ids, scores)
+        width, height = image_size
+        coordinates = detections[indices, 3:7] * numpy.array(
+            [width, height, width, height], dtype=numpy.float32)
+        return DetectionBatch.from_arrays(
+            label_ids=label_ids[indices],
+            scores=scores[indices],
+            coordinates=coordinates)
+
+    def _yolo_candidates(
+            self, outputs: List[numpy.ndarray], image_size: ImageSize) \
+            -> DetectionBatch:
+        detections = numpy.concatenate(
+            [o.reshape(-1, o.shape[-1]) for o in outputs])
+        class_scores = detections[:, 5:]
+        label_ids = class_scores.argmax(axis=1)
+        scores = detections[:, 4] * class_scores[
+            numpy.arange(len(label_ids)), label_ids]
+        label_ids = label_ids + self._label_id_offset
+        is_selected = self._is_selected(label_ids, scores)
+        detections = detections[is_selected]
+        label_ids = label_ids[is_selected]
+        scores = scores[is_selected]
+        width, height = image_size
+        centers = detections[:, 0:2] * (width, height)
+        sizes = detections[:, 2:4] * (width, height)
+        top_left = centers - sizes / 2
+        indices = cv2.dnn.NMSBoxes(
+            numpy.hstack((top_left, sizes)).tolist(), scores.tolist(),
+            self.confidence, self._nms_threshold, top_k=self.max_objects)
+        indices = numpy.asarray(indices, dtype=int).reshape(-1)
+        indices = indices[:self.max_objects]
+        coordinates = numpy.hstack((top_left, top_left + sizes))[indices]
+        return DetectionBatch.from_arrays(
+            label_ids=label_ids[indices],
+            scores=scores[indices],
+            coordinates=coordinates)
@@ -0,0 +1,71 @@
+import logging
+from logging import Logger
+from typing import Optional, List, Tuple
+
+import PIL.Image
+import numpy
+
+from panasonic_camera.live_view import ExHeader, ExHeader1
+from robot_cameraman.image_detection import DetectionEngine, DetectionBatch
+from robot_cameraman.live_view import ImageSize
+
+logger: Logger = logging.getLogger(__name__)
+
+# (left, top, right, bottom) in coordinates of the camera
+Rectangle = Tuple[int, int, int, int]
+
+
+class PanasonicCameraDetectionEngine(DetectionEngine):
+    """
+    Use the rectangles that a Panasonic camera sends in the ex header of each
+    live view frame (e.g. face detection and AF-tracking boxes) as detection
+    candidates. The detection is done by the camera. Hence, (almost) no CPU
+    time of the host is required.
+
+    Register on_ex_header as ex header listener of the live view. The ex header
+    of a frame is received (and passed to the listener) before the image of
+    the frame is returned by the live view. Rectangles are consumed by the next
+    call of detect, i.e. they are only used for the frame they arrived with.
+
+    Rectangles are given in a coordinate system of the camera, whose size
+    (camera_coordinates_size) is independent of the resolution of the live
+    view. They are scaled to the size of the image passed to detect.
+    """
+
+    def __init__(
+            self,
+            target_label_id: int,
+            camera_coordinates_size: ImageSize = ImageSize(1000, 1000),
+            score: float = 1.0) -> None:
+        self.target_label_id = target_label_id
+        self.camera_coordinates_size = camera_coordinates_size
+        self.score = score
+        self._rectangles: Optional[List[Rectangle]] = None
+
+    def on_ex_header(self, ex_header: Optional[ExHeader]) -> None:
+        if isinstance(ex_header, ExHeader1):
+            self._rectangles = [
+                r.rectangle for r in ex_header.n
+                if r.rectangle[0] < r.rectangle[2]
+                and r.rectangle[1] < r.rectangle[3]]
+            logger.debug(f'camera detection rectangles: {self._rectangles}')
+        else:
+            # frame without detection information
+            self._rectangles = None
+
+    def detect(self, image) -> DetectionBatch:
+        rectangles = self._rectangles
+        self._rectangles = None
+        if not rectangles:
+            return DetectionBatch()
+        if isinstance(image, PIL.Image.Image):
+            width, height = image.size
+        else:
+            height, width = image.shape[:2]
+        camera_width, camera_height = self.camera_coordinates_size
+        scale = numpy.array([width / camera_width, height / camera_height,
+                             width / camera_width, height / camera_height])
+        return DetectionBatch.from_arrays(
+            label_ids=self.target_label_id,
+            scores=self.score,
+            coordinates=numpy.asarray(rectangles, dtype=float) * scale)
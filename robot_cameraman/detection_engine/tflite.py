@@ -0,0 +1,183 @@
+import logging
+import time
+from logging import Logger
+from pathlib import Path
+from typing import Optional, List, Set
+
+import PIL.Image
+import numpy
+
+from robot_cameraman.image_detection import DetectionEngine, DetectionBatch
+from robot_cameraman.live_view import ImageSize
+
+logger: Logger = logging.getLogger(__name__)
+
+
+class TfLiteDetectionEngine(DetectionEngine):
+    """
+    Run a (quantized) mobilenet SSD model with post-processing on the CPU
+    using the TFLite runtime. It is an alternative to the
+    EdgeTpuDetectionEngine on boards without a Coral USB accelerator.
+    The TFLite runtime uses XNNPACK to run the model on the CPU, if it
+    supports the operations of the model.
+
+    Use the model without _edgetpu suffix, e.g.
+    mobilenet_ssd_v2_coco_quant_postprocess.tflite, since models compiled for
+    the Edge TPU can not be run on the CPU.
+    """
+
+    def __init__(
+            self,
+            model: Path,
+            confidence: float,
+            max_objects: int,
+            num_threads: int = 4,
+            input_size: Optional[ImageSize] = None,
+            label_ids: Optional[Set[int]] = None) -> None:
+        """
+        :param label_ids: only candidates with these labels are returned
+            (all labels by default)
+        """
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            # full TensorFlow package provides the same interpreter
+            from tensorflow.lite import Interpreter
+        self._interpreter = Interpreter(
+            model_path=str(model), num_threads=num_threads)
+        input_details = self._interpreter.get_input_details()[0]
+        self._input_index = input_details['index']
+        if input_size is not None:
+            self._interpreter.resize_tensor_input(
+                self._input_index,
+                [1, input_size.height, input_size.width, 3])
+        self._interpreter.allocate_tensors()
+        input_details = self._interpreter.get_input_details()[0]
+        _, height, width, _ = input_details['shape']
+        self.input_size = ImageSize(int(width), int(height))
+        self._input_dtype = input_details['dtype']
+        # SSD models with post-processing have the outputs
+        # boxes, classes, scores and count (in this order)
+        (self._boxes_index, self._classes_index, self._scores_index,
+         self._count_index) = (
+            o['index'] for o in self._interpreter.get_output_details()[:4])
+        # reuse input buffer to avoid allocations in each frame
+        self._input = numpy.zeros((height, width, 3), dtype=self._input_dtype)
+        self._confidence = confidence
+        self._max_objects = max_objects
+        self.label_ids = label_ids
+
+    def _set_input(self, image: PIL.Image.Image) -> float:
+        """
+        Scale image to input size keeping its aspect ratio.
+        Remaining space of the input is filled with zeros (black).
+
+        :return: factor to scale coordinates of the input back to the image
+        """
+        width, height = self.input_size
+        scale = min(width / image.width, height / image.height)
+        scaled_width = int(image.width * scale)
+        scaled_height = int(image.height * scale)
+        scaled_image = image.convert('RGB').resize(
+            (scaled_width, scaled_height), PIL.Image.NEAREST)
+        self._input.fill(0)
+        self._input[:scaled_height, :scaled_width] = numpy.asarray(
+            scaled_image, dtype=self._input_dtype)
+        self._interpreter.set_tensor(self._input_index, self._input[None])
+        return 1 / scale
+
+    def detect(self, image: PIL.Image.Image) -> DetectionBatch:
+        scale = self._set_input(image)
+        self._interpreter.invoke()
+        get_tensor = self._interpreter.get_tensor
+        boxes = get_tensor(self._boxes_index)[0]
+        classes = get_tensor(self._classes_index)[0]
+        scores = get_tensor(self._scores_index)[0]
+        count = int(get_tensor(self._count_index)[0])
+        # results are sorted by score (highest to lowest)
+        is_selected = scores[:count] >= self._confidence
+        if self.label_ids is not None:
+            is_selected &= numpy.isin(classes[:count], list(self.label_ids))
+        indices = numpy.flatnonzero(is_selected)
+        indices = indices[:self._max_objects]
+        # boxes are relative (ymin, xmin, ymax, xmax) coordinates of the input
+        width, height = self.input_size
+        coordinates = boxes[indices][:, [1, 0, 3, 2]] * (
+                numpy.array([width, height, width, height]) * scale)
+        return DetectionBatch.from_arrays(
+            label_ids=classes[indices],
+            scores=scores[indices],
+            coordinates=coordinates)
+
+
+def _parse_input_sizes(value: str) -> List[Optional[ImageSize]]:
+    sizes: List[Optional[ImageSize]] = []
+    for size in value.split(','):
+        if size == 'model':
+            sizes.append(None)
+        else:
+            width, height = map(int, size.split('x'))
+            sizes.append(ImageSize(width, height))
+    return sizes
+
+
+def _main():
+    """
+    Benchmark inference latency per input resolution and thread count
+    to pick an operating point for a board.
+    """
+    import argparse
+    resources: Path = Path(__file__).parent.parent / 'resources'
+    parser = argparse.ArgumentParser(
+        description="Benchmark the TFLite detection engine on the CPU.")
+    parser.add_argument(
+        '--model',
+        type=Path,
+        default=resources / 'mobilenet_ssd_v2_coco_quant_postprocess.tflite',
+        help="Path to the neural network graph file.")
+    parser.add_argument(
+        '--image',
+        type=Path,
+        default=None,
+        help="Image to detect objects in. A random image is used by default.")
+    parser.add_argument(
+        '--threads',
+        type=lambda v: list(map(int, v.split(','))),
+        default=[1, 2, 4],
+        help="Comma separated list of thread counts, e.g. 1,2,4")
+    parser.add_argument(
+        '--inputSizes',
+        type=_parse_input_sizes,
+        default=[None],
+        help="Comma separated list of input sizes, e.g. model,224x224,320x320."
+             " 'model' is the input size of the model.")
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+    if args.image is None:
+        image = PIL.Image.fromarray(
+            numpy.random.randint(0, 256, (480, 640, 3), dtype=numpy.uint8))
+    else:
+        image = PIL.Image.open(args.image)
+    print(f"{'input size':>12} {'threads':>7}"
+          f" {'mean ms':>8} {'p50 ms':>8} {'p90 ms':>8}")
+    for input_size in args.inputSizes:
+        for num_threads in args.threads:
+            engine = TfLiteDetectionEngine(
+                model=args.model, confidence=0.5, max_objects=10,
+                num_threads=num_threads, input_size=input_size)
+            # warm up
+            engine.detect(image)
+            latencies = []
+            for _ in range(args.iterations):
+                start = time.perf_counter()
+                engine.detect(image)
+                latencies.append((time.perf_counter() - start) * 1000)
+            width, height = engine.input_size
+            print(f"{f'{width}x{height}':>12} {num_threads:>7}"
+                  f" {numpy.mean(latencies):8.2f}"
+                  f" {numpy.percentile(latencies, 50):8.2f}"
+                  f" {numpy.percentile(latencies, 90):8.2f}")
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,113 @@
+import logging
+import math
+from logging import Logger
+from typing import NamedTuple, Optional, Tuple, Callable
+
+from robot_cameraman.camera_controller import SpeedManager
+from robot_cameraman.live_view import ImageSize
+
+logger: Logger = logging.getLogger(__name__)
+
+
+class ImageMotion(NamedTuple):
+    """
+    Motion of (static) objects in the image that is caused by the camera.
+    A point (x, y) moves to (cx + scale * (x - cx) + dx,
+    cy + scale * (y - cy) + dy), where (cx, cy) is the center of the image.
+    """
+    dx: float
+    dy: float
+    scale: float
+
+    def transform_points(self, points, center_x: float, center_y: float):
+        """
+        :param points: numpy array of shape (N, 2)
+        """
+        transformed = points.astype(float)
+        transformed -= (center_x, center_y)
+        transformed *= self.scale
+        transformed += (center_x + self.dx, center_y + self.dy)
+        return transformed
+
+
+class EgoMotion:
+    """
+    Estimate how objects move in the live view, because the gimbal pans/tilts
+    and the camera zooms (ego-motion). Trackers compensate the ego-motion
+    before they assign candidates to tracked objects. Otherwise, an object
+    jumps in image coordinates (e.g. when the gimbal pans at 20°/s) and is
+    registered as new object.
+
+    Pan and tilt speeds (degree per second) are measured by the gimbal, if
+    measured_speeds returns them (e.g. streamed by the gimbal). Otherwise,
+    the speeds of the speed managers of the camera controller are used, which
+    have been sent to the gimbal. The zoom ratio is updated by a listener of the
+    camera observable (see on_zoom_ratio). A pinhole camera is assumed, whose
+    horizontal field of view at zoom ratio 1.0x is given.
+    """
+
+    def __init__(
+            self,
+            image_size: ImageSize,
+            horizontal_field_of_view: float,
+            pan_speed_manager: SpeedManager,
+            tilt_speed_manager: SpeedManager,
+            measured_speeds:
+            Optional[Callable[[], Optional[Tuple[float, float]]]] = None) \
+            -> None:
+        """
+        :param measured_speeds: returns pan and tilt speed (degree per
+            second) measured by the gimbal or None, if they are not available
+        """
+        self.image_size = image_size
+        self.horizontal_field_of_view = horizontal_field_of_view
+        self._pan_speed_manager = pan_speed_manager
+        self._tilt_speed_manager = tilt_speed_manager
+        self._measured_speeds = measured_speeds
+        self._zoom_ratio = 1.0
+        self._compensated_zoom_ratio = 1.0
+        self._timestamp: Optional[float] = None
+
+    def on_zoom_ratio(self, zoom_ratio: float) -> None:
+        self._zoom_ratio = zoom_ratio
+
+    @property
+    def center(self):
+        return self.image_size.width / 2, self.image_size.height / 2
+
+    def pixels_per_degree(self) -> float:
+        focal_length = (self.image_size.width / 2
+                        / math.tan(math.radians(
+                            self.horizontal_field_of_view / 2)))
+        return focal_length * self._zoom_ratio * math.pi / 180
+
+    def image_motion(self, timestamp: float) -> ImageMotion:
+        """
+        Estimate the image motion since the last call.
+
+        :param timestamp: time of the frame in seconds
+        """
+        elapsed_time = (0.0 if self._timestamp is None
+                        else timestamp - self._timestamp)
+        self._timestamp = timestamp
+        scale = self._zoom_ratio / self._compensated_zoom_ratio
+        self._compensated_zoom_ratio = self._zoom_ratio
+        vx, vy = self.velocity()
+        return ImageMotion(dx=vx * elapsed_time, dy=vy * elapsed_time,
+                           scale=scale)
+
+    def velocity(self) -> Tuple[float, float]:
+        """
+        :return: current velocity (pixels per second) of static objects in
+            the image that is caused by panning and tilting
+        """
+        speeds = (None if self._measured_speeds is None
+                  else self._measured_speeds())
+        if speeds is None:
+            speeds = (self._pan_speed_manager.current_speed,
+                      self._tilt_speed_manager.current_speed)
+        pan_speed, tilt_speed = speeds
+        pixels_per_degree = self.pixels_per_degree()
+        # objects move in the opposite direction of the camera
+        return (-pan_speed * pixels_per_degree,
+                -tilt_speed * pixels_per_degree)
@@ -0,0 +1,188 @@
+"""
+Geometry primitives and functions that do not allocate objects.
+
+The functions take any object with the attributes x, y, width and height
+(e.g. Box or Rectangle), since they are called many times per frame
+(e.g. in tracking strategies, filters and object trackers). The batched
+functions work on numpy arrays of shape (N, 4) with x1, y1, x2, y2 of each box.
+"""
+from typing import NamedTuple
+
+import numpy
+from typing_extensions import Protocol
+
+
+class BoxLike(Protocol):
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class Rectangle(NamedTuple):
+    """
+    Immutable (and compact) axis aligned box.
+    """
+    x: float
+    y: float
+    width: float
+    height: float
+
+    @staticmethod
+    def from_coordinates(x1: float, y1: float, x2: float, y2: float):
+        return Rectangle(min(x1, x2), min(y1, y2), abs(x2 - x1), abs(y2 - y1))
+
+    @property
+    def center_x(self) -> float:
+        return self.x + self.width / 2
+
+    @property
+    def center_y(self) -> float:
+        return self.y + self.height / 2
+
+    def area(self) -> float:
+        return self.width * self.height
+
+
+def area(box: BoxLike) -> float:
+    return box.width * box.height
+
+
+def intersection_area(box: BoxLike, other: BoxLike) -> float:
+    width = (min(box.x + box.width, other.x + other.width)
+             - max(box.x, other.x))
+    height = (min(box.y + box.height, other.y + other.height)
+              - max(box.y, other.y))
+    if width <= 0 or height <= 0:
+        return 0.0
+    return width * height
+
+
+def percental_intersection_area(box: BoxLike, other: BoxLike) -> float:
+    """
+    :return: intersection area relative to the area of the smaller box
+    """
+    return intersection_area(box, other) / min(area(box), area(other))
+
+
+def contains_point(box: BoxLike, x: float, y: float) -> bool:
+    return (box.x <= x <= box.x + box.width
+            and box.y <= y <= box.y + box.height)
+
+
+def areas(coordinates: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param coordinates: array of shape (N, 4) with x1, y1, x2, y2 of each box
+    :return: area of each box
+    """
+    return ((coordinates[:, 2] - coordinates[:, 0])
+            * (coordinates[:, 3] - coordinates[:, 1]))
+
+
+def centers(coordinates: numpy.ndarray) -> numpy.ndarray:
+    """
+    :return: array of shape (N, 2) with the center of each box
+    """
+    return (coordinates[:, :2] + coordinates[:, 2:]) / 2
+
+
+def intersection_areas(coordinates: numpy.ndarray) -> numpy.ndarray:
+    """
+    :param coordinates: array of shape (N, 4) with x1, y1, x2, y2 of each box
+    :return: matrix of shape (N, N) with the intersection area of each pair
+        of boxes
+    """
+    x1, y1, x2, y2 = (coordinates[:, i] for i in range(4))
+    widths = numpy.minimum.outer(x2, x2) - numpy.maximum.outer(x1, x1)
+    heights = numpy.minimum.outer(y2, y2) - numpy.maximum.outer(y1, y1)
+    numpy.maximum(widths, 0, out=widths)
+    numpy.maximum(heights, 0, out=heights)
+    widths *= heights
+    return widths
+
+
+def contains_points(coordinates: numpy.ndarray, points: numpy.ndarray) \
+        -> numpy.ndarray:
+    """
+    :param coordinates: array of shape (N, 4) with x1, y1, x2, y2 of each box
+    :param points: array of shape (N, 2) with x, y of each point
+    :return: whether each box contains the point of the same index
+    """
+    return ((coordinates[:, 0] <= points[:, 0])
+            & (points[:, 0] <= coordinates[:, 2])
+            & (coordinates[:, 1] <= points[:, 1])
+            & (points[:, 1] <= coordinates[:, 3]))
+
+
+def _main():
+    """
+    Measure peak memory (with tracemalloc) and time of the Box API using
+    the allocation-free functions compared to the former implementation,
+    which created a dict-based box with a center point for each box and
+    intersection.
+    """
+    import timeit
+    import tracemalloc
+    from robot_cameraman.box import Box, Point
+
+    class FormerTwoPointsBox:
+        def __init__(self, x1, y1, x2, y2) -> None:
+            self.x = x1
+            self.y = y1
+            self.width = abs(x2 - x1)
+            self.height = abs(y2 - y1)
+            self.center = Point(abs(x1 + x2) / 2, abs(y1 + y2) / 2)
+
+        def area(self):
+            return self.width * self.height
+
+    def former_percental_intersection_area(box, other):
+        x1 = max(box.x, other.x)
+        y1 = max(box.y, other.y)
+        x2 = min(box.x + box.width, other.x + other.width)
+        y2 = min(box.y + box.height, other.y + other.height)
+        if x1 > x2 or y1 > y2:
+            intersection = FormerTwoPointsBox(x1, y1, x1, y1)
+        else:
+            intersection = FormerTwoPointsBox(x1, y1, x2, y2)
+        return intersection.area() / min(box.area(), other.area())
+
+    random = numpy.random.default_rng(0)
+    top_left = random.uniform(0, 400, size=(50, 2))
+    coordinates = numpy.hstack(
+        (top_left, top_left + random.uniform(10, 150, size=(50, 2))))
+    coordinate_list = coordinates.tolist()
+    former_boxes = [FormerTwoPointsBox(*c) for c in coordinate_list]
+    boxes = [Box.from_coordinate_iterable(c) for c in coordinate_list]
+
+    def pairwise(function, boxes_of_frame):
+        def run():
+            for box in boxes_of_frame:
+                for other in boxes_of_frame:
+                    function(box, other)
+        return run
+
+    def measure(name, run):
+        tracemalloc.start()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        seconds = timeit.timeit(run, number=10) / 10
+        print(f'{name:<40} {peak / 1024:8.1f} {seconds * 1000:8.2f}')
+
+    print(f"{'50 boxes (and 50 x 50 pairs)':<40} {'peak KiB':>8} {'ms':>8}")
+    measure('former boxes',
+            lambda: [FormerTwoPointsBox(*c) for c in coordinate_list])
+    measure('boxes',
+            lambda: [Box.from_coordinate_iterable(c)
+                     for c in coordinate_list])
+    measure('former percental_intersection_area',
+            pairwise(former_percental_intersection_area, former_boxes))
+    measure('Box.percental_intersection_area',
+            pairwise(Box.percental_intersection_area, boxes))
+    measure('intersection_areas (batched)',
+            lambda: intersection_areas(coordinates))
+
+
+if __name__ == '__main__':
+    _main()
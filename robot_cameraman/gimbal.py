@@ -1,9 +1,20 @@
+import logging
 from abc import abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass
+from functools import partial
+from logging import Logger
+from time import time
+from typing import Optional, Tuple
+
 from typing_extensions import Protocol
 
 import simplebgc.gimbal
 from simplebgc.commands import GetAnglesInCmd
 from simplebgc.gimbal import ControlMode
+from simplebgc.units import from_degree_per_sec, from_degree
+
+logger: Logger = logging.getLogger(__name__)
 
 
 # TODO interface should be independent from simplebgc module,
@@ -36,6 +47,19 @@ class SimpleBgcGimbal(simplebgc.gimbal.Gimbal, Gimbal):
     pass
 
 
+class PipelinedSimpleBgcGimbal(simplebgc.gimbal.PipelinedGimbal, Gimbal):
+
+    def speeds(self) -> Optional[Tuple[float, float]]:
+        """
+        :return: pan and tilt speed (degree per second) of the recently
+            streamed state or None, if it is not available
+        """
+        state = self.recent_state
+        if state is None:
+            return None
+        return state.pan_speed, state.tilt_speed
+
+
 class DummyGimbal(Gimbal):
     def control(self, yaw_mode: ControlMode = ControlMode.speed,
                 yaw_speed: float = 0, yaw_angle: float = 0,
@@ -59,3 +83,89 @@ class DummyGimbal(Gimbal):
             imu_angle_3=0,
             target_angle_3=0,
             target_speed_3=0)
+
+
+@dataclass
+class GimbalCommandStatistics:
+    sent: int = 0
+    suppressed: int = 0
+
+
+class CoalescingGimbal(Gimbal):
+    """
+    Decorates a gimbal and suppresses control commands that do not change
+    anything: speeds and angles are quantized to the units of the SimpleBGC
+    serial protocol. A command that is equal to the last sent command is only
+    sent again as keep-alive after keep_alive_interval seconds (never, if it is
+    None).
+
+    If the decorated gimbal sends commands asynchronously (i.e. control
+    returns a future), the last command is forgotten, if it fails. Hence, the
+    next command is sent, even if it is equal to the failed one.
+    """
+
+    def __init__(
+            self,
+            gimbal: Gimbal,
+            keep_alive_interval: Optional[float] = 1.0) -> None:
+        self._gimbal = gimbal
+        self.keep_alive_interval = keep_alive_interval
+        self.statistics = GimbalCommandStatistics()
+        self._last_command: Optional[Tuple[int, ...]] = None
+        self._last_command_time = 0.0
+
+    def control(
+            self,
+            yaw_mode: ControlMode = ControlMode.speed,
+            yaw_speed: float = 0,
+            yaw_angle: float = 0,
+            pitch_mode: ControlMode = ControlMode.speed,
+            pitch_speed: float = 0,
+            pitch_angle: float = 0,
+            roll_mode: ControlMode = ControlMode.speed,
+            roll_speed: float = 0,
+            roll_angle: float = 0) -> None:
+        command = (
+            int(yaw_mode), from_degree_per_sec(yaw_speed),
+            from_degree(yaw_angle),
+            int(pitch_mode), from_degree_per_sec(pitch_speed),
+            from_degree(pitch_angle),
+            int(roll_mode), from_degree_per_sec(roll_speed),
+            from_degree(roll_angle))
+        current_time = time()
+        if (command == self._last_command
+                and (self.keep_alive_interval is None
+                     or current_time - self._last_command_time
+                     < self.keep_alive_interval)):
+            self.statistics.suppressed += 1
+            return
+        # if the command fails, the state of the gimbal is unknown
+        self._last_command = None
+        result = self._gimbal.control(
+            yaw_mode=yaw_mode, yaw_speed=yaw_speed, yaw_angle=yaw_angle,
+            pitch_mode=pitch_mode, pitch_speed=pitch_speed,
+            pitch_angle=pitch_angle,
+            roll_mode=roll_mode, roll_speed=roll_speed, roll_angle=roll_angle)
+        self._last_command = command
+        self._last_command_time = current_time
+        self.statistics.sent += 1
+        if isinstance(result, Future):
+            # callback is called immediately, if the command already failed
+            result.add_done_callback(partial(self._on_control_done, command))
+
+    def _on_control_done(self, command: Tuple[int, ...], future: Future) \
+            -> None:
+        if not future.cancelled():
+            error = future.exception()
+            if error is None:
+                return
+            logger.warning(f'control command {command} failed: {error!r}')
+        if self._last_command == command:
+            self._last_command = None
+
+    def stop(self) -> None:
+        self._last_command = None
+        self._gimbal.stop()
+
+    def get_angles(self) -> GetAnglesInCmd:
+        return self._gimbal.get_angles()
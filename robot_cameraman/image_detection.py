@@ -1,10 +1,15 @@
+from __future__ import annotations
+
 from abc import abstractmethod
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, List, Optional, Sequence, Set, Union, \
+    overload
 
 import PIL.Image
 import PIL.ImageFont
+import numpy
+from numpy.lib import recfunctions
 from typing_extensions import Protocol
 
 from robot_cameraman.box import Box
@@ -17,9 +22,140 @@ class DetectionCandidate:
     bounding_box: Box
 
 
+DETECTION_DTYPE = numpy.dtype([
+    ('label_id', numpy.int32),
+    ('score', numpy.float32),
+    ('x1', numpy.float32),
+    ('y1', numpy.float32),
+    ('x2', numpy.float32),
+    ('y2', numpy.float32),
+])
+
+
+class DetectionBatch(Sequence[DetectionCandidate]):
+    """
+    Detection candidates of a frame stored in a structured numpy array
+    (see DETECTION_DTYPE). Stages that process candidates can work on all of
+    them at once (e.g. filter by label and score) instead of iterating over
+    DetectionCandidate objects.
+
+    For code that still expects DetectionCandidate objects, the batch is
+    a sequence of candidates. They are only created on access (and then kept),
+    i.e. no objects are allocated, if the batch is only used as array.
+    """
+
+    def __init__(self, array: Optional[numpy.ndarray] = None) -> None:
+        self.array = (numpy.empty(0, dtype=DETECTION_DTYPE) if array is None
+                      else array)
+        self._candidates: Optional[List[DetectionCandidate]] = None
+
+    @staticmethod
+    def from_arrays(
+            label_ids: Union[int, numpy.ndarray],
+            scores: Union[float, numpy.ndarray],
+            coordinates: numpy.ndarray) -> DetectionBatch:
+        """
+        :param label_ids: label ID of each candidate or one for all
+        :param scores: score of each candidate or one for all
+        :param coordinates: array of shape (N, 4) with x1, y1, x2, y2
+        """
+        coordinates = numpy.asarray(coordinates).reshape(-1, 4)
+        array = numpy.empty(len(coordinates), dtype=DETECTION_DTYPE)
+        array['label_id'] = label_ids
+        array['score'] = scores
+        array['x1'] = coordinates[:, 0]
+        array['y1'] = coordinates[:, 1]
+        array['x2'] = coordinates[:, 2]
+        array['y2'] = coordinates[:, 3]
+        return DetectionBatch(array)
+
+    @staticmethod
+    def from_candidates(candidates: Iterable[DetectionCandidate]) \
+            -> DetectionBatch:
+        if isinstance(candidates, DetectionBatch):
+            return candidates
+        candidates = list(candidates)
+        batch = DetectionBatch(numpy.array(
+            [(c.label_id, c.score, *c.bounding_box.coordinates())
+             for c in candidates],
+            dtype=DETECTION_DTYPE))
+        batch._candidates = candidates
+        return batch
+
+    @staticmethod
+    def concatenate(batches: Iterable[DetectionBatch]) -> DetectionBatch:
+        arrays = [b.array for b in batches]
+        if not arrays:
+            return DetectionBatch()
+        return DetectionBatch(numpy.concatenate(arrays))
+
+    @property
+    def label_ids(self) -> numpy.ndarray:
+        return self.array['label_id']
+
+    @property
+    def scores(self) -> numpy.ndarray:
+        return self.array['score']
+
+    def coordinates(self) -> numpy.ndarray:
+        """
+        :return: array of shape (N, 4) with x1, y1, x2, y2 of each candidate
+        """
+        return recfunctions.structured_to_unstructured(
+            self.array[['x1', 'y1', 'x2', 'y2']])
+
+    def filter(
+            self,
+            label_id: Optional[int] = None,
+            min_score: Optional[float] = None,
+            label_ids: Optional[Iterable[int]] = None) -> DetectionBatch:
+        is_selected = numpy.ones(len(self.array), dtype=bool)
+        if label_id is not None:
+            is_selected &= self.array['label_id'] == label_id
+        if label_ids is not None:
+            is_selected &= numpy.isin(self.array['label_id'], list(label_ids))
+        if min_score is not None:
+            is_selected &= self.array['score'] >= min_score
+        if is_selected.all():
+            return self
+        return DetectionBatch(self.array[is_selected])
+
+    def candidates(self) -> List[DetectionCandidate]:
+        if self._candidates is None:
+            self._candidates = [
+                DetectionCandidate(
+                    label_id=label_id,
+                    score=score,
+                    bounding_box=Box.from_coordinates(x1, y1, x2, y2))
+                for label_id, score, x1, y1, x2, y2 in self.array.tolist()]
+        return self._candidates
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    @overload
+    def __getitem__(self, index: int) -> DetectionCandidate:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> DetectionBatch:
+        ...
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return DetectionBatch(self.array[index])
+        return self.candidates()[index]
+
+    def __iter__(self):
+        return iter(self.candidates())
+
+    def __repr__(self) -> str:
+        return f'DetectionBatch({self.array!r})'
+
+
 class DetectionEngine(Protocol):
     @abstractmethod
-    def detect(self, image) -> Iterable[DetectionCandidate]:
+    def detect(self, image) -> DetectionBatch:
         raise NotImplementedError
 
 
@@ -28,25 +164,46 @@ class EdgeTpuDetectionEngine(DetectionEngine):
             self,
             model: Path,
             confidence: float,
-            max_objects: int) -> None:
+            max_objects: int,
+            label_ids: Optional[Set[int]] = None) -> None:
+        """
+        :param label_ids: only candidates with these labels are returned
+            (all labels by default)
+        """
         import edgetpu.detection.engine
         self._engine = edgetpu.detection.engine.DetectionEngine(str(model))
         self._confidence = confidence
         self._max_objects = max_objects
+        self.label_ids = label_ids
 
-    def detect(self, image: PIL.Image.Image) -> Iterable[DetectionCandidate]:
-        return map(
-            lambda dc: DetectionCandidate(dc.label_id, dc.score,
-                                          Box.from_points_iterable(
-                                              dc.bounding_box)),
-            self._engine.DetectWithImage(
-                image,
-                threshold=self._confidence,
-                keep_aspect_ratio=True,
-                relative_coord=False,
-                top_k=self._max_objects))
+    def detect(self, image: PIL.Image.Image) -> DetectionBatch:
+        candidates = self._engine.DetectWithImage(
+            image,
+            threshold=self._confidence,
+            keep_aspect_ratio=True,
+            relative_coord=False,
+            top_k=self._max_objects)
+        return DetectionBatch.from_arrays(
+            label_ids=numpy.array([c.label_id for c in candidates]),
+            scores=numpy.array([c.score for c in candidates]),
+            coordinates=numpy.array([c.bounding_box for c in candidates])) \
+            .filter(label_ids=self.label_ids)
 
 
 class DummyDetectionEngine(DetectionEngine):
-    def detect(self, image) -> Iterable[DetectionCandidate]:
-        return []
+    def detect(self, image) -> DetectionBatch:
+        return DetectionBatch()
+
+
+class FusedDetectionEngine(DetectionEngine):
+    """
+    Combine the candidates of multiple detection engines,
+    e.g. the rectangles detected by the camera and a neural network.
+    """
+
+    def __init__(self, engines: List[DetectionEngine]) -> None:
+        self.engines = engines
+
+    def detect(self, image) -> DetectionBatch:
+        return DetectionBatch.concatenate(
+            engine.detect(image) for engine in self.engines)
@@ -0,0 +1,73 @@
+import logging
+import time
+from logging import Logger
+from typing import Optional, Tuple
+
+import cv2
+import numpy
+
+logger: Logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """
+    Cheap change detector that decides whether the detection has to be run
+    on a frame. If the camera does not move and the scene did not change since
+    the last detection, the previous detection result can be reused, e.g.
+    while waiting for a target in searching mode without rotating.
+
+    Frames are compared with the frame of the last detection as grayscale
+    images that are heavily downscaled, which also suppresses noise.
+    A frame is considered changed, if the ratio of pixels, whose gray value
+    differs by more than the sensitivity threshold, exceeds the
+    min_changed_pixels ratio. Detection is forced after refresh_interval
+    seconds, even if the scene did not change.
+    """
+
+    def __init__(
+            self,
+            sensitivity: int = 10,
+            min_changed_pixels: float = 0.005,
+            refresh_interval: float = 2.0,
+            size: Tuple[int, int] = (80, 60)) -> None:
+        self.sensitivity = sensitivity
+        self.min_changed_pixels = min_changed_pixels
+        self.refresh_interval = refresh_interval
+        self._size = size
+        self._reference: Optional[numpy.ndarray] = None
+        self._reference_time = 0.0
+        self._difference = numpy.empty(size[::-1], dtype=numpy.uint8)
+        self.skipped_frames = 0
+        self.detected_frames = 0
+
+    def _downscale(self, image) -> numpy.ndarray:
+        image_array = numpy.asarray(image)
+        small = cv2.resize(image_array, self._size,
+                           interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+
+    def _is_changed(self, frame: numpy.ndarray) -> bool:
+        cv2.absdiff(frame, self._reference, dst=self._difference)
+        changed_pixels = cv2.countNonZero(
+            cv2.threshold(self._difference, self.sensitivity, 255,
+                          cv2.THRESH_BINARY)[1])
+        return changed_pixels > self.min_changed_pixels * self._difference.size
+
+    def is_detection_required(self, image, is_camera_moving: bool) -> bool:
+        """
+        Decide whether detection has to be run on the given image.
+        It is assumed that detection is run, if True is returned.
+        Thereby, the image becomes the new reference frame.
+        """
+        frame = self._downscale(image)
+        now = time.time()
+        if (is_camera_moving
+                or self._reference is None
+                or now - self._reference_time >= self.refresh_interval
+                or self._is_changed(frame)):
+            self._reference = frame
+            self._reference_time = now
+            self.detected_frames += 1
+            return True
+        self.skipped_frames += 1
+        return False
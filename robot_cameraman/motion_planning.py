@@ -0,0 +1,389 @@
+import logging
+import math
+from dataclasses import dataclass
+from logging import Logger
+from time import time
+from typing import List, Optional, Tuple, NamedTuple
+
+import numpy
+
+from robot_cameraman.angle import get_delta_angle_clockwise, \
+    get_delta_angle_counter_clockwise
+from robot_cameraman.camera_controller import PathOfMotionCameraController, \
+    PointOfMotion, SpeedManager
+from robot_cameraman.tracking import CameraSpeeds, ZoomSpeed
+from simplebgc.gimbal import Gimbal
+from simplebgc.units import to_degree
+
+logger: Logger = logging.getLogger(__name__)
+
+
+def minimum_duration(
+        distance: float,
+        acceleration: float,
+        max_speed: float,
+        start_speed: float = 0.0,
+        end_speed: float = 0.0) -> float:
+    """
+    Duration of the time-optimal (trapezoidal or triangular) profile that
+    moves the distance (absolute value) with limited acceleration and speed.
+    """
+    distance = abs(distance)
+    if distance == 0:
+        return 0.0
+    peak_speed = math.sqrt(acceleration * distance
+                           + (start_speed ** 2 + end_speed ** 2) / 2)
+    if peak_speed <= max_speed:
+        return ((peak_speed - start_speed) + (peak_speed - end_speed)) \
+               / acceleration
+    acceleration_distance = ((max_speed ** 2 - start_speed ** 2)
+                             + (max_speed ** 2 - end_speed ** 2)) \
+        / (2 * acceleration)
+    return (((max_speed - start_speed) + (max_speed - end_speed))
+            / acceleration
+            + (distance - acceleration_distance) / max_speed)
+
+
+@dataclass(frozen=True)
+class TrapezoidalProfile:
+    """
+    Acceleration-limited motion of an axis: accelerate from start speed to
+    cruise speed, cruise and decelerate to end speed. Speeds are absolute
+    values in the direction of distance.
+    """
+    start_position: float
+    distance: float
+    duration: float
+    acceleration: float
+    start_speed: float = 0.0
+    cruise_speed: float = 0.0
+    end_speed: float = 0.0
+
+    @property
+    def acceleration_time(self) -> float:
+        if self.acceleration == 0:
+            return 0.0
+        return (self.cruise_speed - self.start_speed) / self.acceleration
+
+    @property
+    def deceleration_time(self) -> float:
+        if self.acceleration == 0:
+            return 0.0
+        return (self.cruise_speed - self.end_speed) / self.acceleration
+
+    def _direction(self) -> float:
+        return math.copysign(1.0, self.distance)
+
+    def speed(self, t: float) -> float:
+        t = min(max(t, 0.0), self.duration)
+        deceleration_start = self.duration - self.deceleration_time
+        if t < self.acceleration_time:
+            speed = self.start_speed + self.acceleration * t
+        elif t > deceleration_start:
+            speed = (self.cruise_speed
+                     - self.acceleration * (t - deceleration_start))
+        else:
+            speed = self.cruise_speed
+        return self._direction() * speed
+
+    def position(self, t: float) -> float:
+        t = min(max(t, 0.0), self.duration)
+        t1 = min(t, self.acceleration_time)
+        covered = self.start_speed * t1 + self.acceleration * t1 ** 2 / 2
+        deceleration_start = self.duration - self.deceleration_time
+        t2 = min(t, deceleration_start) - self.acceleration_time
+        if t2 > 0:
+            covered += self.cruise_speed * t2
+        t3 = t - deceleration_start
+        if t3 > 0:
+            covered += (self.cruise_speed * t3
+                        - self.acceleration * t3 ** 2 / 2)
+        return self.start_position + self._direction() * covered
+
+
+def plan_profile(
+        start_position: float,
+        distance: float,
+        duration: float,
+        acceleration: float,
+        max_speed: float,
+        start_speed: float = 0.0,
+        end_speed: float = 0.0) -> TrapezoidalProfile:
+    """
+    Plan the profile that moves the distance in exactly the given duration.
+    The cruise speed v solves
+
+        d = v * T - (v - vs)² / 2a - (v - ve)² / 2a
+
+    Start and end speed must not exceed the average speed d / T.
+    If the duration is shorter than the minimum duration, the time-optimal
+    profile is returned.
+    """
+    abs_distance = abs(distance)
+    if abs_distance == 0 or acceleration <= 0:
+        return TrapezoidalProfile(start_position, 0.0, duration, acceleration)
+    min_duration = minimum_duration(abs_distance, acceleration, max_speed,
+                                    start_speed, end_speed)
+    if duration < min_duration:
+        logger.warning(f'can not move {abs_distance:.2f} in {duration:.2f}s,'
+                       f' it takes at least {min_duration:.2f}s')
+        duration = min_duration
+    b = acceleration * duration + start_speed + end_speed
+    c = (start_speed ** 2 + end_speed ** 2) / 2 + acceleration * abs_distance
+    cruise_speed = (b - math.sqrt(max(0.0, b * b - 4 * c))) / 2
+    cruise_speed = max(start_speed, end_speed, min(max_speed, cruise_speed))
+    return TrapezoidalProfile(
+        start_position=start_position,
+        distance=distance,
+        duration=duration,
+        acceleration=acceleration,
+        start_speed=start_speed,
+        cruise_speed=cruise_speed,
+        end_speed=end_speed)
+
+
+class MotionSample(NamedTuple):
+    pan_angle: float
+    pan_speed: float
+    tilt_angle: float
+    tilt_speed: float
+    zoom_ratio: float
+    segment: int
+
+
+class MotionPlan:
+    """
+    Profiles of pan and tilt (unwrapped angles, i.e. pan may exceed 360°)
+    and zoom keyframes of each segment between two points of motion.
+    """
+
+    def __init__(
+            self,
+            pan_profiles: List[TrapezoidalProfile],
+            tilt_profiles: List[TrapezoidalProfile],
+            zoom_ratios: List[float]) -> None:
+        assert len(pan_profiles) == len(tilt_profiles)
+        assert len(zoom_ratios) == len(pan_profiles) + 1
+        self.pan_profiles = pan_profiles
+        self.tilt_profiles = tilt_profiles
+        self.zoom_ratios = zoom_ratios
+        durations = [p.duration for p in pan_profiles]
+        self.start_times = numpy.concatenate(([0.0], numpy.cumsum(durations)))
+        self.duration = float(self.start_times[-1])
+
+    def sample(self, t: float) -> MotionSample:
+        if not self.pan_profiles:
+            return MotionSample(0, 0, 0, 0, self.zoom_ratios[0], 0)
+        segment = int(numpy.searchsorted(self.start_times, t, side='right'))
+        segment = min(max(segment - 1, 0), len(self.pan_profiles) - 1)
+        segment_time = t - self.start_times[segment]
+        pan = self.pan_profiles[segment]
+        tilt = self.tilt_profiles[segment]
+        # zoom ratio changes by a constant factor per second (optical zoom)
+        progress = (min(max(segment_time / pan.duration, 0.0), 1.0)
+                    if pan.duration > 0 else 1.0)
+        start_zoom = self.zoom_ratios[segment]
+        end_zoom = self.zoom_ratios[segment + 1]
+        zoom_ratio = start_zoom * (end_zoom / start_zoom) ** progress
+        return MotionSample(
+            pan_angle=pan.position(segment_time),
+            pan_speed=pan.speed(segment_time),
+            tilt_angle=tilt.position(segment_time),
+            tilt_speed=tilt.speed(segment_time),
+            zoom_ratio=zoom_ratio,
+            segment=segment)
+
+
+def _signed_distance(start: float, end: float, clockwise: bool,
+                     turns: int = 0) -> float:
+    if clockwise:
+        return get_delta_angle_clockwise(left=start, right=end) + 360 * turns
+    return -(get_delta_angle_counter_clockwise(left=start, right=end)
+             + 360 * turns)
+
+
+def _blend_speeds(distances: List[float], durations: List[float]) \
+        -> List[float]:
+    """
+    Speed at each point (including first and last point). The axis does not
+    stop at intermediate points, if it keeps its direction. The speed at the
+    point is the smaller average speed of the adjacent segments, so that the
+    profiles of both segments remain feasible.
+    """
+    speeds = [0.0] * (len(distances) + 1)
+    for i in range(1, len(distances)):
+        before, after = distances[i - 1], distances[i]
+        if before * after > 0 and durations[i - 1] > 0 and durations[i] > 0:
+            speeds[i] = min(abs(before) / durations[i - 1],
+                            abs(after) / durations[i])
+    return speeds
+
+
+def plan_path(
+        points: List[PointOfMotion],
+        pan_acceleration: float,
+        tilt_acceleration: float,
+        max_pan_speed: float = 60,
+        max_tilt_speed: float = 12) -> MotionPlan:
+    """
+    Plan the motion through all points once. The first point is the start.
+    Each segment takes the time of its end point or, if the time is 0 or too
+    short, the minimum time of the slower axis. Pan and tilt are synchronized,
+    i.e. they reach each point at the same time.
+    """
+    pan_distances: List[float] = []
+    tilt_distances: List[float] = []
+    durations: List[float] = []
+    for start, end in zip(points, points[1:]):
+        pan_distance = _signed_distance(start.pan_angle, end.pan_angle,
+                                        end.pan_clockwise, end.pan_turns)
+        tilt_distance = _signed_distance(start.tilt_angle, end.tilt_angle,
+                                         end.tilt_clockwise)
+        min_duration = max(
+            minimum_duration(pan_distance, pan_acceleration, max_pan_speed),
+            minimum_duration(tilt_distance, tilt_acceleration,
+                             max_tilt_speed))
+        if 0 < end.time < min_duration:
+            logger.warning(f'{end} can not be reached in {end.time}s,'
+                           f' it takes at least {min_duration:.2f}s')
+        pan_distances.append(pan_distance)
+        tilt_distances.append(tilt_distance)
+        durations.append(max(end.time, min_duration))
+    pan_speeds = _blend_speeds(pan_distances, durations)
+    tilt_speeds = _blend_speeds(tilt_distances, durations)
+    pan_profiles: List[TrapezoidalProfile] = []
+    tilt_profiles: List[TrapezoidalProfile] = []
+    pan_angle = points[0].pan_angle if points else 0.0
+    tilt_angle = points[0].tilt_angle if points else 0.0
+    for i, duration in enumerate(durations):
+        pan_profile = plan_profile(
+            pan_angle, pan_distances[i], duration, pan_acceleration,
+            max_pan_speed, pan_speeds[i], pan_speeds[i + 1])
+        tilt_profile = plan_profile(
+            tilt_angle, tilt_distances[i], duration, tilt_acceleration,
+            max_tilt_speed, tilt_speeds[i], tilt_speeds[i + 1])
+        pan_profiles.append(pan_profile)
+        tilt_profiles.append(tilt_profile)
+        pan_angle += pan_distances[i]
+        tilt_angle += tilt_distances[i]
+    return MotionPlan(pan_profiles, tilt_profiles,
+                      [p.zoom_factor for p in points] or [1.0])
+
+
+class PlannedPathOfMotionCameraController(PathOfMotionCameraController):
+    """
+    Move the camera along the path of motion by a plan that is computed once,
+    when the controller is started. The planned speeds are sent to the gimbal
+    with a correction of the difference between planned and measured angles.
+
+    The zoom speed (to follow the zoom keyframes) is set in the camera speeds,
+    which have to be applied by the caller. The zoom ratio has to be reported
+    by on_zoom_ratio.
+    """
+
+    def __init__(
+            self,
+            gimbal: Gimbal,
+            rotate_speed_manager: SpeedManager,
+            tilt_speed_manager: SpeedManager,
+            max_pan_speed: float = 60,
+            max_tilt_speed: float = 12,
+            position_gain: float = 1.0,
+            zoom_tolerance: float = 0.05) -> None:
+        super().__init__()
+        self._gimbal = gimbal
+        self._rotate_speed_manager = rotate_speed_manager
+        self._tilt_speed_manager = tilt_speed_manager
+        self._max_pan_speed = max_pan_speed
+        self._max_tilt_speed = max_tilt_speed
+        self.position_gain = position_gain
+        self.zoom_tolerance = zoom_tolerance
+        self.zoom_ratio: Optional[float] = None
+        self.plan: Optional[MotionPlan] = None
+        self._start_time = 0.0
+
+    def on_zoom_ratio(self, zoom_ratio: float) -> None:
+        self.zoom_ratio = zoom_ratio
+
+    def _get_angles(self) -> Tuple[float, float]:
+        angles = self._gimbal.get_angles()
+        return (to_degree(angles.target_angle_3),
+                to_degree(angles.target_angle_2))
+
+    def start(self) -> None:
+        pan_angle, tilt_angle = self._get_angles()
+        start = PointOfMotion(pan_angle=pan_angle, tilt_angle=tilt_angle,
+                              zoom_factor=self.zoom_ratio or 1.0)
+        self.plan = plan_path(
+            [start] + self._path,
+            self._rotate_speed_manager.acceleration_per_second,
+            self._tilt_speed_manager.acceleration_per_second,
+            max_pan_speed=self._max_pan_speed,
+            max_tilt_speed=self._max_tilt_speed)
+        logger.debug(f'planned path of motion takes {self.plan.duration:.2f}s')
+        self._current_point_index = 0
+        self._start_time = time()
+
+    def _zoom_speed(self, planned_zoom_ratio: float) -> ZoomSpeed:
+        if self.zoom_ratio is None:
+            return ZoomSpeed.ZOOM_STOPPED
+        if planned_zoom_ratio > self.zoom_ratio * (1 + self.zoom_tolerance):
+            return ZoomSpeed.ZOOM_IN_SLOW
+        if planned_zoom_ratio < self.zoom_ratio / (1 + self.zoom_tolerance):
+            return ZoomSpeed.ZOOM_OUT_SLOW
+        return ZoomSpeed.ZOOM_STOPPED
+
+    def update(self, camera_speeds: CameraSpeeds) -> None:
+        assert self.plan is not None, 'controller has not been started'
+        if self.is_end_of_path_reached():
+            return
+        elapsed_time = time() - self._start_time
+        if elapsed_time >= self.plan.duration:
+            logger.debug('end of path reached')
+            camera_speeds.reset()
+            self._gimbal.control(yaw_speed=0, pitch_speed=0)
+            self._current_point_index = len(self._path)
+            return
+        sample = self.plan.sample(elapsed_time)
+        self._current_point_index = sample.segment
+        pan_angle, tilt_angle = self._get_angles()
+        pan_error = (sample.pan_angle - pan_angle + 180) % 360 - 180
+        tilt_error = (sample.tilt_angle - tilt_angle + 180) % 360 - 180
+        camera_speeds.pan_speed = \
+            sample.pan_speed + self.position_gain * pan_error
+        camera_speeds.tilt_speed = \
+            sample.tilt_speed + self.position_gain * tilt_error
+        camera_speeds.zoom_speed = self._zoom_speed(sample.zoom_ratio)
+        self._gimbal.control(yaw_speed=camera_speeds.pan_speed,
+                             pitch_speed=camera_speeds.tilt_speed)
+
+
+def _main():
+    """
+    Print the planned path of motion of the example of camera_controller.
+    """
+    points = [
+        PointOfMotion(pan_angle=0, pan_clockwise=False,
+                      tilt_angle=0, tilt_clockwise=False),
+        PointOfMotion(pan_angle=180, pan_clockwise=True,
+                      tilt_angle=30, tilt_clockwise=True,
+                      time=6, zoom_factor=2.0),
+        PointOfMotion(pan_angle=270, pan_clockwise=True,
+                      tilt_angle=15, tilt_clockwise=False,
+                      time=3),
+        PointOfMotion(pan_angle=0, pan_clockwise=False,
+                      tilt_angle=0, tilt_clockwise=False,
+                      time=12, pan_turns=1),
+    ]
+    plan = plan_path(points, pan_acceleration=60, tilt_acceleration=12)
+    print(f'duration {plan.duration:.2f}s')
+    for t in numpy.arange(0, plan.duration + 0.5, 0.5):
+        s = plan.sample(t)
+        print(f'{t:5.1f}s segment {s.segment}'
+              f' pan {s.pan_angle:7.2f}° {s.pan_speed:6.2f}°/s'
+              f' tilt {s.tilt_angle:6.2f}° {s.tilt_speed:6.2f}°/s'
+              f' zoom {s.zoom_ratio:4.2f}x')
+
+
+if __name__ == '__main__':
+    _main()
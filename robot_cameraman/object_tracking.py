@@ -1,13 +1,19 @@
 # import the necessary packages
+import time
 from collections import OrderedDict
 from logging import Logger, getLogger
-from typing import List, Dict, Set
+from typing import List, Dict, Set, Sequence, Optional
 
 import numpy
 import numpy as np
+from scipy.optimize import linear_sum_assignment
 from scipy.spatial import distance as dist
 
-from robot_cameraman.image_detection import DetectionCandidate
+from robot_cameraman.box import Box, Point
+from robot_cameraman.ego_motion import EgoMotion, ImageMotion
+from robot_cameraman.geometry import areas, centers
+from robot_cameraman.image_detection import DetectionCandidate, \
+    DetectionBatch
 
 logger: Logger = getLogger(__name__)
 
@@ -196,8 +202,15 @@ class ObjectTracker:
         self._centroid_tracker = CentroidTracker(
             max_disappeared=max_disappeared)
 
-    def update(self, inference_results: List[DetectionCandidate]) \
+    def update(
+            self,
+            inference_results: List[DetectionCandidate],
+            timestamp: Optional[float] = None) \
             -> Dict[int, DetectionCandidate]:
+        """
+        :param timestamp: time of the frame in seconds (not used by the
+            centroid tracker)
+        """
         centroid_to_inference_result = dict()
         centroids = np.zeros((len(inference_results), 2), dtype="int")
         for i, r in enumerate(inference_results):
@@ -211,3 +224,379 @@ class ObjectTracker:
 
     def is_registered(self, object_id: int) -> bool:
         return self._centroid_tracker.is_registered(object_id)
+
+    def velocity(self, object_id: int) -> Optional[Point]:
+        """
+        :return: estimated velocity of the center of a tracked object in the
+            image (pixels per second) or None, if the tracker does not
+            estimate velocities
+        """
+        return None
+
+
+def _coordinates(candidates: Sequence[DetectionCandidate]) -> numpy.ndarray:
+    if isinstance(candidates, DetectionBatch):
+        return candidates.coordinates().astype(float)
+    return numpy.array([c.bounding_box.coordinates() for c in candidates],
+                       dtype=float).reshape(-1, 4)
+
+
+class AssignmentObjectTracker(ObjectTracker):
+    """
+    Track objects by solving the assignment of tracked objects to candidates
+    optimally (linear_sum_assignment) instead of greedy matching.
+
+    The same rules as in CentroidTracker decide whether a candidate may be
+    assigned to a tracked object, but they are evaluated as masks of all pairs
+    at once: the distance of the centers must not exceed a limit that grows
+    with the number of frames the object disappeared unless the boxes overlap
+    for the most part, and the size must not change by more than a factor.
+    The cost of an allowed pair combines the distance (relative to the limit),
+    the intersection over union and the size change.
+
+    The state of the tracked objects is stored in arrays. In contrast to
+    ObjectTracker, candidates with the same center are not lost.
+
+    If ego_motion is given, the tracked objects are moved by the motion in the
+    image that is caused by panning, tilting and zooming the camera since the
+    last update, before candidates are assigned.
+    """
+
+    _invalid_cost = 1e6
+
+    # noinspection PyMissingConstructor
+    def __init__(
+            self,
+            max_disappeared=20,
+            distance_limit_per_frame: float = 100,
+            max_distance_limit: float = 500,
+            intersection_limit: float = 0.3,
+            max_size_change_factor: float = 4,
+            ego_motion: Optional[EgoMotion] = None) -> None:
+        self.max_disappeared = max_disappeared
+        self.distance_limit_per_frame = distance_limit_per_frame
+        self.max_distance_limit = max_distance_limit
+        self.intersection_limit = intersection_limit
+        self.max_size_change_factor = max_size_change_factor
+        self.ego_motion = ego_motion
+        self._timestamp: Optional[float] = None
+        self._next_object_id = 0
+        self._object_ids = numpy.empty(0, dtype=int)
+        self._boxes = numpy.empty((0, 4))
+        self._disappeared = numpy.empty(0, dtype=int)
+
+    def _compensate(self, motion: ImageMotion) -> None:
+        """
+        Move the tracked objects by the image motion caused by the camera.
+        """
+        center_x, center_y = self.ego_motion.center
+        self._boxes = motion.transform_points(
+            self._boxes.reshape(-1, 2), center_x, center_y).reshape(-1, 4)
+
+    def _predict_boxes(self, elapsed_time: float) -> numpy.ndarray:
+        """
+        :param elapsed_time: seconds since the last update
+        :return: boxes of the tracked objects expected in the current frame
+        """
+        return self._boxes
+
+    def _correct(self, rows: numpy.ndarray, coordinates: numpy.ndarray) \
+            -> None:
+        """
+        Update the tracked objects of the given rows with the coordinates of
+        their assigned candidates.
+        """
+        self._boxes[rows] = coordinates
+
+    def _keep(self, is_kept: numpy.ndarray) -> None:
+        self._object_ids = self._object_ids[is_kept]
+        self._boxes = self._boxes[is_kept]
+        self._disappeared = self._disappeared[is_kept]
+
+    def _register(self, coordinates: numpy.ndarray) -> numpy.ndarray:
+        object_ids = numpy.arange(
+            self._next_object_id, self._next_object_id + len(coordinates))
+        self._next_object_id += len(coordinates)
+        self._object_ids = numpy.concatenate((self._object_ids, object_ids))
+        self._boxes = numpy.concatenate((self._boxes, coordinates))
+        self._disappeared = numpy.concatenate(
+            (self._disappeared, numpy.zeros(len(coordinates), dtype=int)))
+        return object_ids
+
+    def _cost_matrix(self, boxes: numpy.ndarray, coordinates: numpy.ndarray) \
+            -> numpy.ndarray:
+        """
+        :return: cost of each pair of tracked object (row) and candidate
+            (column). Pairs that are not allowed have an invalid cost.
+        """
+        distances = dist.cdist(centers(boxes), centers(coordinates))
+        # it is assumed that older objects may have moved further,
+        # but recently seen objects do not move suddenly in big steps
+        limits = numpy.minimum(
+            self.max_distance_limit,
+            self.distance_limit_per_frame * (self._disappeared + 1))[:, None]
+        x1 = numpy.maximum(boxes[:, None, 0], coordinates[None, :, 0])
+        y1 = numpy.maximum(boxes[:, None, 1], coordinates[None, :, 1])
+        x2 = numpy.minimum(boxes[:, None, 2], coordinates[None, :, 2])
+        y2 = numpy.minimum(boxes[:, None, 3], coordinates[None, :, 3])
+        intersections = (numpy.maximum(x2 - x1, 0)
+                         * numpy.maximum(y2 - y1, 0))
+        old_areas = areas(boxes)[:, None]
+        new_areas = areas(coordinates)[None, :]
+        min_areas = numpy.minimum(old_areas, new_areas)
+        max_areas = numpy.maximum(old_areas, new_areas)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            intersection_ratios = numpy.nan_to_num(
+                intersections / min_areas, nan=0.0, posinf=0.0)
+            ious = numpy.nan_to_num(
+                intersections / (old_areas + new_areas - intersections),
+                nan=0.0, posinf=0.0)
+            size_change_factors = numpy.nan_to_num(
+                max_areas / min_areas, nan=numpy.inf)
+        is_allowed = (
+                ((distances <= limits)
+                 | (intersection_ratios >= self.intersection_limit))
+                & (size_change_factors <= self.max_size_change_factor))
+        cost = (distances / limits
+                + (1 - ious)
+                + (numpy.log(numpy.minimum(size_change_factors,
+                                           self.max_size_change_factor))
+                   / numpy.log(self.max_size_change_factor)))
+        cost[~is_allowed] = self._invalid_cost
+        return cost
+
+    def update_indices(
+            self,
+            coordinates: numpy.ndarray,
+            timestamp: Optional[float] = None) -> numpy.ndarray:
+        """
+        :param coordinates: array of shape (N, 4) with x1, y1, x2, y2 of each
+            candidate
+        :param timestamp: time of the frame in seconds (defaults to now)
+        :return: object ID of each candidate
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        elapsed_time = (0.0 if self._timestamp is None
+                        else timestamp - self._timestamp)
+        self._timestamp = timestamp
+        if self.ego_motion is not None:
+            motion = self.ego_motion.image_motion(timestamp)
+            if len(self._object_ids) > 0:
+                logger.debug(f'compensate ego-motion {motion}')
+                self._compensate(motion)
+        boxes = self._predict_boxes(elapsed_time)
+        object_ids = numpy.empty(len(coordinates), dtype=int)
+        is_assigned = numpy.zeros(len(coordinates), dtype=bool)
+        is_updated = numpy.zeros(len(self._object_ids), dtype=bool)
+        if len(self._object_ids) > 0 and len(coordinates) > 0:
+            cost = self._cost_matrix(boxes, coordinates)
+            rows, cols = linear_sum_assignment(cost)
+            is_valid = cost[rows, cols] < self._invalid_cost
+            rows = rows[is_valid]
+            cols = cols[is_valid]
+            object_ids[cols] = self._object_ids[rows]
+            is_assigned[cols] = True
+            is_updated[rows] = True
+            self._correct(rows, coordinates[cols])
+        self._disappeared[is_updated] = 0
+        self._disappeared[~is_updated] += 1
+        self._keep(self._disappeared <= self.max_disappeared)
+        # register candidates that are not assigned to a tracked object
+        new_indices = numpy.flatnonzero(~is_assigned)
+        object_ids[new_indices] = self._register(coordinates[new_indices])
+        return object_ids
+
+    def update(
+            self,
+            inference_results: Sequence[DetectionCandidate],
+            timestamp: Optional[float] = None) \
+            -> Dict[int, DetectionCandidate]:
+        object_ids = self.update_indices(_coordinates(inference_results),
+                                         timestamp)
+        return {object_id: inference_results[i]
+                for i, object_id in enumerate(object_ids.tolist())}
+
+    def is_registered(self, object_id: int) -> bool:
+        return bool(numpy.any(self._object_ids == object_id))
+
+
+def _boxes_to_measurements(coordinates: numpy.ndarray) -> numpy.ndarray:
+    """
+    :return: center x, center y, scale (area) and aspect ratio of each box
+    """
+    widths = coordinates[:, 2] - coordinates[:, 0]
+    heights = coordinates[:, 3] - coordinates[:, 1]
+    return numpy.column_stack((
+        centers(coordinates),
+        widths * heights,
+        widths / numpy.maximum(heights, 1e-6)))
+
+
+def _states_to_boxes(states: numpy.ndarray) -> numpy.ndarray:
+    scales = numpy.maximum(states[:, 2], 0)
+    widths = numpy.sqrt(scales * states[:, 3])
+    heights = scales / numpy.maximum(widths, 1e-6)
+    centers = states[:, :2]
+    sizes = numpy.column_stack((widths, heights))
+    return numpy.hstack((centers - sizes / 2, centers + sizes / 2))
+
+
+class KalmanObjectTracker(AssignmentObjectTracker):
+    """
+    Track objects with a constant velocity Kalman filter per object as in
+    SORT (Simple Online and Realtime Tracking, Bewley et al. 2016).
+    The state of an object consists of the center (x, y), scale (area) and
+    aspect ratio of its box and the velocities of center and scale.
+    Velocities are measured per second, since the frame rate is not constant.
+
+    Before candidates are assigned, each tracked object is predicted to the
+    time of the current frame. Thereby, objects that disappeared for a few
+    frames (e.g. occluded) are searched where they are expected to be and
+    not where they were seen last. The filters of all objects are predicted
+    and updated at once using stacked arrays.
+    """
+
+    # x, y, scale, aspect ratio and velocities of x, y and scale
+    _dimensions = 7
+    _measurement_matrix = numpy.eye(4, _dimensions)
+
+    def __init__(
+            self,
+            max_disappeared=20,
+            distance_limit_per_frame: float = 100,
+            max_distance_limit: float = 500,
+            intersection_limit: float = 0.3,
+            max_size_change_factor: float = 4,
+            measurement_noise=(1, 1, 10, 0.01),
+            process_noise=(10, 10, 10, 0.0001, 100, 100, 100),
+            initial_velocity_variance: float = 10_000,
+            ego_motion: Optional[EgoMotion] = None) -> None:
+        """
+        :param measurement_noise: variance of x, y, scale and aspect ratio
+        :param process_noise: variance per second of each state variable
+        :param initial_velocity_variance: variance of the unknown velocities
+            of new objects
+        """
+        super().__init__(
+            max_disappeared=max_disappeared,
+            distance_limit_per_frame=distance_limit_per_frame,
+            max_distance_limit=max_distance_limit,
+            intersection_limit=intersection_limit,
+            max_size_change_factor=max_size_change_factor,
+            ego_motion=ego_motion)
+        self._measurement_noise = numpy.diag(measurement_noise).astype(float)
+        self._process_noise = numpy.diag(process_noise).astype(float)
+        self._initial_covariance = numpy.diag(
+            [*measurement_noise, *[initial_velocity_variance] * 3]
+        ).astype(float)
+        self._states = numpy.empty((0, self._dimensions))
+        self._covariances = numpy.empty(
+            (0, self._dimensions, self._dimensions))
+
+    def _transition_matrix(self, dt: float) -> numpy.ndarray:
+        transition = numpy.eye(self._dimensions)
+        transition[0, 4] = transition[1, 5] = transition[2, 6] = dt
+        return transition
+
+    def _predict_states(self, dt: float):
+        states = self._states.copy()
+        # scale (area) must not get negative
+        is_shrinking_to_zero = states[:, 2] + states[:, 6] * dt <= 0
+        states[is_shrinking_to_zero, 6] = 0
+        transition = self._transition_matrix(dt)
+        states = states @ transition.T
+        covariances = (transition @ self._covariances @ transition.T
+                       + self._process_noise * dt)
+        return states, covariances
+
+    def _compensate(self, motion: ImageMotion) -> None:
+        center_x, center_y = self.ego_motion.center
+        self._states[:, :2] = motion.transform_points(
+            self._states[:, :2], center_x, center_y)
+        # velocities are scaled by zoom as well
+        self._states[:, 4:6] *= motion.scale
+        # scale of a box is its area
+        self._states[:, [2, 6]] *= motion.scale ** 2
+
+    def _predict_boxes(self, elapsed_time: float) -> numpy.ndarray:
+        if elapsed_time > 0:
+            self._states, self._covariances = \
+                self._predict_states(elapsed_time)
+        self._boxes = _states_to_boxes(self._states)
+        return self._boxes
+
+    def _correct(self, rows: numpy.ndarray, coordinates: numpy.ndarray) \
+            -> None:
+        measurement_matrix = self._measurement_matrix
+        states = self._states[rows]
+        covariances = self._covariances[rows]
+        residuals = (_boxes_to_measurements(coordinates)
+                     - states @ measurement_matrix.T)
+        residual_covariances = (
+                measurement_matrix @ covariances @ measurement_matrix.T
+                + self._measurement_noise)
+        gains = (covariances @ measurement_matrix.T
+                 @ numpy.linalg.inv(residual_covariances))
+        self._states[rows] = states + (gains @ residuals[:, :, None])[:, :, 0]
+        self._covariances[rows] = (
+                (numpy.eye(self._dimensions) - gains @ measurement_matrix)
+                @ covariances)
+        self._boxes[rows] = coordinates
+
+    def _keep(self, is_kept: numpy.ndarray) -> None:
+        super()._keep(is_kept)
+        self._states = self._states[is_kept]
+        self._covariances = self._covariances[is_kept]
+
+    def _register(self, coordinates: numpy.ndarray) -> numpy.ndarray:
+        states = numpy.zeros((len(coordinates), self._dimensions))
+        states[:, :4] = _boxes_to_measurements(coordinates)
+        self._states = numpy.concatenate((self._states, states))
+        self._covariances = numpy.concatenate((
+            self._covariances,
+            numpy.broadcast_to(
+                self._initial_covariance,
+                (len(coordinates),) + self._initial_covariance.shape)))
+        return super()._register(coordinates)
+
+    def _row(self, object_id: int) -> Optional[int]:
+        rows = numpy.flatnonzero(self._object_ids == object_id)
+        return int(rows[0]) if len(rows) > 0 else None
+
+    def predicted_box(
+            self,
+            object_id: int,
+            timestamp: Optional[float] = None) -> Optional[Box]:
+        """
+        Predict the box of a tracked object at the given time (defaults to
+        now) without changing the state of the tracker.
+        """
+        row = self._row(object_id)
+        if row is None:
+            return None
+        if timestamp is None:
+            timestamp = time.time()
+        dt = 0.0 if self._timestamp is None else timestamp - self._timestamp
+        state = self._states[row:row + 1]
+        if dt > 0:
+            state = state @ self._transition_matrix(dt).T
+        return Box.from_coordinate_iterable(
+            _states_to_boxes(state)[0].tolist())
+
+    def velocity(self, object_id: int) -> Optional[Point]:
+        """
+        :return: estimated velocity of the center of a tracked object in the
+            image (pixels per second)
+        """
+        row = self._row(object_id)
+        if row is None:
+            return None
+        vx, vy = self._states[row, 4:6].tolist()
+        if self.ego_motion is not None:
+            # The state is compensated by the ego-motion. Hence, its velocity
+            # does not include the motion in the image caused by the camera.
+            ego_vx, ego_vy = self.ego_motion.velocity()
+            vx += ego_vx
+            vy += ego_vy
+        return Point(vx, vy)
@@ -15,8 +15,8 @@ from PIL.ImageFont import FreeTypeFont
 from robot_cameraman.annotation import ImageAnnotator
 from robot_cameraman.candidate_filter import filter_intersections
 from robot_cameraman.color import Color
-from robot_cameraman.image_detection import EdgeTpuDetectionEngine, \
-    DetectionCandidate
+from robot_cameraman.detection_cache import create_edge_tpu_video_detector
+from robot_cameraman.image_detection import DetectionCandidate
 from robot_cameraman.object_tracking import ObjectTracker
 from robot_cameraman.resource import read_label_file
 
@@ -105,10 +105,12 @@ def log_candidates(
 def main(args):
     labels = read_label_file(args.labels)
     font = PIL.ImageFont.truetype(str(args.font), args.fontSize)
-    detection_engine = EdgeTpuDetectionEngine(
+    detector = create_edge_tpu_video_detector(
+        video=Path(args.input),
         model=args.model,
         confidence=args.confidence,
-        max_objects=args.maxObjects)
+        max_objects=args.maxObjects,
+        cache_directory=args.detectionCache)
     annotator = ColoredCandidatesImageAnnotator(args.targetLabelId, labels,
                                                 font)
     previous_candidates: Optional[Dict[int, DetectionCandidate]] = None
@@ -116,42 +118,48 @@ def main(args):
     fps = vs.get(cv2.CAP_PROP_FPS)
     object_tracker = ObjectTracker(max_disappeared=fps)
     out = create_video_writer(vs, args.output)
-    while True:
-        try:
-            success, frame = vs.read()
-            if not success:
-                break
-            frame_counter = int(vs.get(cv2.CAP_PROP_POS_FRAMES))
-            print(f'\nframe {frame_counter}')
-            image = PIL.Image.fromarray(frame)
-            inference_results = detection_engine.detect(image)
-            candidates = [obj for obj in inference_results if
-                          obj.label_id == args.targetLabelId]
-            log_candidates('candidates', candidates)
-            filtered_candidates = filter_intersections(candidates)
-            log_candidates('filtered_candidates', filtered_candidates)
-            annotator.global_candidate_id += (
-                    len(candidates) - len(filtered_candidates))
-            candidates = object_tracker.update(filtered_candidates)
-            if previous_candidates:
-                previous_candidates = {
-                    id: candidate
-                    for (id, candidate) in previous_candidates.items()
-                    if object_tracker.is_registered(id)}
-            annotator.annotate(image, None, candidates, previous_candidates)
-            previous_candidates = {**previous_candidates,
-                                   **candidates} if previous_candidates else candidates
-
-            annotated_image = numpy.asarray(image)
-            out.write(annotated_image)
-            if args.showVideo:
-                cv2.imshow('NCS Improved live inference', annotated_image)
-                if cv2.waitKey(5) & 0xFF == ord('q'):
+    try:
+        while True:
+            try:
+                success, frame = vs.read()
+                if not success:
                     break
-        except KeyboardInterrupt:
-            break
-    vs.release()
-    cv2.destroyAllWindows()
+                frame_counter = int(vs.get(cv2.CAP_PROP_POS_FRAMES))
+                print(f'\nframe {frame_counter}')
+                image = PIL.Image.fromarray(frame)
+                inference_results = detector.detect(frame_counter, image)
+                candidates = inference_results.filter(
+                    label_id=args.targetLabelId)
+                log_candidates('candidates', candidates)
+                filtered_candidates = filter_intersections(candidates)
+                log_candidates('filtered_candidates', filtered_candidates)
+                annotator.global_candidate_id += (
+                        len(candidates) - len(filtered_candidates))
+                candidates = object_tracker.update(filtered_candidates)
+                if previous_candidates:
+                    previous_candidates = {
+                        id: candidate
+                        for (id, candidate) in previous_candidates.items()
+                        if object_tracker.is_registered(id)}
+                annotator.annotate(
+                    image, None, candidates, previous_candidates)
+                previous_candidates = (
+                    {**previous_candidates, **candidates}
+                    if previous_candidates else candidates)
+
+                annotated_image = numpy.asarray(image)
+                out.write(annotated_image)
+                if args.showVideo:
+                    cv2.imshow('NCS Improved live inference', annotated_image)
+                    if cv2.waitKey(5) & 0xFF == ord('q'):
+                        break
+            except KeyboardInterrupt:
+                break
+    finally:
+        vs.release()
+        cv2.destroyAllWindows()
+        hits, misses = detector.save()
+        print(f'detection cache: {hits} hits, {misses} misses')
 
 
 def str2bool(v: Any) -> bool:
@@ -195,6 +203,19 @@ def parse_arguments():
     parser.add_argument('--confidence', type=float,
                         default=0.50,
                         help="Minimum confidence threshold to tag objects.")
+    parser.add_argument(
+        '--detectionCache',
+        type=Path,
+        default=Path(__file__).parent.parent / '.detection-cache',
+        help="Directory of the detection cache. Detection candidates of"
+             " each frame are cached and reused in subsequent runs on the"
+             " same video with the same model and confidence.")
+    parser.add_argument(
+        '--noDetectionCache',
+        dest='detectionCache',
+        action='store_const',
+        const=None,
+        help="Do not use the detection cache.")
     parser.add_argument('--font',
                         type=Path,
                         default=resources / 'Roboto-Regular.ttf',
@@ -0,0 +1,252 @@
+import csv
+import logging
+from dataclasses import dataclass, replace
+from logging import Logger
+from pathlib import Path
+from typing import Optional, Sequence, List
+
+import numpy
+
+logger: Logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PidGains:
+    proportional: float = 24.0
+    integral: float = 0.0
+    derivative: float = 0.0
+
+
+class PidController:
+    """
+    PID controller with
+
+    - clamping anti-windup: the integral is not increased further in the
+      direction of saturation, if the output is limited by output_limit or
+      can not be reached in time due to the maximum output change per second
+      (e.g. acceleration of a SpeedManager).
+    - derivative of the error that is low-pass filtered with the given
+      time constant, since (detected) positions are noisy.
+    """
+
+    def __init__(
+            self,
+            gains: PidGains,
+            output_limit: float = 1000.0,
+            derivative_time_constant: float = 0.1) -> None:
+        self.gains = gains
+        self.output_limit = output_limit
+        self.derivative_time_constant = derivative_time_constant
+        self.integral = 0.0
+        self.derivative = 0.0
+        self.output = 0.0
+        self._previous_error: Optional[float] = None
+
+    def reset(self) -> None:
+        self.integral = 0.0
+        self.derivative = 0.0
+        self.output = 0.0
+        self._previous_error = None
+
+    def update(
+            self,
+            error: float,
+            elapsed_time: float,
+            max_output_change: Optional[float] = None,
+            gain_factor: float = 1.0) -> float:
+        """
+        :param error: difference of target and current value
+        :param elapsed_time: seconds since the last update
+        :param max_output_change: maximum change of the output per second
+        :param gain_factor: all gains are multiplied by this factor
+        :return: output limited to [-output_limit, output_limit]
+        """
+        if self._previous_error is not None and elapsed_time > 0:
+            raw_derivative = (error - self._previous_error) / elapsed_time
+            self.derivative += (elapsed_time
+                                / (self.derivative_time_constant
+                                   + elapsed_time)
+                                * (raw_derivative - self.derivative))
+        self._previous_error = error
+        proportional = gain_factor * self.gains.proportional * error
+        derivative = gain_factor * self.gains.derivative * self.derivative
+        integral = (self.integral
+                    + gain_factor * self.gains.integral * error * elapsed_time)
+        output = proportional + integral + derivative
+        upper_limit = self.output_limit
+        lower_limit = -self.output_limit
+        if max_output_change is not None:
+            max_change = max_output_change * elapsed_time
+            upper_limit = min(upper_limit, self.output + max_change)
+            lower_limit = max(lower_limit, self.output - max_change)
+        is_saturated = ((output > upper_limit and error > 0)
+                        or (output < lower_limit and error < 0))
+        if not is_saturated:
+            self.integral = integral
+        self.output = max(-self.output_limit,
+                          min(self.output_limit,
+                              proportional + self.integral + derivative))
+        return self.output
+
+
+@dataclass
+class SimulatedAxis:
+    """
+    Simple model of a gimbal axis that tracks a target with a camera.
+    Detected positions of the target are delayed by latency. The speed of the
+    axis changes towards the requested speed with limited acceleration
+    (like SpeedManager).
+    """
+    image_size: int = 640
+    field_of_view: float = 84.0
+    max_speed: float = 24.0
+    acceleration: float = 400.0
+    latency: float = 0.15
+    time_step: float = 1 / 25
+    derivative_time_constant: float = 0.1
+
+    def simulate(self, gains: PidGains, target_angles: numpy.ndarray) \
+            -> numpy.ndarray:
+        """
+        :param target_angles: angle (degree) of the target in each time step
+        :return: distance (pixels) of the target to the image center in each
+            time step
+        """
+        pixels_per_degree = self.image_size / self.field_of_view
+        delay = int(round(self.latency / self.time_step))
+        controller = PidController(
+            gains,
+            output_limit=self.max_speed,
+            derivative_time_constant=self.derivative_time_constant)
+        errors = numpy.empty(len(target_angles))
+        angle = 0.0
+        speed = 0.0
+        for i, target_angle in enumerate(target_angles.tolist()):
+            errors[i] = (target_angle - angle) * pixels_per_degree
+            measured_error = errors[i - delay] if i >= delay else 0.0
+            requested_speed = controller.update(
+                measured_error / (self.image_size / 2), self.time_step,
+                max_output_change=self.acceleration)
+            max_change = self.acceleration * self.time_step
+            speed += max(-max_change, min(max_change, requested_speed - speed))
+            angle += speed * self.time_step
+        return errors
+
+
+def step_target(amplitude: float = 10.0, duration: float = 4.0,
+                time_step: float = 1 / 25) -> numpy.ndarray:
+    return numpy.full(int(round(duration / time_step)), amplitude)
+
+
+def ramp_target(velocity: float = 5.0, duration: float = 4.0,
+                time_step: float = 1 / 25) -> numpy.ndarray:
+    return velocity * time_step * numpy.arange(int(round(duration
+                                                         / time_step)))
+
+
+def target_from_trajectory_log(
+        log: Path,
+        object_id: int,
+        field_of_view: float = 84.0,
+        image_size: int = 640,
+        time_step: float = 1 / 25) -> numpy.ndarray:
+    """
+    Read the horizontal motion of an object from a trajectory log (see
+    Trajectories) as target angles in equal time steps. The log has to be
+    recorded with a static camera, since the positions in the image are not
+    compensated for camera motion.
+    """
+    with log.open(newline='') as file:
+        rows = [row for row in csv.DictReader(file)
+                if int(row['id']) == object_id]
+    if len(rows) < 2:
+        raise ValueError(f'no trajectory of object {object_id} in {log}')
+    timestamps = numpy.array([float(row['timestamp']) for row in rows])
+    xs = numpy.array([float(row['x']) for row in rows])
+    times = numpy.arange(timestamps[0], timestamps[-1], time_step)
+    angles = (numpy.interp(times, timestamps, xs) - image_size / 2) \
+        * field_of_view / image_size
+    return angles
+
+
+def integral_of_time_weighted_absolute_error(
+        errors: numpy.ndarray, time_step: float) -> float:
+    times = numpy.arange(len(errors)) * time_step
+    return float(numpy.sum(times * numpy.abs(errors)) * time_step)
+
+
+def autotune(
+        axis: SimulatedAxis,
+        targets: Sequence[numpy.ndarray],
+        initial_gains: PidGains = PidGains(),
+        iterations: int = 100,
+        tolerance: float = 1e-3) -> PidGains:
+    """
+    Tune gains by coordinate descent ("twiddle") that minimizes the integral
+    of time-weighted absolute error (ITAE) of the simulated axis for all
+    targets. ITAE penalizes slow settling and overshoot.
+    """
+
+    def cost(gains: PidGains) -> float:
+        return sum(integral_of_time_weighted_absolute_error(
+            axis.simulate(gains, target), axis.time_step)
+            for target in targets)
+
+    parameters = ['proportional', 'integral', 'derivative']
+    gains = replace(initial_gains)
+    steps: List[float] = [max(1.0, getattr(gains, p) / 2)
+                          for p in parameters]
+    best_cost = cost(gains)
+    for iteration in range(iterations):
+        if sum(steps) < tolerance:
+            break
+        for i, parameter in enumerate(parameters):
+            value = getattr(gains, parameter)
+            for candidate in (value + steps[i], max(0.0, value - steps[i])):
+                candidate_gains = replace(gains, **{parameter: candidate})
+                candidate_cost = cost(candidate_gains)
+                if candidate_cost < best_cost:
+                    gains, best_cost = candidate_gains, candidate_cost
+                    steps[i] *= 1.2
+                    break
+            else:
+                steps[i] *= 0.5
+        logger.debug(f'iteration {iteration}: {gains} (cost {best_cost})')
+    return gains
+
+
+def _main():
+    """
+    Tune PID gains of the simulated pan axis for a step and a moving target
+    (or the motion of an object in a trajectory log).
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description=_main.__doc__)
+    parser.add_argument('--trajectoryLog', type=Path)
+    parser.add_argument('--objectId', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.15)
+    parser.add_argument('--acceleration', type=float, default=400)
+    parser.add_argument('--maxSpeed', type=float, default=24)
+    args = parser.parse_args()
+    axis = SimulatedAxis(max_speed=args.maxSpeed,
+                         acceleration=args.acceleration,
+                         latency=args.latency)
+    if args.trajectoryLog is not None:
+        targets = [target_from_trajectory_log(args.trajectoryLog,
+                                              args.objectId)]
+    else:
+        targets = [step_target(), ramp_target()]
+    initial_gains = PidGains()
+    gains = autotune(axis, targets, initial_gains)
+    for name, g in (('initial', initial_gains), ('tuned', gains)):
+        errors = [axis.simulate(g, target) for target in targets]
+        costs = [integral_of_time_weighted_absolute_error(e, axis.time_step)
+                 for e in errors]
+        overshoot = max(float(numpy.max(-numpy.sign(t[-1]) * e))
+                        for t, e in zip(targets, errors))
+        print(f'{name:>7}: {g}, ITAE {sum(costs):.1f},'
+              f' overshoot {max(0.0, overshoot):.1f} px')
+
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,280 @@
+import logging
+import time
+from logging import Logger
+from typing import Dict, Optional
+
+import cv2
+import numpy
+
+from robot_cameraman.box import Box
+from robot_cameraman.image_detection import DetectionCandidate
+from robot_cameraman.object_tracking import ObjectTracker
+
+logger: Logger = logging.getLogger(__name__)
+
+
+def appearance_embedding(
+        image_array: numpy.ndarray,
+        box: Box,
+        hue_bins: int = 16,
+        saturation_bins: int = 4) -> Optional[numpy.ndarray]:
+    """
+    Compact appearance descriptor of the image region of a box:
+    a hue-saturation histogram (ignoring dark and unsaturated pixels, whose hue
+    is unreliable). The square root of the normalized histogram is returned,
+    so that the dot product of two embeddings is their Bhattacharyya
+    coefficient.
+
+    :return: embedding or None, if the region is empty
+    """
+    height, width = image_array.shape[:2]
+    x1, y1, x2, y2 = (int(round(c)) for c in box.coordinates())
+    x1, y1 = max(0, x1), max(0, y1)
+    x2, y2 = min(width, x2), min(height, y2)
+    if x2 <= x1 or y2 <= y1:
+        return None
+    hsv = cv2.cvtColor(image_array[y1:y2, x1:x2], cv2.COLOR_RGB2HSV)
+    mask = cv2.inRange(hsv, (0, 40, 32), (180, 255, 255))
+    histogram = cv2.calcHist([hsv], [0, 1], mask,
+                             [hue_bins, saturation_bins],
+                             [0, 180, 0, 256]).ravel()
+    total = histogram.sum()
+    if total == 0:
+        return None
+    return numpy.sqrt(histogram / total)
+
+
+class AppearanceGallery:
+    """
+    Bounded gallery of appearance embeddings of identities (IDs of tracked
+    objects) that are lost. If the gallery is full, the least recently lost
+    identity is replaced. Identities are evicted after max_age seconds.
+
+    Embeddings are stored in an array, so that new embeddings are compared
+    with all identities at once.
+    """
+
+    def __init__(
+            self,
+            dimensions: int,
+            capacity: int = 32,
+            max_age: float = 60.0,
+            max_distance: float = 0.4) -> None:
+        """
+        :param max_distance: maximum Hellinger distance (0 is equal,
+            1 is disjoint) of embeddings of the same identity
+        """
+        self.capacity = capacity
+        self.max_age = max_age
+        self.max_distance = max_distance
+        self._embeddings = numpy.zeros((capacity, dimensions),
+                                       dtype=numpy.float32)
+        self._ids = numpy.full(capacity, -1, dtype=int)
+        self._timestamps = numpy.full(capacity, -numpy.inf)
+
+    def __contains__(self, identity: int) -> bool:
+        return bool(numpy.any(self._ids == identity))
+
+    def __len__(self) -> int:
+        return int(numpy.count_nonzero(self._ids >= 0))
+
+    def add(self, identity: int, embedding: numpy.ndarray, timestamp: float) \
+            -> None:
+        index = numpy.flatnonzero(self._ids == identity)
+        if len(index) == 0:
+            # empty slots have the lowest timestamp
+            index = numpy.argmin(self._timestamps)
+            if self._ids[index] >= 0:
+                logger.debug(f'gallery is full, replace {self._ids[index]}')
+        self._embeddings[index] = embedding
+        self._ids[index] = identity
+        self._timestamps[index] = timestamp
+
+    def remove(self, identity: int) -> None:
+        is_identity = self._ids == identity
+        self._ids[is_identity] = -1
+        self._timestamps[is_identity] = -numpy.inf
+
+    def evict(self, timestamp: float) -> None:
+        is_expired = ((self._ids >= 0)
+                      & (timestamp - self._timestamps > self.max_age))
+        if numpy.any(is_expired):
+            logger.debug(f'evict {self._ids[is_expired].tolist()}')
+            self._ids[is_expired] = -1
+            self._timestamps[is_expired] = -numpy.inf
+
+    def match(self, embeddings: numpy.ndarray) -> numpy.ndarray:
+        """
+        Find the identity of each embedding. Each identity is matched at most
+        once, closest pairs first. Matched identities are removed from the
+        gallery.
+
+        :param embeddings: array of shape (N, dimensions)
+        :return: identity of each embedding or -1, if there is no match
+        """
+        identities = numpy.full(len(embeddings), -1, dtype=int)
+        is_used = self._ids >= 0
+        if len(embeddings) == 0 or not numpy.any(is_used):
+            return identities
+        coefficients = numpy.clip(embeddings @ self._embeddings.T, 0, 1)
+        distances = numpy.sqrt(1 - coefficients)
+        distances[:, ~is_used] = numpy.inf
+        rows, cols = numpy.unravel_index(
+            numpy.argsort(distances, axis=None), distances.shape)
+        is_row_matched = numpy.zeros(len(embeddings), dtype=bool)
+        is_col_matched = numpy.zeros(self.capacity, dtype=bool)
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            if distances[row, col] > self.max_distance:
+                break
+            if is_row_matched[row] or is_col_matched[col]:
+                continue
+            is_row_matched[row] = is_col_matched[col] = True
+            identities[row] = self._ids[col]
+        for identity in identities[is_row_matched].tolist():
+            self.remove(identity)
+        return identities
+
+
+class AppearanceReIdentifier:
+    """
+    Restore the ID of a tracked object (identity) that has been deregistered
+    by the object tracker (e.g. the target left the frame or has been occluded
+    too long) when it is detected again.
+
+    Each tracked object keeps an appearance embedding (exponential moving
+    average). When the tracker deregisters an object, its embedding is moved
+    to the gallery. Objects that are registered by the tracker with a new ID
+    are matched against the gallery. If an identity matches, the new ID of
+    the tracker is mapped to the identity. Since the appearance of an object
+    is often unreliable in its first frame (e.g. it is only partially
+    visible, while it enters the frame), a new ID is matched again in each
+    of the following match_frames frames (with its averaged embedding),
+    before it is considered as a new identity.
+    """
+
+    def __init__(
+            self,
+            object_tracker: ObjectTracker,
+            gallery_capacity: int = 32,
+            max_age: float = 60.0,
+            max_distance: float = 0.4,
+            hue_bins: int = 16,
+            saturation_bins: int = 4,
+            smoothing: float = 0.2,
+            match_frames: int = 10) -> None:
+        self._object_tracker = object_tracker
+        self._hue_bins = hue_bins
+        self._saturation_bins = saturation_bins
+        self._smoothing = smoothing
+        self.match_frames = match_frames
+        self.gallery = AppearanceGallery(
+            dimensions=hue_bins * saturation_bins,
+            capacity=gallery_capacity,
+            max_age=max_age,
+            max_distance=max_distance)
+        # ID of the object tracker -> identity
+        self._identities: Dict[int, int] = {}
+        self._embeddings: Dict[int, numpy.ndarray] = {}
+        # new IDs of the tracker that have not been matched yet
+        # -> number of frames they have been matched in
+        self._unconfirmed: Dict[int, int] = {}
+
+    def _embedding(self, image_array, box: Box) -> Optional[numpy.ndarray]:
+        return appearance_embedding(image_array, box, self._hue_bins,
+                                    self._saturation_bins)
+
+    def _move_deregistered_to_gallery(self, timestamp: float) -> None:
+        for tracker_id in list(self._identities):
+            if not self._object_tracker.is_registered(tracker_id):
+                identity = self._identities.pop(tracker_id)
+                self._unconfirmed.pop(tracker_id, None)
+                embedding = self._embeddings.pop(tracker_id, None)
+                if embedding is not None:
+                    logger.debug(f'identity {identity} is lost')
+                    self.gallery.add(identity, embedding, timestamp)
+
+    def _register(self, image_array, candidates: Dict[int, DetectionCandidate]):
+        for tracker_id, candidate in candidates.items():
+            if tracker_id in self._identities:
+                continue
+            self._identities[tracker_id] = tracker_id
+            self._unconfirmed[tracker_id] = 0
+            embedding = self._embedding(image_array, candidate.bounding_box)
+            if embedding is not None:
+                self._embeddings[tracker_id] = embedding
+
+    def _match_unconfirmed(
+            self,
+            candidates: Dict[int, DetectionCandidate]) -> None:
+        tracker_ids = [i for i in candidates
+                       if i in self._unconfirmed and i in self._embeddings]
+        if not tracker_ids:
+            return
+        identities = self.gallery.match(
+            numpy.stack([self._embeddings[i] for i in tracker_ids]))
+        for tracker_id, identity in zip(tracker_ids, identities.tolist()):
+            if identity >= 0:
+                logger.debug(f're-identified {identity} as {tracker_id}')
+                self._identities[tracker_id] = identity
+                del self._unconfirmed[tracker_id]
+            else:
+                self._unconfirmed[tracker_id] += 1
+                if self._unconfirmed[tracker_id] >= self.match_frames:
+                    logger.debug(f'{tracker_id} is a new identity')
+                    del self._unconfirmed[tracker_id]
+
+    def _update_embeddings(
+            self,
+            image_array,
+            candidates: Dict[int, DetectionCandidate]) -> None:
+        for tracker_id, candidate in candidates.items():
+            embedding = self._embedding(image_array, candidate.bounding_box)
+            if embedding is None:
+                continue
+            previous = self._embeddings.get(tracker_id)
+            if previous is not None:
+                embedding = ((1 - self._smoothing) * previous
+                             + self._smoothing * embedding)
+            self._embeddings[tracker_id] = embedding
+
+    def update(
+            self,
+            image,
+            candidates: Dict[int, DetectionCandidate],
+            timestamp: Optional[float] = None) \
+            -> Dict[int, DetectionCandidate]:
+        """
+        :param candidates: result of the object tracker
+        :return: candidates by identity
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        image_array = numpy.asarray(image)
+        self._move_deregistered_to_gallery(timestamp)
+        self.gallery.evict(timestamp)
+        known_candidates = {i: c for i, c in candidates.items()
+                            if i in self._identities}
+        self._update_embeddings(image_array, known_candidates)
+        self._register(image_array, candidates)
+        self._match_unconfirmed(candidates)
+        return {self._identities[i]: c for i, c in candidates.items()}
+
+    def is_registered(self, identity: int) -> bool:
+        return identity in self._identities.values()
+
+    def tracker_id(self, identity: int) -> Optional[int]:
+        """
+        :return: ID of the object tracker that is mapped to the identity or
+            None, if the identity is not registered
+        """
+        return next((tracker_id
+                     for tracker_id, i in self._identities.items()
+                     if i == identity),
+                    None)
+
+    def is_lost(self, identity: int) -> bool:
+        """
+        :return: whether the identity is in the gallery,
+            i.e. it might be re-identified
+        """
+        return identity in self.gallery
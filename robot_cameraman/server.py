@@ -9,6 +9,7 @@ from typing import Optional
 import PIL.Image
 from flask import Flask, Response, request, redirect, jsonify
 
+from robot_cameraman.box import Box
 from robot_cameraman.cameraman_mode_manager import CameramanModeManager
 from robot_cameraman.tracking import ZoomSpeed, CameraSpeeds
 from robot_cameraman.updatable_configuration import UpdatableConfiguration
@@ -148,6 +149,27 @@ def update_configuration():
     return '', 200
 
 
+@app.route('/api/tracking/region', methods=['PUT'])
+def select_tracking_region():
+    """
+    Select the region of the live view that should be tracked
+    (e.g. drawn by the user). The region is passed as list of coordinates
+    [x1, y1, x2, y2] in live view pixels.
+    """
+    global updatable_configuration
+    region = request.json
+    if not isinstance(region, list) or len(region) != 4:
+        return "Expected region as list [x1, y1, x2, y2]", 400
+    try:
+        box = Box.from_coordinate_iterable(map(float, region))
+    except (TypeError, ValueError):
+        return "Coordinates of region should be numbers", 400
+    logger.debug(f'select tracking region {region}')
+    if not updatable_configuration.select_tracking_region(box):
+        return "Detection engine does not support region selection", 409
+    return '', 200
+
+
 @app.route('/api/live-view/source', methods=['PUT'])
 def update_live_view_source():
     global server_image
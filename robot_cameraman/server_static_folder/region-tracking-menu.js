@@ -0,0 +1,133 @@
+import {putJson} from "./api.js";
+
+const template = document.createElement('template')
+template.innerHTML = `
+<style>
+    .status {
+        white-space: normal;
+    }
+</style>
+<div class="status">Draw a box around the target in the live view</div>
+`
+
+/**
+ * Draw a box on the live view to select the region,
+ * which is tracked by the 'CamShift' detection engine.
+ */
+class RegionTrackingMenu extends HTMLElement {
+  constructor() {
+    super().attachShadow({mode: 'open'});
+    this._start = null
+    this._selectionElement = null
+    this._onPointerDown = this._onPointerDown.bind(this)
+    this._onPointerMove = this._onPointerMove.bind(this)
+    this._onPointerUp = this._onPointerUp.bind(this)
+  }
+
+  connectedCallback() {
+    this.shadowRoot.append(template.content.cloneNode(true))
+    this._statusElement = this.shadowRoot.querySelector('.status')
+    this._liveViewElement = document.querySelector('.live-view')
+    // prevent that the browser drags the image or scrolls the page
+    this._liveViewElement.style.touchAction = 'none'
+    this._liveViewElement.draggable = false
+    this._liveViewElement.addEventListener('pointerdown', this._onPointerDown)
+    this._liveViewElement.addEventListener('pointermove', this._onPointerMove)
+    this._liveViewElement.addEventListener('pointerup', this._onPointerUp)
+  }
+
+  disconnectedCallback() {
+    this._liveViewElement.removeEventListener(
+      'pointerdown', this._onPointerDown)
+    this._liveViewElement.removeEventListener(
+      'pointermove', this._onPointerMove)
+    this._liveViewElement.removeEventListener('pointerup', this._onPointerUp)
+    this._liveViewElement.style.touchAction = ''
+    this._removeSelection()
+  }
+
+  _onPointerDown(event) {
+    event.preventDefault()
+    this._liveViewElement.setPointerCapture(event.pointerId)
+    this._start = {x: event.offsetX, y: event.offsetY}
+    this._removeSelection()
+    this._selectionElement = document.createElement('div')
+    Object.assign(this._selectionElement.style, {
+      position: 'absolute',
+      border: '2px dashed red',
+      pointerEvents: 'none',
+    })
+    this._liveViewElement.parentElement.append(this._selectionElement)
+    this._updateSelection(event)
+  }
+
+  _onPointerMove(event) {
+    if (this._start) {
+      this._updateSelection(event)
+    }
+  }
+
+  _onPointerUp(event) {
+    if (!this._start) {
+      return
+    }
+    const [x1, y1, x2, y2] = this._getRegion(event)
+    this._start = null
+    this._removeSelection()
+    const image = this._liveViewElement
+    // scale from displayed size to live view pixels
+    const scaleX = image.naturalWidth / image.clientWidth
+    const scaleY = image.naturalHeight / image.clientHeight
+    const region = [
+      Math.round(x1 * scaleX),
+      Math.round(y1 * scaleY),
+      Math.round(x2 * scaleX),
+      Math.round(y2 * scaleY),
+    ]
+    if (region[2] - region[0] < 2 || region[3] - region[1] < 2) {
+      this._statusElement.textContent = 'Box is too small'
+      return
+    }
+    putJson('/api/tracking/region', region)
+      .then(async response => {
+        this._statusElement.textContent = response.ok
+          ? `Selected region ${region.join(', ')}`
+          : await response.text()
+      })
+  }
+
+  /**
+   * @return {number[]} [x1, y1, x2, y2] in displayed image coordinates
+   * @private
+   */
+  _getRegion(event) {
+    const image = this._liveViewElement
+    const clamp = (value, max) => Math.min(Math.max(value, 0), max)
+    const x = clamp(event.offsetX, image.clientWidth)
+    const y = clamp(event.offsetY, image.clientHeight)
+    return [
+      Math.min(this._start.x, x),
+      Math.min(this._start.y, y),
+      Math.max(this._start.x, x),
+      Math.max(this._start.y, y),
+    ]
+  }
+
+  _updateSelection(event) {
+    const [x1, y1, x2, y2] = this._getRegion(event)
+    const image = this._liveViewElement
+    Object.assign(this._selectionElement.style, {
+      left: `${image.offsetLeft + x1}px`,
+      top: `${image.offsetTop + y1}px`,
+      width: `${x2 - x1}px`,
+      height: `${y2 - y1}px`,
+    })
+  }
+
+  _removeSelection() {
+    this._selectionElement?.remove()
+    this._selectionElement = null
+  }
+}
+
+customElements.define('x-region-tracking-menu', RegionTrackingMenu)
@@ -0,0 +1,142 @@
+from typing import List, Optional
+
+import numpy
+
+from robot_cameraman.geometry import areas, intersection_areas
+
+
+def intersection_over_min_area(coordinates: numpy.ndarray) -> numpy.ndarray:
+    """
+    Vectorized version of Box.percental_intersection_area for each pair
+    of boxes. Pairs with an empty box have a ratio of 0.
+    """
+    box_areas = areas(coordinates)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        ratios = intersection_areas(coordinates) / numpy.minimum.outer(
+            box_areas, box_areas)
+    return numpy.nan_to_num(ratios, nan=0.0, posinf=0.0)
+
+
+def intersection_over_union(coordinates: numpy.ndarray) -> numpy.ndarray:
+    """
+    Intersection over union of each pair of boxes. Pairs of empty boxes have
+    a ratio of 0.
+    """
+    box_areas = areas(coordinates)
+    intersections = intersection_areas(coordinates)
+    unions = numpy.add.outer(box_areas, box_areas) - intersections
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        ratios = intersections / unions
+    return numpy.nan_to_num(ratios, nan=0.0, posinf=0.0)
+
+
+def suppress_intersections(
+        coordinates: numpy.ndarray,
+        threshold: float = 0.3) -> numpy.ndarray:
+    """
+    If two boxes intersect by more than threshold (relative to the smaller
+    box), the smaller box is dropped. Boxes are processed in the given order
+    with the same (order-dependent) result as the former pairwise loop of
+    filter_intersections: a box is compared with all following boxes until
+    a larger one is found that it intersects with. Following boxes that are
+    not larger, but intersect, are dropped on the way.
+
+    The intersection ratios of all pairs are computed at once, but since the
+    result depends on the order, the boxes are still iterated one by one
+    (each comparison with all following boxes is vectorized).
+
+    :param coordinates: array of shape (N, 4) with x1, y1, x2, y2 of each box
+    :param threshold: maximum ratio of intersection and area of smaller box
+    :return: indices of kept boxes in ascending order
+    """
+    count = len(coordinates)
+    if count == 0:
+        return numpy.empty(0, dtype=int)
+    is_intersecting = intersection_over_min_area(coordinates) > threshold
+    box_areas = areas(coordinates)
+    is_excluded = numpy.zeros(count, dtype=bool)
+    for c in range(count - 1):
+        if is_excluded[c]:
+            continue
+        intersecting = is_intersecting[c, c + 1:]
+        is_larger = box_areas[c] < box_areas[c + 1:]
+        larger_intersecting = numpy.flatnonzero(intersecting & is_larger)
+        dropped = intersecting & ~is_larger
+        if len(larger_intersecting) > 0:
+            # comparison stops at the first larger box
+            end = larger_intersecting[0]
+            is_excluded[c] = True
+            dropped[end:] = False
+        is_excluded[c + 1:] |= dropped
+    return numpy.flatnonzero(~is_excluded)
+
+
+def non_maximum_suppression(
+        coordinates: numpy.ndarray,
+        scores: numpy.ndarray,
+        threshold: float = 0.5,
+        max_objects: Optional[int] = None) -> numpy.ndarray:
+    """
+    Greedy score-aware non-maximum suppression: boxes are selected from
+    highest to lowest score and all remaining boxes that have an intersection
+    over union greater than threshold with a selected box are dropped.
+
+    :return: indices of kept boxes sorted by score (highest to lowest)
+    """
+    order = numpy.argsort(-numpy.asarray(scores), kind='stable')
+    ious = intersection_over_union(coordinates)
+    is_suppressed = numpy.zeros(len(coordinates), dtype=bool)
+    kept: List[int] = []
+    for i in order.tolist():
+        if is_suppressed[i]:
+            continue
+        kept.append(i)
+        if max_objects is not None and len(kept) >= max_objects:
+            break
+        is_suppressed |= ious[i] > threshold
+    return numpy.asarray(kept, dtype=int)
+
+
+def _main():
+    """
+    Benchmark the vectorized intersection ratios of all pairs of boxes
+    against Box.percental_intersection_area, as well as filter_intersections
+    and non_maximum_suppression.
+    """
+    import timeit
+    from robot_cameraman.candidate_filter import filter_intersections
+    from robot_cameraman.image_detection import DetectionBatch
+
+    random = numpy.random.default_rng(0)
+    print(f"{'boxes':>5} {'Box pairs ms':>12} {'vectorized ms':>13}"
+          f" {'filter ms':>9} {'NMS ms':>6}")
+    for count in (10, 50, 200):
+        top_left = random.uniform((0, 0), (640, 480), size=(count, 2))
+        sizes = random.uniform(10, 150, size=(count, 2))
+        batch = DetectionBatch.from_arrays(
+            label_ids=0,
+            scores=random.uniform(0.5, 1, size=count),
+            coordinates=numpy.hstack((top_left, top_left + sizes)))
+        boxes = [c.bounding_box for c in batch.candidates()]
+        coordinates = batch.coordinates()
+        scores = batch.scores
+        number = 20
+        pairs = timeit.timeit(
+            lambda: [[b.percental_intersection_area(o) for o in boxes]
+                     for b in boxes],
+            number=number)
+        vectorized = timeit.timeit(
+            lambda: intersection_over_min_area(coordinates), number=number)
+        filtered = timeit.timeit(
+            lambda: filter_intersections(batch), number=number)
+        suppressed = timeit.timeit(
+            lambda: non_maximum_suppression(coordinates, scores),
+            number=number)
+        print(f"{count:>5} {pairs / number * 1000:12.3f}"
+              f" {vectorized / number * 1000:13.3f}"
+              f" {filtered / number * 1000:9.3f}"
+              f" {suppressed / number * 1000:6.3f}")
+
+
+if __name__ == '__main__':
+    _main()
@@ -4,12 +4,14 @@ from abc import abstractmethod
 from dataclasses import dataclass
 from enum import Enum, auto, IntEnum
 from logging import Logger
-from typing import Optional
+from typing import Optional, Callable, Tuple
 
 from typing_extensions import Protocol
 
+from robot_cameraman import geometry
 from robot_cameraman.box import Box, TwoPointsBox, Point
 from robot_cameraman.live_view import ImageSize
+from robot_cameraman.pid import PidGains, PidController
 
 logger: Logger = logging.getLogger(__name__)
 
@@ -207,7 +209,7 @@ class ConfigurableTrackingStrategy(SimpleTrackingStrategy):
             self._destination.center,
             self._image_size.width - 3 * target.width,
             self._image_size.height - 3 * target.height)
-        return slow_zoom_in_range.intersect(target).area() > 0
+        return geometry.intersection_area(slow_zoom_in_range, target) > 0
 
     def _update_zoom_speed(self, camera_speeds, target: Box):
         if target.height < self._destination.min_size_box.height:
@@ -266,6 +268,193 @@ class ConfigurableTrackingStrategy(SimpleTrackingStrategy):
         return speed
 
 
+class PredictiveTrackingStrategy(ConfigurableTrackingStrategy):
+    """
+    The target box is already outdated by the latency of the pipeline (live
+    view, detection, tracking) when the camera speeds are applied. Hence,
+    pan and tilt speed are computed from the position the target is predicted
+    to have at that time (based on its velocity in the image). Further, a
+    velocity feed-forward term is added to the speed by distance, so that the
+    camera keeps up with moving targets, instead of lagging behind.
+
+    The feed-forward term is based on the velocity of the target in the world,
+    i.e. its velocity in the image minus the velocity of static objects in the
+    image that is caused by the camera. Otherwise, the feed-forward term
+    would vanish as soon as the camera keeps up with the target. The velocity
+    of the target in the image is estimated by the tracker or the trajectory
+    of the target and passed to on_target_velocity before each update.
+    """
+    is_enabled: bool
+    latency: float
+    """Smoothed measured latency of the pipeline in seconds."""
+    actuation_delay: float
+    """Additional latency in seconds that is not measured (e.g. live view
+    stream and gimbal)."""
+    velocity_gain: float
+    """Seconds, i.e. a target that moves with a velocity of half the image
+    size per second causes a feed-forward speed of velocity_gain times the
+    max allowed speed."""
+
+    def __init__(
+            self,
+            destination: Destination,
+            image_size: ImageSize,
+            max_allowed_speed: float = 1000,
+            latency: float = 0.1,
+            actuation_delay: float = 0.05,
+            velocity_gain: float = 0.5,
+            latency_smoothing: float = 0.1,
+            camera_velocity:
+            Optional[Callable[[], Tuple[float, float]]] = None):
+        """
+        :param camera_velocity: returns the current velocity (pixels per
+            second) of static objects in the image that is caused by the
+            camera, e.g. EgoMotion.velocity. If it is not given, the camera
+            is assumed to be static.
+        """
+        super().__init__(destination, image_size, max_allowed_speed)
+        self.is_enabled = True
+        self.latency = latency
+        self.actuation_delay = actuation_delay
+        self.velocity_gain = velocity_gain
+        self._latency_smoothing = latency_smoothing
+        self._camera_velocity = camera_velocity
+        self._target_velocity: Optional[Point] = None
+
+    def on_pipeline_latency(self, latency: float) -> None:
+        self.latency += self._latency_smoothing * (latency - self.latency)
+
+    def on_target_velocity(self, velocity: Optional[Point]) -> None:
+        """
+        :param velocity: velocity of the target in the image (pixels per
+            second) or None, if it is unknown (e.g. the target is new)
+        """
+        self._target_velocity = velocity
+
+    def lead_time(self) -> float:
+        return self.latency + self.actuation_delay
+
+    def update(
+            self,
+            camera_speeds: CameraSpeeds,
+            target: Optional[Box],
+            is_target_lost: bool) -> None:
+        if target is None or is_target_lost:
+            return
+        if not self.is_enabled:
+            super().update(camera_speeds, target, is_target_lost)
+            return
+        tx, ty = target.center
+        vx, vy = 0.0, 0.0
+        world_vx, world_vy = 0.0, 0.0
+        if self._target_velocity is not None:
+            vx, vy = self._target_velocity
+            world_vx, world_vy = vx, vy
+            if self._camera_velocity is not None:
+                camera_vx, camera_vy = self._camera_velocity()
+                world_vx -= camera_vx
+                world_vy -= camera_vy
+        self._destination.update_size_box_center(tx, ty)
+        dx, dy = self._destination.center
+        lead_time = self.lead_time()
+        camera_speeds.pan_speed = self._get_predictive_speed(
+            tx + vx * lead_time, world_vx, dx, self._image_size.width)
+        camera_speeds.tilt_speed = self._get_predictive_speed(
+            ty + vy * lead_time, world_vy, dy, self._image_size.height)
+        self._update_zoom_speed(camera_speeds, target)
+
+    def _get_predictive_speed(
+            self,
+            predicted_target: float,
+            target_velocity: float,
+            destination: float,
+            size: int) -> float:
+        speed = self._get_speed_by_distance(
+            predicted_target, destination, size)
+        speed += (self.velocity_gain * target_velocity / (size / 2)
+                  * self.max_allowed_speed)
+        return max(-self.max_allowed_speed,
+                   min(self.max_allowed_speed, speed))
+
+
+class PidTrackingStrategy(ConfigurableTrackingStrategy):
+    """
+    Pan and tilt speed are controlled by PID controllers based on the distance
+    of the target to the destination (relative to half the image size).
+    Gains are divided by the zoom ratio, since the same distance in pixels
+    corresponds to a smaller angle when zoomed in. The integral does not wind
+    up, while the speed is limited by max_allowed_speed or the acceleration
+    of the speed managers.
+    """
+
+    def __init__(
+            self,
+            destination: Destination,
+            image_size: ImageSize,
+            pan_gains: PidGains,
+            tilt_gains: PidGains,
+            pan_acceleration: Optional[Callable[[], float]] = None,
+            tilt_acceleration: Optional[Callable[[], float]] = None,
+            max_allowed_speed: float = 1000,
+            derivative_time_constant: float = 0.1):
+        """
+        :param pan_acceleration: returns the current maximum acceleration
+            (speed per second) of the pan axis, e.g. of a SpeedManager
+        :param tilt_acceleration: see pan_acceleration
+        """
+        super().__init__(destination, image_size, max_allowed_speed)
+        self.zoom_ratio = 1.0
+        self._pan_acceleration = pan_acceleration
+        self._tilt_acceleration = tilt_acceleration
+        self._pan_controller = PidController(
+            pan_gains, max_allowed_speed, derivative_time_constant)
+        self._tilt_controller = PidController(
+            tilt_gains, max_allowed_speed, derivative_time_constant)
+        self._last_update_time: Optional[float] = None
+
+    def on_zoom_ratio(self, zoom_ratio: float) -> None:
+        self.zoom_ratio = zoom_ratio
+
+    def update(
+            self,
+            camera_speeds: CameraSpeeds,
+            target: Optional[Box],
+            is_target_lost: bool) -> None:
+        if target is None or is_target_lost:
+            self._pan_controller.reset()
+            self._tilt_controller.reset()
+            self._last_update_time = None
+            return
+        current_time = time.time()
+        elapsed_time = (0.0 if self._last_update_time is None
+                        else current_time - self._last_update_time)
+        self._last_update_time = current_time
+        tx, ty = target.center
+        self._destination.update_size_box_center(tx, ty)
+        dx, dy = self._destination.center
+        camera_speeds.pan_speed = self._get_pid_speed(
+            self._pan_controller, self._pan_acceleration,
+            tx - dx, self._image_size.width, elapsed_time)
+        camera_speeds.tilt_speed = self._get_pid_speed(
+            self._tilt_controller, self._tilt_acceleration,
+            ty - dy, self._image_size.height, elapsed_time)
+        self._update_zoom_speed(camera_speeds, target)
+
+    def _get_pid_speed(
+            self,
+            controller: PidController,
+            acceleration: Optional[Callable[[], float]],
+            distance: float,
+            size: int,
+            elapsed_time: float) -> float:
+        controller.output_limit = self.max_allowed_speed
+        return controller.update(
+            distance / (size / 2),
+            elapsed_time,
+            max_output_change=None if acceleration is None else acceleration(),
+            gain_factor=1 / self.zoom_ratio)
+
+
 class StopIfLostTrackingStrategy(TrackingStrategy):
     _destination: Destination
     _trackingStrategy: TrackingStrategy
@@ -369,6 +558,39 @@ class ConfigurableTrackingStrategyUi:
         pass
 
 
+class PredictiveTrackingStrategyUi:
+
+    def __init__(
+            self,
+            tracking_strategy: PredictiveTrackingStrategy,
+            window_title: str = 'Robot Cameraman') -> None:
+        self._tracking_strategy = tracking_strategy
+        self._window_title = window_title
+
+    def _on_actuation_delay_change(self, value: int) -> None:
+        self._tracking_strategy.actuation_delay = value / 1000
+
+    def _on_velocity_gain_change(self, value: int) -> None:
+        self._tracking_strategy.velocity_gain = value / 100
+
+    def open(self) -> None:
+        import cv2
+        from robot_cameraman.ui import create_attribute_checkbox
+        create_attribute_checkbox(
+            'Predictive Tracking', self._tracking_strategy, 'is_enabled')
+        cv2.createTrackbar(
+            'Actuation Delay (ms)', self._window_title,
+            int(self._tracking_strategy.actuation_delay * 1000), 1000,
+            self._on_actuation_delay_change)
+        cv2.createTrackbar(
+            'Velocity Gain (%)', self._window_title,
+            int(self._tracking_strategy.velocity_gain * 100), 200,
+            self._on_velocity_gain_change)
+
+    def update(self) -> None:
+        pass
+
+
 class SearchTargetStrategy(Protocol):
     @abstractmethod
     def update(self, camera_speeds: CameraSpeeds) -> None:
@@ -0,0 +1,163 @@
+import csv
+import logging
+import time
+from logging import Logger
+from typing import Dict, Optional, Tuple, TextIO, Iterator
+
+import numpy
+
+from robot_cameraman.image_detection import DetectionCandidate
+
+logger: Logger = logging.getLogger(__name__)
+
+
+class TrajectoryRingBuffer:
+    """
+    Fixed-capacity trajectory of a tracked object. Each sample consists of
+    timestamp, center (x, y), width, height and score. Appending is O(1) and
+    overwrites the oldest sample, if the buffer is full. Hence, memory is
+    bounded, even if an object is tracked all day.
+    """
+
+    FIELDS = ('timestamp', 'x', 'y', 'width', 'height', 'score')
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.capacity = capacity
+        self._samples = numpy.zeros((capacity, len(self.FIELDS)))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(
+            self,
+            timestamp: float,
+            x: float,
+            y: float,
+            width: float,
+            height: float,
+            score: float) -> None:
+        self._samples[self._next] = (timestamp, x, y, width, height, score)
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def append_candidate(
+            self,
+            timestamp: float,
+            candidate: DetectionCandidate) -> None:
+        box = candidate.bounding_box
+        self.append(timestamp, box.x + box.width / 2, box.y + box.height / 2,
+                    box.width, box.height, candidate.score)
+
+    def recent(self, count: Optional[int] = None) -> numpy.ndarray:
+        """
+        :param count: maximum number of samples (defaults to all)
+        :return: array of shape (N, 6) with the most recent samples
+            in chronological order (see FIELDS)
+        """
+        if count is None or count > self._count:
+            count = self._count
+        indices = numpy.arange(self._next - count, self._next) % self.capacity
+        return self._samples[indices]
+
+    def latest(self) -> Optional[numpy.ndarray]:
+        if self._count == 0:
+            return None
+        return self._samples[self._next - 1]
+
+    def _fit(self, degree: int, window: int) -> Optional[numpy.ndarray]:
+        """
+        Fit polynomials of the given degree to x and y of the recent samples.
+
+        :return: coefficients of shape (degree + 1, 2), highest degree first
+        """
+        samples = self.recent(window)
+        if len(samples) <= degree:
+            return None
+        timestamps = samples[:, 0] - samples[-1, 0]
+        if numpy.ptp(timestamps) == 0:
+            return None
+        return numpy.polyfit(timestamps, samples[:, 1:3], degree)
+
+    def velocity(self, window: int = 5) -> Optional[Tuple[float, float]]:
+        """
+        Estimate the current velocity of the center (pixels per second) by
+        a linear least squares fit of the recent samples.
+        """
+        coefficients = self._fit(1, window)
+        if coefficients is None:
+            return None
+        vx, vy = coefficients[0].tolist()
+        return vx, vy
+
+    def acceleration(self, window: int = 10) \
+            -> Optional[Tuple[float, float]]:
+        """
+        Estimate the current acceleration of the center (pixels per second²)
+        by a quadratic least squares fit of the recent samples.
+        """
+        coefficients = self._fit(2, window)
+        if coefficients is None:
+            return None
+        ax, ay = (2 * coefficients[0]).tolist()
+        return ax, ay
+
+
+class Trajectories:
+    """
+    Trajectories of tracked objects by ID. Trajectories of objects that have
+    not been updated for max_age seconds are removed.
+
+    If a log file is given, each sample is written as CSV row.
+    """
+
+    def __init__(
+            self,
+            capacity: int = 64,
+            max_age: float = 10.0,
+            log: Optional[TextIO] = None) -> None:
+        self.capacity = capacity
+        self.max_age = max_age
+        self._trajectories: Dict[int, TrajectoryRingBuffer] = {}
+        self._csv_writer = None
+        if log is not None:
+            self._csv_writer = csv.writer(log)
+            self._csv_writer.writerow(('id',) + TrajectoryRingBuffer.FIELDS)
+
+    def __contains__(self, object_id: int) -> bool:
+        return object_id in self._trajectories
+
+    def __getitem__(self, object_id: int) -> TrajectoryRingBuffer:
+        return self._trajectories[object_id]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._trajectories)
+
+    def __len__(self) -> int:
+        return len(self._trajectories)
+
+    def get(self, object_id: int) -> Optional[TrajectoryRingBuffer]:
+        return self._trajectories.get(object_id)
+
+    def update(
+            self,
+            candidates: Dict[int, DetectionCandidate],
+            timestamp: Optional[float] = None) -> None:
+        if timestamp is None:
+            timestamp = time.time()
+        for object_id, candidate in candidates.items():
+            trajectory = self._trajectories.get(object_id)
+            if trajectory is None:
+                trajectory = TrajectoryRingBuffer(self.capacity)
+                self._trajectories[object_id] = trajectory
+            trajectory.append_candidate(timestamp, candidate)
+            if self._csv_writer is not None:
+                self._csv_writer.writerow(
+                    (object_id, *trajectory.latest().tolist()))
+        expired = [object_id
+                   for object_id, trajectory in self._trajectories.items()
+                   if timestamp - trajectory.latest()[0] > self.max_age]
+        for object_id in expired:
+            logger.debug(f'remove trajectory of {object_id}')
+            del self._trajectories[object_id]
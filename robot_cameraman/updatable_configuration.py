@@ -1,9 +1,12 @@
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Iterator
 
+from robot_cameraman.box import Box
 from robot_cameraman.configuration import read_configuration_file
+from robot_cameraman.detection_engine.cam_shift import CamShiftDetectionEngine
 from robot_cameraman.detection_engine.color import ColorDetectionEngine
-from robot_cameraman.image_detection import DetectionEngine
+from robot_cameraman.image_detection import DetectionEngine, \
+    FusedDetectionEngine
 
 
 class UpdatableConfiguration:
@@ -15,14 +18,34 @@ class UpdatableConfiguration:
         self.configuration_file = configuration_file
         self.configuration = read_configuration_file(configuration_file)
 
+    def _detection_engines(self) -> Iterator[DetectionEngine]:
+        """
+        Yield the detection engine and the engines that are wrapped by it
+        (e.g. if the candidates of the camera are fused).
+        """
+        yield self.detection_engine
+        if isinstance(self.detection_engine, FusedDetectionEngine):
+            yield from self.detection_engine.engines
+
     def update_tracking_color(
             self,
             min_hsv: Optional[List[int]] = None,
             max_hsv: Optional[List[int]] = None):
-        if isinstance(self.detection_engine, ColorDetectionEngine):
-            if min_hsv is not None:
-                self.detection_engine.min_hsv[:] = min_hsv
-                self.configuration['tracking']['color']['min_hsv'] = min_hsv
-            if max_hsv is not None:
-                self.detection_engine.max_hsv[:] = max_hsv
-                self.configuration['tracking']['color']['max_hsv'] = max_hsv
+        for engine in self._detection_engines():
+            if isinstance(engine, ColorDetectionEngine):
+                if min_hsv is not None:
+                    engine.min_hsv[:] = min_hsv
+                    self.configuration['tracking']['color']['min_hsv'] = \
+                        min_hsv
+                if max_hsv is not None:
+                    engine.max_hsv[:] = max_hsv
+                    self.configuration['tracking']['color']['max_hsv'] = \
+                        max_hsv
+
+    def select_tracking_region(self, region: Box) -> bool:
+        is_selected = False
+        for engine in self._detection_engines():
+            if isinstance(engine, CamShiftDetectionEngine):
+                engine.select_region(region)
+                is_selected = True
+        return is_selected
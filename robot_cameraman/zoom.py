@@ -0,0 +1,208 @@
+import logging
+import math
+import time
+from logging import Logger
+from typing import Optional, Dict
+
+from robot_cameraman.box import Box
+from robot_cameraman.tracking import TrackingStrategy, CameraSpeeds, \
+    ZoomSpeed, Destination
+
+logger: Logger = logging.getLogger(__name__)
+
+
+class ZoomVelocityEstimator:
+    """
+    Measure how fast the zoom ratio of the camera changes at each zoom speed.
+    Velocities are measured in log zoom ratio per second, since an optical
+    zoom changes the zoom ratio by a constant factor per second.
+
+    The zoom ratio is reported in steps (e.g. of 0.1x). Hence, the velocity is
+    measured over segments of at least min_duration seconds, in which the
+    zoom speed has not changed. Segments without any change of the zoom ratio
+    are ignored (e.g. the zoom limit of the camera is reached).
+    """
+
+    def __init__(
+            self,
+            initial_velocities: Optional[Dict[ZoomSpeed, float]] = None,
+            min_duration: float = 0.5,
+            smoothing: float = 0.3) -> None:
+        self._velocities: Dict[ZoomSpeed, float] = {
+            ZoomSpeed.ZOOM_OUT_FAST: -0.6,
+            ZoomSpeed.ZOOM_OUT_SLOW: -0.2,
+            ZoomSpeed.ZOOM_STOPPED: 0.0,
+            ZoomSpeed.ZOOM_IN_SLOW: 0.2,
+            ZoomSpeed.ZOOM_IN_FAST: 0.6,
+        }
+        if initial_velocities is not None:
+            self._velocities.update(initial_velocities)
+        self.min_duration = min_duration
+        self.smoothing = smoothing
+        self._zoom_speed = ZoomSpeed.ZOOM_STOPPED
+        self._segment_start: Optional[float] = None
+        self._segment_zoom_ratio: Optional[float] = None
+        self._zoom_ratio: Optional[float] = None
+
+    def velocity(self, zoom_speed: ZoomSpeed) -> float:
+        return self._velocities[zoom_speed]
+
+    def on_zoom_speed(self, zoom_speed: ZoomSpeed, timestamp: float) -> None:
+        if zoom_speed is self._zoom_speed:
+            return
+        self._zoom_speed = zoom_speed
+        # the zoom is accelerated/decelerated after a change of the speed
+        self._segment_start = timestamp
+        self._segment_zoom_ratio = self._zoom_ratio
+
+    def on_zoom_ratio(self, zoom_ratio: float, timestamp: float) -> None:
+        self._zoom_ratio = zoom_ratio
+        if self._segment_start is None or self._segment_zoom_ratio is None:
+            self._segment_start = timestamp
+            self._segment_zoom_ratio = zoom_ratio
+            return
+        duration = timestamp - self._segment_start
+        if duration < self.min_duration:
+            return
+        if (self._zoom_speed is not ZoomSpeed.ZOOM_STOPPED
+                and zoom_ratio != self._segment_zoom_ratio):
+            velocity = (math.log(zoom_ratio)
+                        - math.log(self._segment_zoom_ratio)) / duration
+            previous = self._velocities[self._zoom_speed]
+            self._velocities[self._zoom_speed] = \
+                previous + self.smoothing * (velocity - previous)
+            logger.debug(f'zoom velocity of {self._zoom_speed.name}:'
+                         f' {self._velocities[self._zoom_speed]}')
+        self._segment_start = timestamp
+        self._segment_zoom_ratio = zoom_ratio
+
+
+class ClosedLoopZoomController:
+    """
+    Compute the zoom ratio that frames the target with the desired height and
+    choose the zoom speed to reach it.
+
+    The target is assumed to stay at the same distance to the camera while
+    zooming. Then its height in the image is proportional to the zoom ratio,
+    i.e. zoom ratio / height is proportional to the distance of the target.
+    This (smoothed) distance estimate determines the zoom ratio at which the
+    target has the desired height.
+
+    Zooming starts, if the required change of the zoom ratio exceeds
+    tolerance (relative). Fast zoom is used, while the remaining change takes
+    more than fast_zoom_time seconds at slow speed. Zooming stops early by the
+    change that occurs during stop_delay seconds at the measured zoom velocity,
+    so that the zoom does not overshoot and hunt.
+    """
+
+    def __init__(
+            self,
+            velocity_estimator: Optional[ZoomVelocityEstimator] = None,
+            min_zoom_ratio: float = 1.0,
+            max_zoom_ratio: float = 30.0,
+            tolerance: float = 0.1,
+            fast_zoom_time: float = 1.0,
+            stop_delay: float = 0.3,
+            distance_smoothing: float = 0.3) -> None:
+        if velocity_estimator is None:
+            velocity_estimator = ZoomVelocityEstimator()
+        self.velocity_estimator = velocity_estimator
+        self.min_zoom_ratio = min_zoom_ratio
+        self.max_zoom_ratio = max_zoom_ratio
+        self.tolerance = tolerance
+        self.fast_zoom_time = fast_zoom_time
+        self.stop_delay = stop_delay
+        self.distance_smoothing = distance_smoothing
+        self.zoom_ratio: Optional[float] = None
+        self.target_zoom_ratio: Optional[float] = None
+        self._distance: Optional[float] = None
+        self._zoom_speed = ZoomSpeed.ZOOM_STOPPED
+
+    def on_zoom_ratio(self, zoom_ratio: float) -> None:
+        self.zoom_ratio = zoom_ratio
+        self.velocity_estimator.on_zoom_ratio(zoom_ratio, time.time())
+
+    def reset(self) -> None:
+        self._distance = None
+        self.target_zoom_ratio = None
+        self._set_zoom_speed(ZoomSpeed.ZOOM_STOPPED)
+
+    def _set_zoom_speed(self, zoom_speed: ZoomSpeed) -> ZoomSpeed:
+        self._zoom_speed = zoom_speed
+        self.velocity_estimator.on_zoom_speed(zoom_speed, time.time())
+        return zoom_speed
+
+    def _estimate_distance(self, target_height: float) -> float:
+        distance = self.zoom_ratio / target_height
+        if self._distance is None:
+            self._distance = distance
+        else:
+            self._distance += self.distance_smoothing * (distance
+                                                         - self._distance)
+        return self._distance
+
+    def zoom_speed(self, target_height: float, desired_height: float) \
+            -> Optional[ZoomSpeed]:
+        """
+        :return: zoom speed or None, if the zoom ratio is unknown
+        """
+        if self.zoom_ratio is None or target_height <= 0:
+            return None
+        distance = self._estimate_distance(target_height)
+        self.target_zoom_ratio = max(self.min_zoom_ratio,
+                                     min(self.max_zoom_ratio,
+                                         distance * desired_height))
+        error = math.log(self.target_zoom_ratio) - math.log(self.zoom_ratio)
+        velocity_estimator = self.velocity_estimator
+        if self._zoom_speed is ZoomSpeed.ZOOM_STOPPED:
+            if abs(error) <= math.log(1 + self.tolerance):
+                return self._zoom_speed
+        elif (error * velocity_estimator.velocity(self._zoom_speed) <= 0
+              or abs(error) <= abs(velocity_estimator.velocity(
+                    self._zoom_speed)) * self.stop_delay):
+            # target zoom ratio is reached by the time the zoom stops
+            return self._set_zoom_speed(ZoomSpeed.ZOOM_STOPPED)
+        if error > 0:
+            slow, fast = ZoomSpeed.ZOOM_IN_SLOW, ZoomSpeed.ZOOM_IN_FAST
+        else:
+            slow, fast = ZoomSpeed.ZOOM_OUT_SLOW, ZoomSpeed.ZOOM_OUT_FAST
+        slow_velocity = abs(velocity_estimator.velocity(slow))
+        if abs(error) > slow_velocity * self.fast_zoom_time:
+            return self._set_zoom_speed(fast)
+        return self._set_zoom_speed(slow)
+
+
+class ClosedLoopZoomTrackingStrategy(TrackingStrategy):
+    """
+    Decorates a tracking strategy: pan and tilt speed are computed by the
+    decorated strategy, but the zoom speed is chosen by a closed loop zoom
+    controller, which frames the target with a height between the min and max
+    size box of the destination. If the zoom ratio is unknown (e.g. the live
+    view does not report it), the zoom speed of the decorated strategy is
+    used.
+    """
+
+    def __init__(
+            self,
+            destination: Destination,
+            tracking_strategy: TrackingStrategy,
+            zoom_controller: ClosedLoopZoomController) -> None:
+        self._destination = destination
+        self._tracking_strategy = tracking_strategy
+        self.zoom_controller = zoom_controller
+
+    def update(
+            self,
+            camera_speeds: CameraSpeeds,
+            target: Optional[Box],
+            is_target_lost: bool) -> None:
+        self._tracking_strategy.update(camera_speeds, target, is_target_lost)
+        if target is None or is_target_lost:
+            self.zoom_controller.reset()
+            return
+        desired_height = (self._destination.min_size_box.height
+                          + self._destination.max_size_box.height) / 2
+        zoom_speed = self.zoom_controller.zoom_speed(target.height,
+                                                     desired_height)
+        if zoom_speed is not None:
+            camera_speeds.zoom_speed = zoom_speed
@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from logging import Logger
+from typing import Optional, Callable
+
+from panasonic_camera.camera import PanasonicCamera
+from panasonic_camera.camera_manager import PanasonicCameraManager
+from robot_cameraman.tracking import ZoomSpeed
+
+logger: Logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ZoomCommandStatistics:
+    sent: int = 0
+    failed: int = 0
+    superseded: int = 0
+    """Commands that have been replaced by a newer command before they have
+    been sent."""
+    last_round_trip_time: float = 0.0
+    mean_round_trip_time: float = 0.0
+    """Exponential moving average of the round trip time in seconds."""
+    max_round_trip_time: float = 0.0
+
+
+def send_zoom_command(camera: PanasonicCamera, zoom_speed: ZoomSpeed) -> None:
+    if zoom_speed is ZoomSpeed.ZOOM_IN_FAST:
+        logger.debug('zoom in fast')
+        camera.zoom_in_fast()
+    elif zoom_speed is ZoomSpeed.ZOOM_IN_SLOW:
+        logger.debug('zoom in slow')
+        camera.zoom_in_fast()
+    elif zoom_speed is ZoomSpeed.ZOOM_STOPPED:
+        logger.debug('zoom stop')
+        camera.zoom_stop()
+    elif zoom_speed is ZoomSpeed.ZOOM_OUT_SLOW:
+        logger.debug('zoom out slow')
+        camera.zoom_out_slow()
+    elif zoom_speed is ZoomSpeed.ZOOM_OUT_FAST:
+        logger.debug('zoom out fast')
+        camera.zoom_out_fast()
+
+
+class ZoomCommandWorker(threading.Thread):
+    """
+    Send zoom commands to the camera in a separate thread, since a request to
+    the web server of the camera may take seconds (e.g. if the connection is
+    bad), which must not block the control of the gimbal.
+
+    Commands are passed through a mailbox of size one: a command that has not
+    been sent yet is replaced by a newer command (latest wins). A pending stop
+    command is never replaced, but sent before the newer command. Commands
+    that equal the last successfully sent command are ignored. Hence, a
+    command can be submitted in each update, which retries failed commands.
+    """
+
+    def __init__(
+            self,
+            camera_manager: PanasonicCameraManager,
+            send: Callable[[PanasonicCamera, ZoomSpeed], None]
+            = send_zoom_command,
+            smoothing: float = 0.1) -> None:
+        super().__init__(name='ZoomCommandWorker', daemon=True)
+        self._camera_manager = camera_manager
+        self._send = send
+        self._smoothing = smoothing
+        self._condition = threading.Condition()
+        self._is_stop_pending = False
+        self._pending: Optional[ZoomSpeed] = None
+        self._last_sent: Optional[ZoomSpeed] = None
+        self._in_flight: Optional[ZoomSpeed] = None
+        self._is_cancelled = False
+        self._statistics = ZoomCommandStatistics()
+
+    def _current(self) -> Optional[ZoomSpeed]:
+        if self._in_flight is not None:
+            return self._in_flight
+        return self._last_sent
+
+    def submit(self, zoom_speed: ZoomSpeed) -> None:
+        with self._condition:
+            if self._pending is not None and self._pending != zoom_speed:
+                self._statistics.superseded += 1
+            if zoom_speed is ZoomSpeed.ZOOM_STOPPED:
+                self._pending = None
+                if self._current() is not ZoomSpeed.ZOOM_STOPPED:
+                    self._is_stop_pending = True
+            elif (zoom_speed == self._current()
+                  and not self._is_stop_pending):
+                self._pending = None
+            else:
+                self._pending = zoom_speed
+            self._condition.notify()
+
+    def statistics(self) -> ZoomCommandStatistics:
+        with self._condition:
+            return replace(self._statistics)
+
+    def cancel(self) -> None:
+        """
+        Stop the worker after the pending commands have been sent.
+        """
+        with self._condition:
+            self._is_cancelled = True
+            self._condition.notify()
+
+    def _take(self) -> Optional[ZoomSpeed]:
+        with self._condition:
+            while (not self._is_stop_pending and self._pending is None
+                   and not self._is_cancelled):
+                self._condition.wait()
+            if self._is_stop_pending:
+                self._is_stop_pending = False
+                self._in_flight = ZoomSpeed.ZOOM_STOPPED
+            else:
+                self._in_flight = self._pending
+                self._pending = None
+            return self._in_flight
+
+    def _on_sent(self, zoom_speed: ZoomSpeed, round_trip_time: float) -> None:
+        with self._condition:
+            statistics = self._statistics
+            statistics.sent += 1
+            statistics.last_round_trip_time = round_trip_time
+            statistics.max_round_trip_time = max(
+                statistics.max_round_trip_time, round_trip_time)
+            if statistics.sent == 1:
+                statistics.mean_round_trip_time = round_trip_time
+            else:
+                statistics.mean_round_trip_time += self._smoothing * (
+                        round_trip_time - statistics.mean_round_trip_time)
+            self._last_sent = zoom_speed
+            self._in_flight = None
+
+    def _on_failed(self) -> None:
+        with self._condition:
+            self._statistics.failed += 1
+            # state of the camera is unknown
+            self._last_sent = None
+            self._in_flight = None
+
+    def run(self) -> None:
+        while True:
+            zoom_speed = self._take()
+            if zoom_speed is None:
+                # cancelled and no pending commands
+                return
+            camera = self._camera_manager.camera
+            if camera is None:
+                logger.debug(f'no camera to send {zoom_speed.name}')
+                with self._condition:
+                    self._in_flight = None
+                continue
+            start = time.time()
+            try:
+                self._send(camera, zoom_speed)
+            except Exception as e:
+                logger.error('failed to zoom camera: %s', e)
+                self._on_failed()
+            else:
+                round_trip_time = time.time() - start
+                logger.debug(f'sent {zoom_speed.name}'
+                             f' in {round_trip_time * 1000:.0f} ms')
+                self._on_sent(zoom_speed, round_trip_time)
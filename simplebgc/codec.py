@@ -0,0 +1,155 @@
+import struct
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Union
+
+from simplebgc.command_ids import *
+from simplebgc.commands import *
+
+START_CHARACTER = ord('>')
+HEADER_STRUCT = struct.Struct('<BBBB')
+"""start character, command ID, payload size and header checksum"""
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class PayloadCodec:
+    """
+    Precompiled struct of a command payload. Payloads are unpacked as the
+    NamedTuple of the command. Since struct.unpack_from is used, the payload
+    may be a memoryview (e.g. of a receive buffer) and it may be longer than
+    the struct (e.g. if newer firmware appends fields).
+    """
+
+    def __init__(self, payload_format: str, factory: Callable[..., Any]) \
+            -> None:
+        self.struct = struct.Struct(payload_format)
+        # noinspection PyProtectedMember
+        self._make = factory._make
+
+    @property
+    def size(self) -> int:
+        return self.struct.size
+
+    def unpack(self, payload: Buffer, offset: int = 0):
+        return self._make(self.struct.unpack_from(payload, offset))
+
+    def pack(self, values: Iterable) -> bytes:
+        return self.struct.pack(*values)
+
+
+INCOMING_CODECS: Dict[int, PayloadCodec] = {
+    CMD_BOARD_INFO: PayloadCodec('<BHBHBI7s', BoardInfoInCmd),
+    CMD_BOARD_INFO_3: PayloadCodec('<9s12sIHHHHHBB32s', BoardInfo3InCmd),
+    CMD_READ_PARAMS_3: PayloadCodec(
+        '<BBBBBBBBBBBBBBBBBBBBbbhhBBBBhhBBBBhhBBBBBBBBbbbBBBBBBBBBBBBBBbbbbbbb'
+        'BBBBBBBBBBBBBBBBBhhhBBBBBBBBBBhhhBBBBBBBBBBBBHHBBBBB',
+        ReadParams3InCmd),
+    CMD_READ_PARAMS_EXT: PayloadCodec(
+        '<BBBBBBBHHHBBBhhhhhhBBBBBBBBB2sBBBBHHHbbbbbbbbbbbbbbbBHHHBBBBBBBBBBBB'
+        'bbBbHBBB',
+        ReadParamsExtInCmd),
+    CMD_READ_PARAMS_EXT2: PayloadCodec(
+        '<BBBBB4sBBBB4sHHHBBBBBBBBBhhhhhhHBBhHHBHHHBBBBBBBBBBBBbBBBBBBBBBBBBb'
+        'bbbbbbbBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBHBBBBBBBBBBBHb',
+        ReadParamsExt2InCmd),
+    CMD_READ_PARAMS_EXT3: PayloadCodec('<', ReadParamsExt3InCmd),
+    CMD_REALTIME_DATA_3: PayloadCodec(
+        '<hhhhhhHHB3shhhhhhhhhhhhhhhHHBHBBBBBB', RealtimeData3InCmd),
+    CMD_REALTIME_DATA_4: PayloadCodec(
+        '<hhhhhhHHB3shhhhhhhhhhhhhhhHHBHBBBBBBhhh1shhhHhhhbbBBhhh30s',
+        RealtimeData4InCmd),
+    CMD_CONFIRM: PayloadCodec('<', ConfirmInCmd),
+    CMD_ERROR: PayloadCodec('<', ErrorInCmd),
+    CMD_GET_ANGLES: PayloadCodec('<9h', GetAnglesInCmd),
+    CMD_GET_ANGLES_EXT: PayloadCodec('<', GetAnglesExtInCmd),
+}
+"""Codecs of incoming commands by command ID"""
+
+OUTGOING_CODECS: Dict[int, PayloadCodec] = {
+    CMD_CONTROL: PayloadCodec(CONTROL_OUT_FORMAT, ControlOutCmd),
+}
+"""Codecs of outgoing commands by command ID. Incoming and outgoing
+commands may have the same ID (e.g. CMD_CONFIRM and CMD_CONTROL)."""
+
+
+@lru_cache(maxsize=None)
+def message_struct(payload_size: int) -> struct.Struct:
+    """
+    :return: precompiled struct of a whole message with the given payload
+        size (see Message)
+    """
+    return struct.Struct(f'<BBBB{payload_size}sB')
+
+
+def encode_message(command_id: int, payload: bytes = b'') -> bytes:
+    payload_size = len(payload)
+    return message_struct(payload_size).pack(
+        START_CHARACTER, command_id, payload_size,
+        (command_id + payload_size) & 0xFF, payload, sum(payload) & 0xFF)
+
+
+def _main():
+    """
+    Compare the time to pack control messages and unpack incoming payloads
+    with format strings (as before) and precompiled codecs. Packing into a
+    reusable buffer is measured, too, but it is slower in CPython, since
+    summing the payload in the buffer costs more than creating a new bytes
+    object.
+    """
+    import timeit
+
+    control = ControlOutCmd(1, 1, 1, 100, 0, -100, 0, 200, 0)
+    control_codec = OUTGOING_CODECS[CMD_CONTROL]
+    control_message_struct = struct.Struct(
+        HEADER_STRUCT.format + control_codec.struct.format[1:])
+    buffer = bytearray(message_struct(control_codec.size).size)
+    view = memoryview(buffer)
+    angles_payload = bytes(18)
+    realtime_data_payload = bytes(124)
+    angles_codec = INCOMING_CODECS[CMD_GET_ANGLES]
+    realtime_data_codec = INCOMING_CODECS[CMD_REALTIME_DATA_4]
+
+    def pack_control_with_format_strings():
+        payload = struct.pack('<BBBhhhhhh', *control)
+        size = len(payload)
+        return struct.pack('<BBBB{}sB'.format(size), ord('>'), CMD_CONTROL,
+                           size, (CMD_CONTROL + size) % 256, payload,
+                           sum(payload) % 256)
+
+    def pack_control_with_codec():
+        return encode_message(CMD_CONTROL, control_codec.pack(control))
+
+    def pack_control_into_buffer():
+        size = control_codec.size
+        control_message_struct.pack_into(
+            buffer, 0, START_CHARACTER, CMD_CONTROL, size,
+            (CMD_CONTROL + size) & 0xFF, *control)
+        buffer[-1] = sum(buffer[HEADER_STRUCT.size:-1]) & 0xFF
+        return view
+
+    assert bytes(pack_control_into_buffer()) \
+        == pack_control_with_codec() \
+        == pack_control_with_format_strings()
+    benchmarks = [
+        ('pack control (format strings)', pack_control_with_format_strings),
+        ('pack control (codec)', pack_control_with_codec),
+        ('pack control (reusable buffer)', pack_control_into_buffer),
+        ('unpack angles (format string)',
+         lambda: GetAnglesInCmd._make(struct.unpack('<9h', angles_payload))),
+        ('unpack angles (codec)',
+         lambda: angles_codec.unpack(angles_payload)),
+        ('unpack realtime data 4 (format string)',
+         lambda: RealtimeData4InCmd._make(struct.unpack(
+             '<hhhhhhHHB3shhhhhhhhhhhhhhhHHBHBBBBBBhhh1shhhHhhhbbBBhhh30s',
+             realtime_data_payload))),
+        ('unpack realtime data 4 (codec)',
+         lambda: realtime_data_codec.unpack(realtime_data_payload)),
+    ]
+    number = 100000
+    for name, function in benchmarks:
+        duration = min(timeit.repeat(function, number=number, repeat=5))
+        print(f'{name:>40}: {duration / number * 1e9:6.0f} ns')
+
+
+if __name__ == '__main__':
+    _main()
@@ -1,6 +1,6 @@
-import struct
 from typing import Optional
 
+from simplebgc.codec import INCOMING_CODECS
 from simplebgc.command_ids import *
 from simplebgc.commands import *
 
@@ -45,63 +45,51 @@ from simplebgc.commands import *
 
 
 def parse_board_info_cmd(payload: bytes) -> BoardInfoInCmd:
-    # noinspection PyProtectedMember
-    return BoardInfoInCmd._make(struct.unpack('<BHBHBI7s', payload))
+    return INCOMING_CODECS[CMD_BOARD_INFO].unpack(payload)
 
 
 def parse_board_info_3_cmd(payload: bytes) -> BoardInfo3InCmd:
-    # noinspection PyProtectedMember
-    return BoardInfo3InCmd._make(struct.unpack('<9s12sIHHHHHBB32s', payload))
+    return INCOMING_CODECS[CMD_BOARD_INFO_3].unpack(payload)
 
 
 def parse_read_params_3_cmd(payload: bytes) -> ReadParams3InCmd:
-    # noinspection PyProtectedMember
-    return ReadParams3InCmd._make(struct.unpack('<BBBBBBBBBBBBBBBBBBBBbbhhBBBBhhBBBBhhBBBBBBBBbbbBBBBBBBBBBBBBBbbbbbbbBBBBBBBBBBBBBBBBBhhhBBBBBBBBBBhhhBBBBBBBBBBBBHHBBBBB', payload))
+    return INCOMING_CODECS[CMD_READ_PARAMS_3].unpack(payload)
 
 
 def parse_read_params_ext_cmd(payload: bytes) -> ReadParamsExtInCmd:
-    # noinspection PyProtectedMember
-    return ReadParamsExtInCmd._make(struct.unpack('<BBBBBBBHHHBBBhhhhhhBBBBBBBBB2sBBBBHHHbbbbbbbbbbbbbbbBHHHBBBBBBBBBBBBbbBbHBBB', payload))
+    return INCOMING_CODECS[CMD_READ_PARAMS_EXT].unpack(payload)
 
 
 def parse_read_params_ext2_cmd(payload: bytes) -> ReadParamsExt2InCmd:
-    # noinspection PyProtectedMember
-    return ReadParamsExt2InCmd._make(struct.unpack('<BBBBB4sBBBB4sHHHBBBBBBBBBhhhhhhHBBhHHBHHHBBBBBBBBBBBBbBBBBBBBBBBBBbbbbbbbbBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBBHBBBBBBBBBBBHb', payload))
+    return INCOMING_CODECS[CMD_READ_PARAMS_EXT2].unpack(payload)
 
 
 def parse_read_params_ext3_cmd(payload: bytes) -> ReadParamsExt3InCmd:
-    # noinspection PyProtectedMember
-    return ReadParamsExt3InCmd._make(struct.unpack('<', payload))
+    return INCOMING_CODECS[CMD_READ_PARAMS_EXT3].unpack(payload)
 
 
 def parse_realtime_data_3_cmd(payload: bytes) -> RealtimeData3InCmd:
-    # noinspection PyProtectedMember
-    return RealtimeData3InCmd._make(struct.unpack('<hhhhhhHHB3shhhhhhhhhhhhhhhHHBHBBBBBB', payload))
+    return INCOMING_CODECS[CMD_REALTIME_DATA_3].unpack(payload)
 
 
 def parse_realtime_data_4_cmd(payload: bytes) -> RealtimeData4InCmd:
-    # noinspection PyProtectedMember
-    return RealtimeData4InCmd._make(struct.unpack('<hhhhhhHHB3shhhhhhhhhhhhhhhHHBHBBBBBBhhh1shhhHhhhbbBBhhh30s', payload))
+    return INCOMING_CODECS[CMD_REALTIME_DATA_4].unpack(payload)
 
 
 def parse_confirm_cmd(payload: bytes) -> ConfirmInCmd:
-    # noinspection PyProtectedMember
-    return ConfirmInCmd._make(struct.unpack('<', payload))
+    return INCOMING_CODECS[CMD_CONFIRM].unpack(payload)
 
 
 def parse_error_cmd(payload: bytes) -> ErrorInCmd:
-    # noinspection PyProtectedMember
-    return ErrorInCmd._make(struct.unpack('<', payload))
+    return INCOMING_CODECS[CMD_ERROR].unpack(payload)
 
 
 def parse_get_angles_cmd(payload: bytes) -> GetAnglesInCmd:
-    # noinspection PyProtectedMember
-    return GetAnglesInCmd._make(struct.unpack('<9h', payload))
+    return INCOMING_CODECS[CMD_GET_ANGLES].unpack(payload)
 
 
 def parse_get_angles_ext_cmd(payload: bytes) -> GetAnglesExtInCmd:
-    # noinspection PyProtectedMember
-    return GetAnglesExtInCmd._make(struct.unpack('<', payload))
+    return INCOMING_CODECS[CMD_GET_ANGLES_EXT].unpack(payload)
 
 
 def parse_read_profile_names_cmd(payload: bytes) \
@@ -439,6 +439,10 @@ ExtImuDebugInfoInCmd = NamedTuple('ExtImuDebugInfoInCmd', [
 ])
 
 
+CONTROL_OUT_FORMAT = '<BBBhhhhhh'
+_CONTROL_OUT_STRUCT = struct.Struct(CONTROL_OUT_FORMAT)
+
+
 # outgoing CMD_CONTROL - control gimbal movement
 class ControlOutCmd(NamedTuple):
     roll_mode: int
@@ -452,4 +456,4 @@ class ControlOutCmd(NamedTuple):
     yaw_angle: int
 
     def pack(self) -> bytes:
-        return struct.pack('<BBBhhhhhh', *self)
+        return _CONTROL_OUT_STRUCT.pack(*self)
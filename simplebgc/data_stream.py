@@ -0,0 +1,148 @@
+import csv
+import struct
+import time
+from concurrent.futures import Future
+from logging import getLogger
+from typing import Callable, List, NamedTuple, Optional, TextIO
+
+from simplebgc.command_ids import CMD_DATA_STREAM_INTERVAL, CMD_CONFIRM, \
+    CMD_GET_ANGLES
+from simplebgc.command_parser import parse_get_angles_cmd
+from simplebgc.commands import GetAnglesInCmd, RawCmd
+from simplebgc.transport import SerialTransport
+from simplebgc.units import to_degree, to_degree_per_sec
+
+logger = getLogger(__name__)
+
+
+class GimbalState(NamedTuple):
+    """
+    Pan and tilt angles are the target angles (in degree) like the angles
+    that are used by the camera controllers. The angles measured by the IMU
+    are provided separately.
+    """
+    timestamp: float
+    """time.time() when the state has been received"""
+    angles: GetAnglesInCmd
+
+    @property
+    def pan_angle(self) -> float:
+        return to_degree(self.angles.target_angle_3)
+
+    @property
+    def tilt_angle(self) -> float:
+        return to_degree(self.angles.target_angle_2)
+
+    @property
+    def imu_pan_angle(self) -> float:
+        return to_degree(self.angles.imu_angle_3)
+
+    @property
+    def imu_tilt_angle(self) -> float:
+        return to_degree(self.angles.imu_angle_2)
+
+    @property
+    def pan_speed(self) -> float:
+        return to_degree_per_sec(self.angles.target_speed_3)
+
+    @property
+    def tilt_speed(self) -> float:
+        return to_degree_per_sec(self.angles.target_speed_2)
+
+
+GimbalStateListener = Callable[[GimbalState], None]
+
+
+def create_data_stream_interval_payload(
+        command_id: int,
+        interval_ms: int) -> bytes:
+    # CMD_ID 1u INTERVAL_MS 2u CONFIG 8b RESERVED 10b
+    return struct.pack('<BH8s10s', command_id, interval_ms, bytes(8),
+                       bytes(10))
+
+
+class AnglesStream:
+    """
+    Ask the gimbal to send CMD_GET_ANGLES at a fixed interval
+    (CMD_DATA_STREAM_INTERVAL) instead of requesting the angles in each
+    update. Streamed angles are parsed by the I/O thread of the transport.
+
+    CMD_GET_ANGLES is streamed, since it is the only command known to the
+    command parser that contains angles and speeds. CMD_REALTIME_DATA_3 does
+    not contain speeds, CMD_REALTIME_DATA_4 is only parsed partially (without
+    angles) and CMD_REALTIME_DATA_CUSTOM is not parsed at all.
+
+    The latest state is replaced as a whole (a single reference assignment of
+    an immutable tuple). Hence, it can be read by other threads without a
+    lock. Listeners are called by the I/O thread for each state and must
+    return quickly.
+    """
+
+    def __init__(
+            self,
+            transport: SerialTransport,
+            interval: float = 0.02) -> None:
+        """
+        :param interval: seconds between states sent by the gimbal
+        """
+        self._transport = transport
+        self.interval = interval
+        self._listeners: List[GimbalStateListener] = []
+        self._latest: Optional[GimbalState] = None
+
+    @property
+    def latest(self) -> Optional[GimbalState]:
+        return self._latest
+
+    def add_listener(self, listener: GimbalStateListener) -> None:
+        self._listeners.append(listener)
+
+    def start(self) -> Future:
+        """
+        :return: future of the confirmation
+        """
+        self._transport.subscribe(CMD_GET_ANGLES, self._on_angles)
+        return self._send_interval(max(1, int(round(self.interval * 1000))))
+
+    def stop(self) -> Future:
+        future = self._send_interval(0)
+        self._transport.unsubscribe(CMD_GET_ANGLES, self._on_angles)
+        return future
+
+    def _send_interval(self, interval_ms: int) -> Future:
+        logger.debug(f'stream angles every {interval_ms} ms')
+        return self._transport.send(
+            CMD_DATA_STREAM_INTERVAL,
+            create_data_stream_interval_payload(CMD_GET_ANGLES, interval_ms),
+            response_id=CMD_CONFIRM)
+
+    def _on_angles(self, cmd: RawCmd) -> None:
+        try:
+            angles = parse_get_angles_cmd(cmd.payload)
+        except struct.error as e:
+            logger.warning(f'failed to parse angles: {e}')
+            return
+        state = GimbalState(time.time(), angles)
+        self._latest = state
+        for listener in self._listeners:
+            listener(state)
+
+
+class GimbalStateLog:
+    """
+    Listener that writes each gimbal state as CSV row (angles in degree and
+    speeds in degree per second).
+    """
+
+    FIELDS = ('timestamp', 'pan_angle', 'tilt_angle', 'imu_pan_angle',
+              'imu_tilt_angle', 'pan_speed', 'tilt_speed')
+
+    def __init__(self, log: TextIO) -> None:
+        self._csv_writer = csv.writer(log)
+        self._csv_writer.writerow(self.FIELDS)
+
+    def __call__(self, state: GimbalState) -> None:
+        self._csv_writer.writerow((
+            state.timestamp, state.pan_angle, state.tilt_angle,
+            state.imu_pan_angle, state.imu_tilt_angle,
+            state.pan_speed, state.tilt_speed))
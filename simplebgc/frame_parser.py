@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from logging import getLogger
+from typing import List
+
+from simplebgc.commands import RawCmd
+
+logger = getLogger(__name__)
+
+START_CHARACTER = ord('>')
+HEADER_SIZE = 4
+"""start character, command ID, payload size and header checksum"""
+
+
+@dataclass
+class FrameParserStatistics:
+    frames: int = 0
+    header_checksum_errors: int = 0
+    payload_checksum_errors: int = 0
+    resyncs: int = 0
+    """Number of times that bytes have been skipped to find the next start
+    character."""
+    skipped_bytes: int = 0
+
+
+class FrameParser:
+    """
+    Incremental parser of the byte stream received from the gimbal. Data is
+    fed in chunks of arbitrary size (e.g. as returned by a non-blocking read)
+    and appended to a receive buffer. Complete frames are parsed as RawCmd.
+    Incomplete frames stay in the buffer until more data is fed.
+
+    Bytes before the start character are skipped. If the header or payload
+    checksum of a frame is wrong, only its start character is skipped and
+    the parser resynchronizes at the next start character. Hence, a stray
+    or lost byte only corrupts a single frame and not every subsequent one.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._is_skipping = False
+        self.statistics = FrameParserStatistics()
+
+    def __len__(self) -> int:
+        """
+        :return: number of buffered bytes that have not been parsed yet
+        """
+        return len(self._buffer)
+
+    def reset(self) -> None:
+        self._buffer.clear()
+        self._is_skipping = False
+
+    def _skip(self, count: int) -> None:
+        if count == 0:
+            return
+        # skipped bytes may be split into multiple chunks
+        if not self._is_skipping:
+            self._is_skipping = True
+            self.statistics.resyncs += 1
+        self.statistics.skipped_bytes += count
+
+    def feed(self, data: bytes) -> List[RawCmd]:
+        """
+        :return: commands of the frames that have been completed by data
+        """
+        buffer = self._buffer
+        buffer += data
+        size = len(buffer)
+        statistics = self.statistics
+        commands: List[RawCmd] = []
+        position = 0
+        while position < size:
+            start = buffer.find(START_CHARACTER, position)
+            if start < 0:
+                self._skip(size - position)
+                position = size
+                break
+            self._skip(start - position)
+            self._is_skipping = False
+            position = start
+            if size - position < HEADER_SIZE:
+                break
+            command_id = buffer[position + 1]
+            payload_size = buffer[position + 2]
+            if (command_id + payload_size) & 0xFF != buffer[position + 3]:
+                logger.debug(f'header checksum error at {position}')
+                statistics.header_checksum_errors += 1
+                position += 1
+                continue
+            payload_start = position + HEADER_SIZE
+            payload_end = payload_start + payload_size
+            if payload_end >= size:
+                # payload or its checksum is incomplete
+                break
+            payload = bytes(buffer[payload_start:payload_end])
+            if sum(payload) & 0xFF != buffer[payload_end]:
+                logger.debug(f'payload checksum error of command'
+                             f' {command_id} at {position}')
+                statistics.payload_checksum_errors += 1
+                position += 1
+                continue
+            commands.append(RawCmd(command_id, payload))
+            statistics.frames += 1
+            position = payload_end + 1
+        del buffer[:position]
+        return commands
+
+
+def _main():
+    """
+    Measure the throughput of the frame parser on a byte stream that has been
+    recorded from the gimbal (see --serialRecording of robot_cameraman) or a
+    generated stream with corrupted bytes.
+    """
+    import argparse
+    import random
+    import time
+    from pathlib import Path
+
+    from simplebgc.command_ids import CMD_CONFIRM, CMD_GET_ANGLES, \
+        CMD_REALTIME_DATA_4
+    from simplebgc.serial_example import create_message, pack_message
+
+    parser = argparse.ArgumentParser(description=_main.__doc__)
+    parser.add_argument('--recording', type=Path,
+                        help='File with recorded bytes.'
+                             ' A stream is generated, if omitted.')
+    parser.add_argument('--chunkSize', type=int, default=64,
+                        help='Maximum number of bytes fed at once.'
+                             ' Chunk sizes are random between 1 and this.')
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    if args.recording is not None:
+        stream = args.recording.read_bytes()
+    else:
+        messages = [
+            pack_message(create_message(CMD_CONFIRM, bytes([67]))),
+            pack_message(create_message(CMD_GET_ANGLES, bytes(18))),
+            pack_message(create_message(CMD_REALTIME_DATA_4, bytes(124))),
+        ]
+        stream = bytearray()
+        for _ in range(10000):
+            stream += rng.choice(messages)
+            if rng.random() < 0.01:
+                # corrupt a byte
+                stream[rng.randrange(len(stream))] ^= 0xFF
+        stream = bytes(stream)
+    chunks = []
+    position = 0
+    while position < len(stream):
+        size = rng.randint(1, args.chunkSize)
+        chunks.append(stream[position:position + size])
+        position += size
+    print(f'{len(stream)} bytes in {len(chunks)} chunks')
+    durations = []
+    frame_parser = FrameParser()
+    for _ in range(args.repeat):
+        frame_parser = FrameParser()
+        start = time.perf_counter()
+        for chunk in chunks:
+            frame_parser.feed(chunk)
+        durations.append(time.perf_counter() - start)
+    duration = min(durations)
+    print(frame_parser.statistics)
+    print(f'{len(stream) / duration / 1e6:.2f} MB/s,'
+          f' {frame_parser.statistics.frames / duration:.0f} frames/s')
+
+
+if __name__ == '__main__':
+    _main()
@@ -1,13 +1,19 @@
+import time
+from concurrent.futures import Future
 from enum import IntEnum
 from logging import getLogger
+from typing import Optional
 
 from serial import Serial
 
+from simplebgc.codec import encode_message
 from simplebgc.command_ids import CMD_CONTROL, CMD_GET_ANGLES, CMD_CONFIRM
 from simplebgc.command_parser import parse_cmd
 from simplebgc.commands import ControlOutCmd, GetAnglesInCmd
+from simplebgc.data_stream import AnglesStream, GimbalState
 from simplebgc.serial_example import create_message, \
     pack_message, read_message, Message, read_cmd
+from simplebgc.transport import SerialTransport
 from simplebgc.units import from_degree_per_sec, from_degree
 
 logger = getLogger(__name__)
@@ -26,6 +32,30 @@ class ControlMode(IntEnum):
     # TODO flags
 
 
+def create_control_cmd(
+        yaw_mode: ControlMode = ControlMode.speed,
+        yaw_speed: float = 0,
+        yaw_angle: float = 0,
+        pitch_mode: ControlMode = ControlMode.speed,
+        pitch_speed: float = 0,
+        pitch_angle: float = 0,
+        roll_mode: ControlMode = ControlMode.speed,
+        roll_speed: float = 0,
+        roll_angle: float = 0) -> ControlOutCmd:
+    control_data = ControlOutCmd(
+        roll_mode=int(roll_mode),
+        roll_speed=from_degree_per_sec(roll_speed),
+        roll_angle=from_degree(roll_angle),
+        pitch_mode=int(pitch_mode),
+        pitch_speed=from_degree_per_sec(pitch_speed),
+        pitch_angle=from_degree(pitch_angle),
+        yaw_mode=int(yaw_mode),
+        yaw_speed=from_degree_per_sec(yaw_speed),
+        yaw_angle=from_degree(yaw_angle))
+    logger.debug(f'send control cmd: {control_data}')
+    return control_data
+
+
 class Gimbal:
 
     def __init__(self, connection: Serial = None) -> None:
@@ -48,19 +78,12 @@ class Gimbal:
             roll_mode: ControlMode = ControlMode.speed,
             roll_speed: float = 0,
             roll_angle: float = 0):
-        control_data = ControlOutCmd(
-            roll_mode=int(roll_mode),
-            roll_speed=from_degree_per_sec(roll_speed),
-            roll_angle=from_degree(roll_angle),
-            pitch_mode=int(pitch_mode),
-            pitch_speed=from_degree_per_sec(pitch_speed),
-            pitch_angle=from_degree(pitch_angle),
-            yaw_mode=int(yaw_mode),
-            yaw_speed=from_degree_per_sec(yaw_speed),
-            yaw_angle=from_degree(yaw_angle))
-        logger.debug(f'send control cmd: {control_data}')
-        message = create_message(CMD_CONTROL, control_data.pack())
-        self.send_message(message)
+        control_data = create_control_cmd(
+            yaw_mode, yaw_speed, yaw_angle,
+            pitch_mode, pitch_speed, pitch_angle,
+            roll_mode, roll_speed, roll_angle)
+        self._connection.write(
+            encode_message(CMD_CONTROL, control_data.pack()))
         confirmation: Message = read_message(self._connection, 1)
         assert confirmation.command_id == CMD_CONFIRM, \
             f'expected confirmation, but received command with ID' \
@@ -78,6 +101,105 @@ class Gimbal:
         return parse_cmd(cmd)
 
 
+class PipelinedGimbal:
+    """Gimbal that sends commands by a SerialTransport. Control commands are
+    sent without waiting for the confirmation (fire-and-forget), but their
+    future can be used to await it. Only get_angles waits for the response.
+
+    If an angles stream interval is given, the gimbal is asked to stream its
+    angles. Then get_angles returns the latest streamed angles without a
+    round trip, unless they are older than max_state_age seconds.
+    """
+
+    def __init__(
+            self,
+            transport: Optional[SerialTransport] = None,
+            timeout: float = 1.0,
+            angles_stream_interval: Optional[float] = None,
+            max_state_age: float = 0.1) -> None:
+        if transport is None:
+            transport = SerialTransport()
+            transport.start()
+        self._transport = transport
+        self.timeout = timeout
+        self.max_state_age = max_state_age
+        self.angles_stream: Optional[AnglesStream] = None
+        if angles_stream_interval is not None:
+            self.angles_stream = AnglesStream(transport,
+                                              angles_stream_interval)
+            self.angles_stream.start()
+
+    @property
+    def transport(self) -> SerialTransport:
+        return self._transport
+
+    def control(
+            self,
+            yaw_mode: ControlMode = ControlMode.speed,
+            yaw_speed: float = 0,
+            yaw_angle: float = 0,
+            pitch_mode: ControlMode = ControlMode.speed,
+            pitch_speed: float = 0,
+            pitch_angle: float = 0,
+            roll_mode: ControlMode = ControlMode.speed,
+            roll_speed: float = 0,
+            roll_angle: float = 0) -> Future:
+        """
+        :return: future of the confirmation
+        """
+        control_data = create_control_cmd(
+            yaw_mode, yaw_speed, yaw_angle,
+            pitch_mode, pitch_speed, pitch_angle,
+            roll_mode, roll_speed, roll_angle)
+        return self._transport.send(CMD_CONTROL, control_data.pack(),
+                                    response_id=CMD_CONFIRM,
+                                    timeout=self.timeout)
+
+    def stop(self) -> Future:
+        return self.control(roll_mode=ControlMode.no_control,
+                            pitch_mode=ControlMode.no_control,
+                            yaw_mode=ControlMode.no_control)
+
+    @property
+    def state(self) -> Optional[GimbalState]:
+        """
+        :return: latest streamed state or None, if angles are not streamed
+        """
+        if self.angles_stream is None:
+            return None
+        return self.angles_stream.latest
+
+    @property
+    def recent_state(self) -> Optional[GimbalState]:
+        """
+        :return: latest streamed state or None, if angles are not streamed or
+            the latest state is older than max_state_age seconds
+        """
+        state = self.state
+        if (state is None
+                or time.time() - state.timestamp > self.max_state_age):
+            return None
+        return state
+
+    def get_angles(self) -> GetAnglesInCmd:
+        """
+        :raises TimeoutError: if the gimbal does not respond in time
+        :raises SerialException: if the serial connection failed
+        """
+        state = self.recent_state
+        if state is not None:
+            return state.angles
+        future = self._transport.send(CMD_GET_ANGLES,
+                                      response_id=CMD_GET_ANGLES,
+                                      timeout=self.timeout)
+        return parse_cmd(future.result(timeout=self.timeout))
+
+    def close(self) -> None:
+        if self.angles_stream is not None:
+            self.angles_stream.stop()
+        self._transport.close()
+
+
 def _main():
     from time import sleep
     import logging
@@ -4,6 +4,7 @@ from logging import getLogger
 
 import serial
 
+from simplebgc.codec import message_struct, HEADER_STRUCT
 from simplebgc.command_ids import *
 from simplebgc.commands import ControlOutCmd, RawCmd
 
@@ -38,13 +39,11 @@ def create_message(command_id: int, payload: bytes = b'') -> Message:
 
 
 def pack_message(message: Message) -> bytes:
-    message_format = '<BBBB{}sB'.format(message.payload_size)
-    return struct.pack(message_format, *message)
+    return message_struct(message.payload_size).pack(*message)
 
 
 def unpack_message(data: bytes, payload_size: int) -> Message:
-    message_format = '<BBBB{}sB'.format(payload_size)
-    return Message._make(struct.unpack(message_format, data))
+    return Message._make(message_struct(payload_size).unpack(data))
 
 
 def read_message(connection: serial.Serial, payload_size: int) -> Message:
@@ -58,7 +57,7 @@ def read_message(connection: serial.Serial, payload_size: int) -> Message:
 def read_message_header(connection: serial.Serial) -> MessageHeader:
     header_data = connection.read(4)
     logger.debug(f'received message header data: {header_data}')
-    return MessageHeader._make(struct.unpack('<BBBB', header_data))
+    return MessageHeader._make(HEADER_STRUCT.unpack(header_data))
 
 
 def read_message_payload(connection: serial.Serial,
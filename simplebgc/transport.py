@@ -0,0 +1,375 @@
+import bisect
+import copy
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, InvalidStateError
+from dataclasses import dataclass, field, replace
+from logging import getLogger
+from typing import Callable, Deque, Dict, List, Optional, Sequence, \
+    Tuple, BinaryIO
+
+from serial import Serial, SerialException
+
+from simplebgc.codec import encode_message
+from simplebgc.command_ids import CMD_CONFIRM
+from simplebgc.commands import RawCmd
+from simplebgc.frame_parser import FrameParser, FrameParserStatistics
+
+logger = getLogger(__name__)
+
+Subscriber = Callable[[RawCmd], None]
+ResponseKey = Tuple[int, Optional[int]]
+
+
+class RoundTripTimeHistogram:
+    """Histogram of the time between sending a command and receiving its
+    response. Bucket bounds are upper bounds in milliseconds. The last bucket
+    counts all round trip times that exceed the last bound.
+    """
+
+    def __init__(
+            self,
+            bucket_bounds: Sequence[float] =
+            (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)) -> None:
+        self.bucket_bounds = tuple(bucket_bounds)
+        self.counts = [0] * (len(self.bucket_bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, round_trip_time: float) -> None:
+        """
+        :param round_trip_time: seconds
+        """
+        milliseconds = round_trip_time * 1000
+        self.counts[bisect.bisect_left(self.bucket_bounds, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.max = max(self.max, milliseconds)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """
+        :param percentile: between 0 and 100
+        :return: upper bound (milliseconds) of the bucket that contains the
+            percentile or None, if no round trip time has been added yet
+        """
+        if self.count == 0:
+            return None
+        rank = percentile / 100 * self.count
+        cumulative_count = 0
+        for bound, count in zip(self.bucket_bounds, self.counts):
+            cumulative_count += count
+            if cumulative_count >= rank:
+                return bound
+        return self.max
+
+    def __str__(self) -> str:
+        lower_bounds = (0,) + self.bucket_bounds
+        upper_bounds = [f'{b} ms' for b in self.bucket_bounds] + ['inf']
+        return ', '.join(f'{lower}-{upper}: {count}'
+                         for lower, upper, count
+                         in zip(lower_bounds, upper_bounds, self.counts)
+                         if count > 0)
+
+
+@dataclass
+class TransportStatistics:
+    sent: int = 0
+    received: int = 0
+    timeouts: int = 0
+    unexpected: int = 0
+    """Received commands that neither answer a request nor have a
+    subscriber."""
+    frames: FrameParserStatistics = field(
+        default_factory=FrameParserStatistics)
+    round_trip_times: RoundTripTimeHistogram = field(
+        default_factory=RoundTripTimeHistogram, repr=False)
+
+
+@dataclass(eq=False)
+class _Request:
+    command_id: int
+    data: bytes
+    future: Future
+    response_key: Optional[ResponseKey]
+    deadline: float
+    send_time: Optional[float] = None
+
+
+def _request_response_key(command_id: int, response_id: int) -> ResponseKey:
+    # a confirmation contains the ID of the confirmed command
+    if response_id == CMD_CONFIRM:
+        return CMD_CONFIRM, command_id
+    return response_id, None
+
+
+def _received_response_key(cmd: RawCmd) -> ResponseKey:
+    if cmd.id == CMD_CONFIRM and len(cmd.payload) > 0:
+        return CMD_CONFIRM, cmd.payload[0]
+    return cmd.id, None
+
+
+def _set_result(future: Future, result: Optional[RawCmd]) -> None:
+    # the caller might cancel the future at any time
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+def _set_exception(future: Future, exception: BaseException) -> None:
+    try:
+        future.set_exception(exception)
+    except InvalidStateError:
+        pass
+
+
+class SerialTransport:
+    """
+    Owns the serial connection to the gimbal: a dedicated I/O thread writes
+    queued commands and reads incoming commands. Hence, callers are never
+    blocked by the serial connection (e.g. if a byte is lost).
+
+    Each sent command returns a future. If a response is expected, the future
+    is resolved with the response (a RawCmd), which is matched by its command
+    ID (and the ID of the confirmed command in case of CMD_CONFIRM) in the
+    order the requests have been sent. If no response is received within the
+    timeout, the future fails with a TimeoutError. Otherwise, the future is
+    resolved (with None) as soon as the command is written. Callers may
+    ignore the future (fire-and-forget) or wait for its result.
+
+    Received commands are also passed to subscribers of their command ID.
+    Subscribers are called by the I/O thread and must return quickly.
+
+    Only bytes that are already waiting are read and parsed by a FrameParser,
+    i.e. reading never blocks writing. If a recording is given, all received
+    bytes are written to it (e.g. to benchmark the frame parser).
+
+    If the serial connection fails (e.g. the USB adapter is unplugged), the
+    transport is closed and all pending and following requests fail with the
+    SerialException. Closing the transport also closes the serial connection.
+    """
+
+    def __init__(
+            self,
+            connection: Optional[Serial] = None,
+            timeout: float = 1.0,
+            poll_interval: float = 0.001,
+            recording: Optional[BinaryIO] = None) -> None:
+        if connection is None:
+            connection = Serial('/dev/ttyUSB0', baudrate=115200, timeout=0.1)
+        self._connection = connection
+        self._parser = FrameParser()
+        self._recording = recording
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._outgoing: 'queue.Queue[Optional[_Request]]' = queue.Queue()
+        self._lock = threading.Lock()
+        self._requests: Dict[ResponseKey, Deque[_Request]] = {}
+        self._subscribers: Dict[int, List[Subscriber]] = {}
+        self._statistics = TransportStatistics()
+        self._is_closed = False
+        self._error: Optional[SerialException] = None
+        self._thread = threading.Thread(
+            target=self._run, name='SerialTransport', daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Stop the I/O thread after the queued commands have been written,
+        cancel all requests that are still waiting for a response and close
+        the serial connection.
+        """
+        with self._lock:
+            self._is_closed = True
+        self._outgoing.put(None)
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        self._connection.close()
+        with self._lock:
+            requests = [r for rs in self._requests.values() for r in rs]
+            self._requests.clear()
+        for request in requests:
+            request.future.cancel()
+
+    def send(
+            self,
+            command_id: int,
+            payload: bytes = b'',
+            response_id: Optional[int] = None,
+            timeout: Optional[float] = None) -> Future:
+        """
+        :param response_id: ID of the command that is expected as response
+            or None, if no response is expected
+        :param timeout: seconds to wait for the response (defaults to the
+            timeout of the transport)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        data = encode_message(command_id, payload)
+        response_key = None
+        if response_id is not None:
+            response_key = _request_response_key(command_id, response_id)
+        request = _Request(command_id, data, Future(), response_key,
+                           deadline=time.monotonic() + timeout)
+        with self._lock:
+            is_closed = self._is_closed
+            if not is_closed:
+                if response_key is not None:
+                    # register before the command is written, since the
+                    # response might be received before send returns
+                    self._requests.setdefault(response_key, deque()) \
+                        .append(request)
+                self._outgoing.put(request)
+        if is_closed:
+            if self._error is not None:
+                request.future.set_exception(self._error)
+            else:
+                request.future.cancel()
+        return request.future
+
+    def subscribe(self, command_id: int, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.setdefault(command_id, []).append(subscriber)
+
+    def unsubscribe(self, command_id: int, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.get(command_id, []).remove(subscriber)
+
+    def statistics(self) -> TransportStatistics:
+        with self._lock:
+            statistics = copy.deepcopy(self._statistics)
+        # parser is only used by the I/O thread
+        statistics.frames = replace(self._parser.statistics)
+        return statistics
+
+    def _run(self) -> None:
+        try:
+            while not self._is_closed:
+                # wait for outgoing commands only if there is nothing to read
+                self._write_outgoing(wait=self._connection.in_waiting == 0)
+                self._read_incoming()
+                self._expire_requests()
+            self._write_outgoing(wait=False)
+        except SerialException as e:
+            logger.error(f'serial connection failed: {e}')
+            self._fail(e)
+
+    def _fail(self, error: SerialException) -> None:
+        """
+        Close the transport and fail all pending requests with the error.
+        """
+        with self._lock:
+            self._is_closed = True
+            self._error = error
+            requests = [r for rs in self._requests.values() for r in rs]
+            self._requests.clear()
+        # no commands are queued anymore, since the transport is closed
+        while True:
+            try:
+                request = self._outgoing.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None:
+                requests.append(request)
+        for request in requests:
+            _set_exception(request.future, error)
+
+    def _write_outgoing(self, wait: bool) -> None:
+        try:
+            if wait:
+                request = self._outgoing.get(timeout=self.poll_interval)
+            else:
+                request = self._outgoing.get_nowait()
+            while True:
+                if request is not None:
+                    self._write(request)
+                request = self._outgoing.get_nowait()
+        except queue.Empty:
+            pass
+
+    def _write(self, request: _Request) -> None:
+        if request.future.done():
+            # cancelled or timed out before it has been written
+            return
+        logger.debug(f'send command {request.command_id}: {request.data}')
+        request.send_time = time.monotonic()
+        try:
+            self._connection.write(request.data)
+        except SerialException as e:
+            logger.error(f'failed to send command {request.command_id}: {e}')
+            self._remove_request(request)
+            _set_exception(request.future, e)
+            return
+        with self._lock:
+            self._statistics.sent += 1
+        if request.response_key is None:
+            _set_result(request.future, None)
+
+    def _read_incoming(self) -> None:
+        size = self._connection.in_waiting
+        if size == 0:
+            return
+        data = self._connection.read(size)
+        if self._recording is not None:
+            self._recording.write(data)
+        for cmd in self._parser.feed(data):
+            self._dispatch(cmd)
+
+    def _dispatch(self, cmd: RawCmd) -> None:
+        receive_time = time.monotonic()
+        with self._lock:
+            self._statistics.received += 1
+            requests = self._requests.get(_received_response_key(cmd))
+            request = requests.popleft() if requests else None
+            subscribers = list(self._subscribers.get(cmd.id, ()))
+            if request is not None and request.send_time is not None:
+                self._statistics.round_trip_times.add(
+                    receive_time - request.send_time)
+            elif request is None and not subscribers:
+                self._statistics.unexpected += 1
+        if request is not None:
+            _set_result(request.future, cmd)
+        for subscriber in subscribers:
+            try:
+                subscriber(cmd)
+            except Exception:
+                logger.exception(f'subscriber of command {cmd.id} failed')
+        if request is None and not subscribers:
+            logger.debug(f'unexpected command {cmd.id}: {cmd.payload}')
+
+    def _remove_request(self, request: _Request) -> None:
+        with self._lock:
+            requests = self._requests.get(request.response_key)
+            if requests is not None and request in requests:
+                requests.remove(request)
+
+    def _expire_requests(self) -> None:
+        current_time = time.monotonic()
+        expired: List[_Request] = []
+        with self._lock:
+            for response_key, requests in self._requests.items():
+                remaining: Deque[_Request] = deque()
+                for request in requests:
+                    if (request.deadline <= current_time
+                            or request.future.done()):
+                        expired.append(request)
+                    else:
+                        remaining.append(request)
+                self._requests[response_key] = remaining
+            self._statistics.timeouts += sum(not r.future.done()
+                                             for r in expired)
+        for request in expired:
+            if not request.future.done():
+                logger.warning(f'no response to command'
+                               f' {request.command_id} in time')
+                _set_exception(request.future, TimeoutError(
+                    f'no response to command {request.command_id}'))
@@ -0,0 +1,80 @@
+import numpy
+import pytest
+
+from robot_cameraman.box import Box
+from robot_cameraman.detection_engine.cam_shift import \
+    CamShiftDetectionEngine
+
+TARGET_LABEL_ID = 7
+
+
+def create_image(x: int, y: int, size: int = 40) -> numpy.ndarray:
+    """Gray image (640x480) with a red square at the given position."""
+    image = numpy.full((480, 640, 3), 128, dtype=numpy.uint8)
+    image[y:y + size, x:x + size] = (255, 0, 0)
+    return image
+
+
+def center(box: Box):
+    x1, y1, x2, y2 = box.coordinates()
+    return (x1 + x2) / 2, (y1 + y2) / 2
+
+
+@pytest.fixture()
+def engine():
+    return CamShiftDetectionEngine(TARGET_LABEL_ID)
+
+
+class TestCamShiftDetectionEngine:
+
+    def test_detect_nothing_without_selected_region(self, engine):
+        assert len(engine.detect(create_image(100, 100))) == 0
+        assert not engine.is_initialized()
+
+    def test_detect_selected_region(self, engine):
+        engine.select_region(Box.from_coordinates(100, 100, 140, 140))
+        candidates = engine.detect(create_image(100, 100))
+        assert engine.is_initialized()
+        assert len(candidates) == 1
+        candidate = candidates[0]
+        assert candidate.label_id == TARGET_LABEL_ID
+        assert center(candidate.bounding_box) == \
+               pytest.approx((120, 120), abs=3)
+
+    def test_ignore_empty_region(self, engine):
+        engine.select_region(Box.from_coordinates(700, 500, 800, 600))
+        assert len(engine.detect(create_image(100, 100))) == 0
+        assert not engine.is_initialized()
+
+    def test_track_across_frames(self, engine):
+        engine.select_region(Box.from_coordinates(100, 100, 140, 140))
+        engine.detect(create_image(100, 100))
+        for x in range(110, 200, 10):
+            candidates = engine.detect(create_image(x, 100))
+            assert len(candidates) == 1
+            assert center(candidates[0].bounding_box) == \
+                   pytest.approx((x + 20, 120), abs=3)
+
+    def test_search_whole_frame_if_target_is_lost(self, engine):
+        engine.select_region(Box.from_coordinates(100, 100, 140, 140))
+        engine.detect(create_image(100, 100))
+        # target jumps out of the search window
+        candidates = engine.detect(create_image(500, 400))
+        assert len(candidates) == 1
+        assert center(candidates[0].bounding_box) == \
+               pytest.approx((520, 420), abs=3)
+
+    def test_detect_nothing_if_target_is_gone(self, engine):
+        engine.select_region(Box.from_coordinates(100, 100, 140, 140))
+        engine.detect(create_image(100, 100))
+        gray_image = numpy.full((480, 640, 3), 128, dtype=numpy.uint8)
+        assert len(engine.detect(gray_image)) == 0
+        # target is found again after it reappears
+        assert len(engine.detect(create_image(300, 200))) == 1
+
+    def test_reset(self, engine):
+        engine.select_region(Box.from_coordinates(100, 100, 140, 140))
+        engine.detect(create_image(100, 100))
+        engine.reset()
+        assert not engine.is_initialized()
+        assert len(engine.detect(create_image(100, 100))) == 0
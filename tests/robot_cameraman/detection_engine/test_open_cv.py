@@ -0,0 +1,159 @@
+import threading
+
+import numpy
+import pytest
+
+from robot_cameraman.detection_engine import open_cv
+from robot_cameraman.detection_engine.open_cv import \
+    OpenCvDnnDetectionEngine, OpenCvDnnModelType
+from robot_cameraman.live_view import ImageSize
+
+
+class FakeNet:
+    """Network that returns the given outputs and records its inputs."""
+
+    def __init__(self) -> None:
+        self.outputs = []
+        self.inputs = []
+        self.forwarded = threading.Event()
+
+    def getUnconnectedOutLayersNames(self):
+        return ['output']
+
+    def setInput(self, blob):
+        self.inputs.append(blob)
+
+    def forward(self, output_names):
+        self.forwarded.set()
+        return self.outputs
+
+
+@pytest.fixture()
+def net(monkeypatch):
+    net = FakeNet()
+    monkeypatch.setattr(open_cv.cv2.dnn, 'readNet',
+                        lambda model, config: net)
+    return net
+
+
+def create_engine(model_type=OpenCvDnnModelType.SSD, **kwargs):
+    kwargs.setdefault('confidence', 0.5)
+    kwargs.setdefault('max_objects', 10)
+    return OpenCvDnnDetectionEngine(
+        model='model', config=None, model_type=model_type,
+        input_size=ImageSize(300, 300), **kwargs)
+
+
+def create_image(width=640, height=480):
+    return numpy.zeros((height, width, 3), dtype=numpy.uint8)
+
+
+def ssd_output(*detections):
+    """
+    :param detections: label_id, score, x1, y1, x2, y2 (relative)
+    """
+    return numpy.array([[[[0, *d] for d in detections]]], dtype=numpy.float32)
+
+
+def yolo_output(*detections):
+    """
+    :param detections: center_x, center_y, width, height, objectness and
+        class scores (relative)
+    """
+    return numpy.array(detections, dtype=numpy.float32)
+
+
+class TestSsdOutput:
+
+    def test_decode_boxes_in_image_coordinates(self, net):
+        net.outputs = [ssd_output((3, 0.9, 0.25, 0.5, 0.5, 1.0))]
+        candidates = create_engine().detect(create_image())
+        assert len(candidates) == 1
+        candidate = candidates[0]
+        # label ID 0 is the background
+        assert candidate.label_id == 2
+        assert candidate.score == pytest.approx(0.9)
+        assert candidate.bounding_box.coordinates() == \
+               pytest.approx((160, 240, 320, 480))
+
+    def test_sort_and_filter_by_confidence(self, net):
+        net.outputs = [ssd_output(
+            (1, 0.6, 0, 0, 1, 1),
+            (2, 0.4, 0, 0, 1, 1),
+            (3, 0.8, 0, 0, 1, 1))]
+        candidates = create_engine().detect(create_image())
+        assert [c.label_id for c in candidates] == [2, 0]
+
+    def test_limit_number_of_objects(self, net):
+        net.outputs = [ssd_output(
+            (1, 0.6, 0, 0, 1, 1),
+            (2, 0.7, 0, 0, 1, 1),
+            (3, 0.8, 0, 0, 1, 1))]
+        candidates = create_engine(max_objects=2).detect(create_image())
+        assert [c.label_id for c in candidates] == [2, 1]
+
+    def test_filter_by_label_id_with_offset(self, net):
+        net.outputs = [ssd_output(
+            (0, 0.9, 0, 0, 1, 1),
+            (1, 0.8, 0, 0, 1, 1))]
+        engine = create_engine(label_ids={2}, label_id_offset=1)
+        candidates = engine.detect(create_image())
+        assert [c.label_id for c in candidates] == [2]
+
+
+class TestYoloOutput:
+
+    def test_decode_boxes_in_image_coordinates(self, net):
+        net.outputs = [yolo_output((0.5, 0.5, 0.25, 0.5, 0.9, 0.1, 1.0))]
+        engine = create_engine(OpenCvDnnModelType.YOLO)
+        candidates = engine.detect(create_image())
+        assert len(candidates) == 1
+        candidate = candidates[0]
+        assert candidate.label_id == 1
+        assert candidate.score == pytest.approx(0.9)
+        assert candidate.bounding_box.coordinates() == \
+               pytest.approx((240, 120, 400, 360))
+
+    def test_suppress_overlapping_boxes(self, net):
+        net.outputs = [
+            yolo_output(
+                (0.5, 0.5, 0.25, 0.5, 0.8, 1.0),
+                (0.51, 0.5, 0.25, 0.5, 0.9, 1.0)),
+            yolo_output((0.1, 0.1, 0.1, 0.1, 0.7, 1.0))]
+        engine = create_engine(OpenCvDnnModelType.YOLO)
+        candidates = engine.detect(create_image())
+        assert [c.score for c in candidates] == \
+               pytest.approx([0.9, 0.7])
+
+    def test_filter_by_confidence(self, net):
+        # objectness and class score are multiplied
+        net.outputs = [yolo_output((0.5, 0.5, 0.25, 0.5, 0.9, 0.5))]
+        engine = create_engine(OpenCvDnnModelType.YOLO)
+        assert len(engine.detect(create_image())) == 0
+
+
+class TestAsynchronousInference:
+
+    def test_return_result_of_previous_frame(self, net):
+        net.outputs = [ssd_output((3, 0.9, 0, 0, 1, 1))]
+        engine = create_engine(asynchronous=True)
+        try:
+            assert len(engine.detect(create_image())) == 0
+            assert net.forwarded.wait(timeout=1)
+            assert [c.label_id for c in engine.detect(create_image())] \
+                   == [2]
+        finally:
+            engine.close()
+
+    def test_alternate_input_buffers(self, net):
+        net.outputs = [ssd_output((3, 0.9, 0, 0, 1, 1))]
+        engine = create_engine(asynchronous=True)
+        try:
+            engine.detect(numpy.zeros((480, 640, 3), dtype=numpy.uint8))
+            engine.detect(numpy.full((480, 640, 3), 255, dtype=numpy.uint8))
+        finally:
+            engine.close()
+        assert len(net.inputs) == 2
+        # first blob has not been overwritten by the second frame
+        assert net.inputs[0] is not net.inputs[1]
+        assert net.inputs[0].max() < 0 < net.inputs[1].min()
@@ -0,0 +1,74 @@
+import PIL.Image
+import numpy
+import pytest
+
+from panasonic_camera.live_view import ExHeader1, ExHeader2, C1488o
+from robot_cameraman.detection_engine.panasonic import \
+    PanasonicCameraDetectionEngine
+from robot_cameraman.live_view import ImageSize
+
+TARGET_LABEL_ID = 5
+
+
+def create_ex_header(*rectangles) -> ExHeader1:
+    n = [C1488o(rectangle=r, color=(255, 255, 255), c=0) for r in rectangles]
+    return ExHeader1(100, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, len(n), n)
+
+
+@pytest.fixture()
+def engine():
+    return PanasonicCameraDetectionEngine(
+        target_label_id=TARGET_LABEL_ID,
+        camera_coordinates_size=ImageSize(1000, 1000))
+
+
+@pytest.fixture()
+def image():
+    return PIL.Image.new('RGB', (640, 480))
+
+
+class TestPanasonicCameraDetectionEngine:
+
+    def test_scale_rectangles_to_image_size(self, engine, image):
+        engine.on_ex_header(create_ex_header((250, 500, 500, 1000)))
+        candidates = engine.detect(image)
+        assert len(candidates) == 1
+        candidate = candidates[0]
+        assert candidate.label_id == TARGET_LABEL_ID
+        assert candidate.score == 1.0
+        assert candidate.bounding_box.coordinates() == \
+               pytest.approx((160, 240, 320, 480))
+
+    def test_scale_rectangles_to_size_of_image_array(self, engine):
+        engine.on_ex_header(create_ex_header((0, 0, 500, 500)))
+        candidates = engine.detect(numpy.zeros((240, 320, 3)))
+        assert candidates[0].bounding_box.coordinates() == \
+               pytest.approx((0, 0, 160, 120))
+
+    def test_ignore_empty_rectangles(self, engine, image):
+        engine.on_ex_header(create_ex_header(
+            (0, 0, 0, 0), (100, 100, 100, 200), (100, 100, 200, 200)))
+        candidates = engine.detect(image)
+        assert len(candidates) == 1
+        assert candidates[0].bounding_box.coordinates() == \
+               pytest.approx((64, 48, 128, 96))
+
+    def test_consume_rectangles_once(self, engine, image):
+        engine.on_ex_header(create_ex_header((0, 0, 500, 500)))
+        assert len(engine.detect(image)) == 1
+        assert len(engine.detect(image)) == 0
+
+    def test_replace_rectangles_by_ex_header_of_next_frame(
+            self, engine, image):
+        engine.on_ex_header(create_ex_header((0, 0, 500, 500)))
+        engine.on_ex_header(create_ex_header())
+        assert len(engine.detect(image)) == 0
+
+    def test_no_rectangles_in_other_ex_headers(self, engine, image):
+        engine.on_ex_header(create_ex_header((0, 0, 500, 500)))
+        engine.on_ex_header(ExHeader2(100, 0, 0, 0, 0, 0, 0, 0, 0))
+        assert len(engine.detect(image)) == 0
+
+    def test_no_ex_header(self, engine, image):
+        engine.on_ex_header(None)
+        assert len(engine.detect(image)) == 0
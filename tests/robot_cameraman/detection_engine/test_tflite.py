@@ -0,0 +1,140 @@
+import sys
+import types
+
+import PIL.Image
+import numpy
+import pytest
+
+from robot_cameraman.detection_engine.tflite import TfLiteDetectionEngine
+from robot_cameraman.live_view import ImageSize
+
+
+class FakeInterpreter:
+    """
+    Interpreter of an SSD model with post-processing (input 300x300) that
+    returns the given output tensors.
+    """
+
+    outputs = {}
+
+    def __init__(self, model_path: str, num_threads: int) -> None:
+        self.input_shape = numpy.array([1, 300, 300, 3])
+        self.input = None
+
+    def get_input_details(self):
+        return [{'index': 0, 'shape': self.input_shape,
+                 'dtype': numpy.uint8}]
+
+    def resize_tensor_input(self, index, shape):
+        self.input_shape = numpy.array(shape)
+
+    def allocate_tensors(self):
+        pass
+
+    def get_output_details(self):
+        return [{'index': index} for index in (1, 2, 3, 4)]
+
+    def set_tensor(self, index, value):
+        assert index == 0
+        self.input = value.copy()
+
+    def invoke(self):
+        pass
+
+    def get_tensor(self, index):
+        return self.outputs[index]
+
+
+def set_outputs(boxes, classes, scores, count=None):
+    FakeInterpreter.outputs = {
+        1: numpy.array([boxes], dtype=numpy.float32),
+        2: numpy.array([classes], dtype=numpy.float32),
+        3: numpy.array([scores], dtype=numpy.float32),
+        4: numpy.array([len(scores) if count is None else count],
+                       dtype=numpy.float32),
+    }
+
+
+@pytest.fixture(autouse=True)
+def fake_interpreter(monkeypatch):
+    module = types.ModuleType('tflite_runtime.interpreter')
+    module.Interpreter = FakeInterpreter
+    monkeypatch.setitem(sys.modules, 'tflite_runtime',
+                        types.ModuleType('tflite_runtime'))
+    monkeypatch.setitem(sys.modules, 'tflite_runtime.interpreter', module)
+
+
+def create_engine(confidence=0.5, max_objects=10, input_size=None,
+                  label_ids=None):
+    return TfLiteDetectionEngine(
+        model=None, confidence=confidence, max_objects=max_objects,
+        input_size=input_size, label_ids=label_ids)
+
+
+def create_image(width=600, height=300):
+    return PIL.Image.new('RGB', (width, height))
+
+
+class TestTfLiteDetectionEngine:
+
+    def test_input_size_of_model(self):
+        assert create_engine().input_size == ImageSize(300, 300)
+
+    def test_resized_input(self):
+        engine = create_engine(input_size=ImageSize(320, 240))
+        assert engine.input_size == ImageSize(320, 240)
+
+    def test_scale_image_keeping_aspect_ratio(self):
+        engine = create_engine()
+        set_outputs(boxes=[[0, 0, 1, 1]], classes=[1], scores=[0.1])
+        image = numpy.full((300, 600, 3), 255, dtype=numpy.uint8)
+        engine.detect(PIL.Image.fromarray(image))
+        model_input = engine._interpreter.input[0]
+        assert (model_input[:150] == 255).all()
+        # remaining space is black
+        assert (model_input[150:] == 0).all()
+
+    def test_decode_boxes_in_image_coordinates(self):
+        engine = create_engine()
+        # image 600x300 is scaled to 300x150, i.e. by factor 0.5
+        set_outputs(boxes=[[0.1, 0.2, 0.4, 0.6]], classes=[3], scores=[0.9])
+        candidates = engine.detect(create_image())
+        assert len(candidates) == 1
+        candidate = candidates[0]
+        assert candidate.label_id == 3
+        assert candidate.score == pytest.approx(0.9)
+        assert candidate.bounding_box.coordinates() == \
+               pytest.approx((120, 60, 360, 240))
+
+    def test_filter_by_confidence_and_count(self):
+        engine = create_engine(confidence=0.5)
+        set_outputs(
+            boxes=[[0, 0, 1, 1]] * 4,
+            classes=[1, 2, 3, 4],
+            scores=[0.9, 0.7, 0.4, 0.8],
+            count=3)
+        candidates = engine.detect(create_image())
+        assert [c.label_id for c in candidates] == [1, 2]
+
+    def test_limit_number_of_objects(self):
+        engine = create_engine(max_objects=2)
+        set_outputs(
+            boxes=[[0, 0, 1, 1]] * 3,
+            classes=[1, 2, 3],
+            scores=[0.9, 0.8, 0.7])
+        candidates = engine.detect(create_image())
+        assert [c.label_id for c in candidates] == [1, 2]
+
+    def test_filter_by_label_ids_before_limiting_number_of_objects(self):
+        engine = create_engine(max_objects=2, label_ids={0})
+        set_outputs(
+            boxes=[[0, 0, 1, 1]] * 4,
+            classes=[1, 0, 1, 0],
+            scores=[0.9, 0.8, 0.7, 0.6])
+        candidates = engine.detect(create_image())
+        assert [c.score for c in candidates] == pytest.approx([0.8, 0.6])
+
+    def test_detect_nothing(self):
+        engine = create_engine()
+        set_outputs(boxes=[[0, 0, 1, 1]], classes=[1], scores=[0.1])
+        assert len(engine.detect(create_image())) == 0
@@ -2,11 +2,12 @@ from unittest.mock import Mock
 
 import pytest
 
+from robot_cameraman import camera_controller
 from robot_cameraman.camera_controller import \
     BaseCamPathOfMotionCameraController, PointOfMotion, SpeedManager, \
     ElapsedTime, CameraState, PointOfMotionTargetSpeedCalculator, \
-    is_current_point_reached, is_angle_between
-from robot_cameraman.tracking import CameraSpeeds
+    is_current_point_reached, is_angle_between, SmoothCameraController
+from robot_cameraman.tracking import CameraSpeeds, ZoomSpeed
 from simplebgc.commands import GetAnglesInCmd
 from simplebgc.gimbal import Gimbal, ControlMode
 from simplebgc.units import from_degree, from_degree_per_sec
@@ -659,6 +660,73 @@ class TestBaseCamPathOfMotionCameraController:
             pitch_angle=second_point.tilt_angle)
 
 
+class TestSmoothCameraControllerStop:
+    @pytest.fixture()
+    def clock(self, monkeypatch):
+        current_time = [0.0]
+
+        def sleep(seconds):
+            current_time[0] += seconds
+
+        monkeypatch.setattr(camera_controller, 'time',
+                            lambda: current_time[0])
+        monkeypatch.setattr(camera_controller, 'sleep', sleep)
+        return current_time
+
+    @pytest.fixture()
+    def gimbal(self):
+        return Mock(spec=Gimbal(Mock()))
+
+    @pytest.fixture()
+    def camera_manager(self):
+        camera_manager = Mock()
+        camera_manager.camera = Mock()
+        return camera_manager
+
+    def create_controller(self, clock, gimbal, camera_manager, **kwargs):
+        controller = SmoothCameraController(
+            gimbal, camera_manager,
+            rotate_speed_manager=SpeedManager(10),
+            tilt_speed_manager=SpeedManager(10),
+            control_rate=10,
+            **kwargs)
+        controller.start()
+        # accelerate to 1°/s
+        clock[0] += 0.1
+        controller.update(CameraSpeeds(pan_speed=10, tilt_speed=0,
+                                       zoom_speed=ZoomSpeed.ZOOM_IN_FAST))
+        gimbal.control.reset_mock()
+        camera_manager.camera.reset_mock()
+        return controller
+
+    def test_ramp_down_at_control_rate(self, clock, gimbal, camera_manager):
+        controller = self.create_controller(clock, gimbal, camera_manager)
+        assert controller.is_camera_moving()
+        controller.stop(CameraSpeeds())
+        assert not controller.is_camera_moving()
+        # from 1°/s to 0°/s with 10°/s² in steps of 0.1s
+        assert gimbal.control.call_count == 2
+        assert controller.last_stop_duration == pytest.approx(0.1)
+        assert camera_manager.camera.zoom_stop.call_count == 1
+
+    def test_stop_immediately_after_timeout(
+            self, clock, gimbal, camera_manager):
+        controller = self.create_controller(clock, gimbal, camera_manager,
+                                            stop_timeout=0.05)
+        controller.stop(CameraSpeeds())
+        assert not controller.is_camera_moving()
+        assert controller.last_stop_duration == pytest.approx(0.1)
+        gimbal.control.assert_called_with(yaw_speed=0, pitch_speed=0)
+
+    def test_firmware_stop_ramp(self, clock, gimbal, camera_manager):
+        controller = self.create_controller(clock, gimbal, camera_manager,
+                                            is_firmware_stop_ramp=True)
+        controller.stop(CameraSpeeds())
+        assert not controller.is_camera_moving()
+        assert controller.last_stop_duration == 0
+        gimbal.control.assert_called_once_with(yaw_speed=0, pitch_speed=0)
+
+
 class TestPointOfMotionTargetSpeedCalculator:
     @pytest.fixture()
     def max_pan_speed(self):
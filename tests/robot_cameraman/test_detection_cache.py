@@ -0,0 +1,102 @@
+from pathlib import Path
+from unittest.mock import Mock
+
+import numpy
+import pytest
+
+from robot_cameraman.detection_cache import DetectionCache, \
+    CachedVideoDetector
+from robot_cameraman.image_detection import DetectionBatch, DetectionEngine
+
+
+@pytest.fixture()
+def video(tmp_path: Path) -> Path:
+    video = tmp_path / 'video.avi'
+    video.write_bytes(b'video content')
+    return video
+
+
+def create_cache(directory: Path, video: Path, confidence: float = 0.5) \
+        -> DetectionCache:
+    return DetectionCache(
+        directory=directory,
+        video=video,
+        engine_name='EdgeTPU',
+        model=Path('missing-model.tflite'),
+        confidence=confidence,
+        max_objects=10)
+
+
+def create_batch(*label_ids: int) -> DetectionBatch:
+    return DetectionBatch.from_arrays(
+        label_ids=numpy.array(label_ids),
+        scores=0.9,
+        coordinates=numpy.array(
+            [[i, i, i + 10, i + 20] for i in label_ids], dtype=float))
+
+
+class TestDetectionCache:
+
+    def test_save_and_load(self, tmp_path: Path, video: Path):
+        cache = create_cache(tmp_path / 'cache', video)
+        cache.put(1, create_batch(1, 2))
+        cache.put(3, create_batch())
+        cache.put(2, create_batch(3))
+        cache.save()
+        assert cache.file.exists()
+
+        loaded_cache = create_cache(tmp_path / 'cache', video)
+        assert loaded_cache.file == cache.file
+        for frame_index in (1, 2, 3):
+            assert numpy.array_equal(
+                loaded_cache.get(frame_index).array,
+                cache.get(frame_index).array)
+        assert loaded_cache.get(4) is None
+
+    def test_do_not_save_unmodified_cache(self, tmp_path: Path, video: Path):
+        cache = create_cache(tmp_path, video)
+        cache.save()
+        assert not cache.file.exists()
+
+    def test_separate_files_per_parameters(
+            self, tmp_path: Path, video: Path):
+        assert create_cache(tmp_path, video, confidence=0.5).file \
+               != create_cache(tmp_path, video, confidence=0.6).file
+
+    def test_separate_files_per_video_content(
+            self, tmp_path: Path, video: Path):
+        file = create_cache(tmp_path, video).file
+        video.write_bytes(b'other video content')
+        assert create_cache(tmp_path, video).file != file
+
+
+class TestCachedVideoDetector:
+
+    def test_detect_without_cache(self):
+        engine = Mock(spec=DetectionEngine)
+        engine.detect.return_value = create_batch(1)
+        detector = CachedVideoDetector(None, lambda: engine)
+        assert detector.detect(1, 'image') is engine.detect.return_value
+        assert detector.save() == (0, 1)
+
+    def test_hit_and_miss(self, tmp_path: Path, video: Path):
+        cache = create_cache(tmp_path, video)
+        cached_batch = create_batch(1)
+        cache.put(1, cached_batch)
+        engine = Mock(spec=DetectionEngine)
+        engine.detect.return_value = create_batch(2)
+        create_detection_engine = Mock(return_value=engine)
+        detector = CachedVideoDetector(cache, create_detection_engine)
+
+        assert detector.detect(1, 'image 1') is cached_batch
+        create_detection_engine.assert_not_called()
+
+        assert detector.detect(2, 'image 2') is engine.detect.return_value
+        engine.detect.assert_called_once_with('image 2')
+        assert cache.get(2) is engine.detect.return_value
+
+        # engine is only created once
+        detector.detect(3, 'image 3')
+        create_detection_engine.assert_called_once()
+        assert detector.save() == (1, 2)
+        assert cache.file.exists()
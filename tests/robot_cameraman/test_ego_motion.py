@@ -0,0 +1,67 @@
+import pytest
+
+from robot_cameraman.camera_controller import SpeedManager
+from robot_cameraman.ego_motion import EgoMotion
+from robot_cameraman.live_view import ImageSize
+
+
+@pytest.fixture()
+def pan_speed_manager():
+    return SpeedManager()
+
+
+@pytest.fixture()
+def ego_motion(pan_speed_manager):
+    return EgoMotion(
+        image_size=ImageSize(640, 480),
+        horizontal_field_of_view=90,
+        pan_speed_manager=pan_speed_manager,
+        tilt_speed_manager=SpeedManager())
+
+
+def test_no_motion_in_first_frame(ego_motion, pan_speed_manager):
+    pan_speed_manager.current_speed = 10
+    assert ego_motion.image_motion(timestamp=5) == (0, 0, 1)
+
+
+def test_motion_since_timestamp_of_previous_frame(
+        ego_motion, pan_speed_manager):
+    ego_motion.image_motion(timestamp=5)
+    pan_speed_manager.current_speed = 10
+    motion = ego_motion.image_motion(timestamp=5.5)
+    assert motion.dx == pytest.approx(
+        -10 * 0.5 * ego_motion.pixels_per_degree())
+    assert motion.dy == 0
+    # frame with the same timestamp did not move
+    assert ego_motion.image_motion(timestamp=5.5).dx == 0
+
+
+def test_zoom_since_previous_frame(ego_motion):
+    ego_motion.image_motion(timestamp=0)
+    ego_motion.on_zoom_ratio(2.0)
+    assert ego_motion.image_motion(timestamp=1).scale == 2.0
+    assert ego_motion.image_motion(timestamp=2).scale == 1.0
+
+
+def test_velocity(ego_motion, pan_speed_manager):
+    pan_speed_manager.current_speed = 10
+    vx, vy = ego_motion.velocity()
+    assert vx == pytest.approx(-10 * ego_motion.pixels_per_degree())
+    assert vy == 0
+
+
+def test_velocity_of_measured_speeds(pan_speed_manager):
+    measured_speeds = None
+    ego_motion = EgoMotion(
+        image_size=ImageSize(640, 480),
+        horizontal_field_of_view=90,
+        pan_speed_manager=pan_speed_manager,
+        tilt_speed_manager=SpeedManager(),
+        measured_speeds=lambda: measured_speeds)
+    pan_speed_manager.current_speed = 10
+    pixels_per_degree = ego_motion.pixels_per_degree()
+    # speeds of speed managers are used, if no speeds are measured
+    assert ego_motion.velocity() == (-10 * pixels_per_degree, 0)
+    measured_speeds = (8, -2)
+    assert ego_motion.velocity() == (-8 * pixels_per_degree,
+                                     2 * pixels_per_degree)
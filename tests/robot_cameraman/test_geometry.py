@@ -0,0 +1,48 @@
+import numpy
+
+from robot_cameraman import geometry
+from robot_cameraman.box import Box, Point
+from robot_cameraman.geometry import Rectangle
+
+
+def test_intersection_area():
+    box = Box.from_coordinates(0, 0, 10, 10)
+    assert geometry.intersection_area(
+        box, Box.from_coordinates(5, 5, 20, 20)) == 25
+    assert geometry.intersection_area(
+        box, Box.from_coordinates(10, 0, 20, 10)) == 0
+    assert geometry.intersection_area(
+        box, Box.from_coordinates(20, 20, 30, 30)) == 0
+
+
+def test_functions_accept_rectangles():
+    rectangle = Rectangle.from_coordinates(10, 10, 0, 0)
+    assert rectangle == Rectangle(0, 0, 10, 10)
+    assert (rectangle.center_x, rectangle.center_y) == (5, 5)
+    assert geometry.percental_intersection_area(
+        rectangle, Box.from_coordinates(5, 0, 10, 10)) == 1
+    assert geometry.contains_point(rectangle, 10, 0)
+    assert not geometry.contains_point(rectangle, 10.5, 0)
+
+
+def test_box_center_is_created_on_access():
+    box = Box.from_coordinates(2, 4, 12, 8)
+    assert box.center == Point(7, 6)
+    assert box.center is box.center
+
+
+def test_box_center_of_reversed_coordinates():
+    box = Box.from_coordinates(10, 8, 4, 4)
+    assert (box.x, box.y, box.width, box.height) == (10, 8, 6, 4)
+    assert box.center == Point(7, 6)
+
+
+def test_batched_functions():
+    coordinates = numpy.array([[0, 0, 10, 10],
+                               [5, 5, 20, 20]], dtype=float)
+    assert geometry.areas(coordinates).tolist() == [100, 225]
+    assert geometry.centers(coordinates).tolist() == [[5, 5], [12.5, 12.5]]
+    assert geometry.intersection_areas(coordinates).tolist() == [[100, 25],
+                                                                 [25, 225]]
+    assert geometry.contains_points(
+        coordinates, numpy.array([[10, 10], [0, 0]])).tolist() == [True, False]
@@ -0,0 +1,153 @@
+import time
+from concurrent.futures import Future
+from unittest.mock import Mock
+
+import pytest
+
+from robot_cameraman import gimbal as gimbal_module
+from robot_cameraman.gimbal import CoalescingGimbal, \
+    PipelinedSimpleBgcGimbal
+from simplebgc.commands import GetAnglesInCmd
+from simplebgc.data_stream import GimbalState
+from simplebgc.gimbal import Gimbal, ControlMode
+from simplebgc.units import from_degree_per_sec
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(gimbal_module, 'time', clock)
+    return clock
+
+
+@pytest.fixture()
+def decorated_gimbal():
+    return Mock(spec=Gimbal(Mock()))
+
+
+@pytest.fixture()
+def gimbal(decorated_gimbal):
+    return CoalescingGimbal(decorated_gimbal, keep_alive_interval=1.0)
+
+
+class TestCoalescingGimbal:
+
+    def test_send_changed_commands(self, clock, decorated_gimbal, gimbal):
+        gimbal.control(yaw_speed=10, pitch_speed=2)
+        gimbal.control(yaw_speed=11, pitch_speed=2)
+        assert decorated_gimbal.control.call_count == 2
+        assert gimbal.statistics.sent == 2
+        assert gimbal.statistics.suppressed == 0
+
+    def test_suppress_duplicate_command(self, clock, decorated_gimbal,
+                                        gimbal):
+        gimbal.control(yaw_speed=10, pitch_speed=2)
+        clock.now = 0.1
+        gimbal.control(yaw_speed=10, pitch_speed=2)
+        decorated_gimbal.control.assert_called_once()
+        assert gimbal.statistics.suppressed == 1
+
+    def test_suppress_change_below_protocol_resolution(
+            self, clock, decorated_gimbal, gimbal):
+        gimbal.control(yaw_speed=10)
+        gimbal.control(yaw_speed=10.01)
+        decorated_gimbal.control.assert_called_once()
+
+    def test_send_changed_mode(self, clock, decorated_gimbal, gimbal):
+        gimbal.control(yaw_mode=ControlMode.speed, yaw_angle=10)
+        gimbal.control(yaw_mode=ControlMode.angle, yaw_angle=10)
+        assert decorated_gimbal.control.call_count == 2
+
+    def test_keep_alive(self, clock, decorated_gimbal, gimbal):
+        gimbal.control(yaw_speed=10)
+        clock.now = 0.9
+        gimbal.control(yaw_speed=10)
+        assert decorated_gimbal.control.call_count == 1
+        clock.now = 1.0
+        gimbal.control(yaw_speed=10)
+        assert decorated_gimbal.control.call_count == 2
+        clock.now = 1.5
+        gimbal.control(yaw_speed=10)
+        assert decorated_gimbal.control.call_count == 2
+
+    def test_no_keep_alive(self, clock, decorated_gimbal):
+        gimbal = CoalescingGimbal(decorated_gimbal, keep_alive_interval=None)
+        gimbal.control(yaw_speed=10)
+        clock.now = 100
+        gimbal.control(yaw_speed=10)
+        decorated_gimbal.control.assert_called_once()
+
+    def test_resend_after_failed_command(self, clock, decorated_gimbal,
+                                         gimbal):
+        decorated_gimbal.control.side_effect = [IOError, None]
+        with pytest.raises(IOError):
+            gimbal.control(yaw_speed=10)
+        gimbal.control(yaw_speed=10)
+        assert decorated_gimbal.control.call_count == 2
+        assert gimbal.statistics.sent == 1
+
+    def test_resend_after_stop(self, clock, decorated_gimbal, gimbal):
+        gimbal.control(yaw_speed=0)
+        gimbal.stop()
+        gimbal.control(yaw_speed=0)
+        decorated_gimbal.stop.assert_called_once()
+        assert decorated_gimbal.control.call_count == 2
+
+    def test_resend_command_after_failure(
+            self, clock, decorated_gimbal, gimbal):
+        future = Future()
+        decorated_gimbal.control.return_value = future
+        gimbal.control(yaw_speed=10)
+        future.set_exception(TimeoutError('no confirmation'))
+        gimbal.control(yaw_speed=10)
+        assert decorated_gimbal.control.call_count == 2
+
+    def test_resend_command_that_already_failed(
+            self, clock, decorated_gimbal, gimbal):
+        future = Future()
+        future.set_exception(TimeoutError('no confirmation'))
+        decorated_gimbal.control.return_value = future
+        gimbal.control(yaw_speed=10)
+        gimbal.control(yaw_speed=10)
+        assert decorated_gimbal.control.call_count == 2
+
+    def test_suppress_duplicate_of_confirmed_command(
+            self, clock, decorated_gimbal, gimbal):
+        future = Future()
+        decorated_gimbal.control.return_value = future
+        gimbal.control(yaw_speed=10)
+        future.set_result('confirmation')
+        gimbal.control(yaw_speed=10)
+        decorated_gimbal.control.assert_called_once()
+
+    def test_failure_of_previous_command_is_ignored(
+            self, clock, decorated_gimbal, gimbal):
+        first = Future()
+        decorated_gimbal.control.return_value = first
+        gimbal.control(yaw_speed=10)
+        decorated_gimbal.control.return_value = Future()
+        gimbal.control(yaw_speed=11)
+        first.set_exception(TimeoutError('no confirmation'))
+        gimbal.control(yaw_speed=11)
+        assert decorated_gimbal.control.call_count == 2
+
+
+def test_speeds_of_streamed_state():
+    gimbal = PipelinedSimpleBgcGimbal(Mock())
+    assert gimbal.speeds() is None
+    # imu_angle_1, target_angle_1, target_speed_1, imu_angle_2, ...
+    angles = GetAnglesInCmd(0, 0, 0,
+                            0, 0, from_degree_per_sec(-4),
+                            0, 0, from_degree_per_sec(20))
+    gimbal.angles_stream = Mock(latest=GimbalState(time.time(), angles))
+    pan_speed, tilt_speed = gimbal.speeds()
+    assert pan_speed == pytest.approx(20, abs=0.2)
+    assert tilt_speed == pytest.approx(-4, abs=0.2)
@@ -0,0 +1,67 @@
+import numpy
+import pytest
+
+from robot_cameraman.box import Box
+from robot_cameraman.image_detection import DetectionBatch, \
+    DetectionCandidate
+
+
+@pytest.fixture()
+def batch():
+    return DetectionBatch.from_arrays(
+        label_ids=numpy.array([0, 1, 0]),
+        scores=numpy.array([0.5, 0.75, 0.25]),
+        coordinates=numpy.array([[0, 0, 10, 10],
+                                 [10, 20, 30, 40],
+                                 [5, 5, 15, 25]]))
+
+
+def test_empty_batch():
+    batch = DetectionBatch()
+    assert len(batch) == 0
+    assert list(batch) == []
+    assert batch.coordinates().shape == (0, 4)
+
+
+def test_candidate_views(batch):
+    assert len(batch) == 3
+    candidate = batch[1]
+    assert candidate.label_id == 1
+    assert candidate.score == 0.75
+    assert candidate.bounding_box.coordinates() == [10, 20, 30, 40]
+    assert [c.label_id for c in batch] == [0, 1, 0]
+
+
+def test_filter_by_label_id(batch):
+    filtered = batch.filter(label_id=0)
+    assert len(filtered) == 2
+    assert filtered.coordinates().tolist() == [[0, 0, 10, 10],
+                                               [5, 5, 15, 25]]
+
+
+def test_filter_by_label_id_and_score(batch):
+    filtered = batch.filter(label_id=0, min_score=0.5)
+    assert len(filtered) == 1
+    assert filtered[0].score == 0.5
+
+
+def test_filter_by_label_ids(batch):
+    assert batch.filter(label_ids={0, 1}) is batch
+    assert batch.filter(label_ids={1}).label_ids.tolist() == [1]
+    assert len(batch.filter(label_ids=set())) == 0
+
+
+def test_from_candidates():
+    candidates = [
+        DetectionCandidate(label_id=2, score=1.0,
+                           bounding_box=Box.from_coordinates(1, 2, 3, 4))]
+    batch = DetectionBatch.from_candidates(candidates)
+    assert batch.label_ids.tolist() == [2]
+    assert batch.coordinates().tolist() == [[1, 2, 3, 4]]
+    assert batch[0] is candidates[0]
+
+
+def test_concatenate(batch):
+    concatenated = DetectionBatch.concatenate([batch, DetectionBatch(), batch])
+    assert len(concatenated) == 6
+    assert concatenated.label_ids.tolist() == [0, 1, 0, 0, 1, 0]
@@ -0,0 +1,85 @@
+import numpy
+import pytest
+
+from robot_cameraman import motion_gate as motion_gate_module
+from robot_cameraman.motion_gate import MotionGate
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(motion_gate_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture()
+def motion_gate(clock):
+    return MotionGate(sensitivity=10, refresh_interval=2.0)
+
+
+def create_image(x: int = 100, gray_value: int = 128) -> numpy.ndarray:
+    """Gray image (640x480) with a white square at the given position."""
+    image = numpy.full((480, 640, 3), gray_value, dtype=numpy.uint8)
+    image[200:280, x:x + 80] = 255
+    return image
+
+
+class TestMotionGate:
+
+    def test_detect_first_frame(self, motion_gate):
+        assert motion_gate.is_detection_required(create_image(), False)
+
+    def test_skip_static_frame(self, motion_gate):
+        motion_gate.is_detection_required(create_image(), False)
+        assert not motion_gate.is_detection_required(create_image(), False)
+        assert motion_gate.detected_frames == 1
+        assert motion_gate.skipped_frames == 1
+
+    def test_ignore_noise(self, motion_gate):
+        motion_gate.is_detection_required(create_image(), False)
+        rng = numpy.random.default_rng(0)
+        noise = rng.integers(-5, 6, (480, 640, 3))
+        noisy_image = numpy.clip(create_image() + noise, 0, 255) \
+            .astype(numpy.uint8)
+        assert not motion_gate.is_detection_required(noisy_image, False)
+
+    def test_detect_changed_frame(self, motion_gate):
+        motion_gate.is_detection_required(create_image(x=100), False)
+        assert motion_gate.is_detection_required(create_image(x=300), False)
+
+    def test_compare_with_frame_of_last_detection(self, motion_gate):
+        motion_gate.is_detection_required(create_image(x=100), False)
+        is_detection_required = [
+            motion_gate.is_detection_required(create_image(x=x), False)
+            for x in range(101, 110)]
+        # a single step of one pixel is not detected as change,
+        # but small changes accumulate till the gate opens
+        assert not is_detection_required[0]
+        assert True in is_detection_required
+        # the detected frame becomes the new reference
+        opened = is_detection_required.index(True)
+        assert not is_detection_required[opened + 1]
+        assert motion_gate.is_detection_required(create_image(x=300), False)
+        assert not motion_gate.is_detection_required(
+            create_image(x=300), False)
+
+    def test_detect_while_camera_is_moving(self, motion_gate):
+        motion_gate.is_detection_required(create_image(), False)
+        assert motion_gate.is_detection_required(create_image(), True)
+
+    def test_refresh_interval(self, motion_gate, clock):
+        motion_gate.is_detection_required(create_image(), False)
+        clock.now = 1.9
+        assert not motion_gate.is_detection_required(create_image(), False)
+        clock.now = 2.0
+        assert motion_gate.is_detection_required(create_image(), False)
+        clock.now = 3.0
+        assert not motion_gate.is_detection_required(create_image(), False)
@@ -0,0 +1,88 @@
+from unittest.mock import Mock
+
+import numpy
+import pytest
+
+from robot_cameraman import motion_planning
+from robot_cameraman.camera_controller import PointOfMotion, SpeedManager
+from robot_cameraman.motion_planning import minimum_duration, plan_profile, \
+    plan_path, PlannedPathOfMotionCameraController
+from robot_cameraman.tracking import CameraSpeeds
+from simplebgc.commands import GetAnglesInCmd
+from simplebgc.gimbal import Gimbal
+from simplebgc.units import from_degree
+
+
+def test_minimum_duration():
+    # triangular profile: accelerate 1s to 10°/s and decelerate 1s
+    assert minimum_duration(10, 10, 100) == pytest.approx(2)
+    # trapezoidal profile: 0.5s acceleration, 0.5s deceleration, 0.5s cruise
+    assert minimum_duration(5, 10, 5) == pytest.approx(1.5)
+    assert minimum_duration(0, 10, 5) == 0
+
+
+def test_profile_lands_on_time():
+    profile = plan_profile(10, -90, duration=6, acceleration=60,
+                           max_speed=60)
+    times = numpy.linspace(0, 6, 601)
+    speeds = numpy.array([profile.speed(t) for t in times])
+    assert profile.position(6) == pytest.approx(-80)
+    assert profile.speed(0) == pytest.approx(0)
+    assert profile.speed(6) == pytest.approx(0)
+    assert numpy.all(numpy.abs(numpy.diff(speeds)) <= 60 * 0.01 + 1e-9)
+    # cruise speed exceeds the average speed of 15°/s
+    assert numpy.max(numpy.abs(speeds)) > 15
+
+
+def test_path_is_blended_through_points_in_same_direction():
+    plan = plan_path(
+        [PointOfMotion(pan_angle=0, tilt_angle=0),
+         PointOfMotion(pan_angle=180, tilt_angle=10, time=6),
+         PointOfMotion(pan_angle=270, tilt_angle=10, time=3)],
+        pan_acceleration=60, tilt_acceleration=12)
+    assert plan.duration == pytest.approx(9)
+    at_point = plan.sample(6)
+    assert at_point.pan_angle == pytest.approx(180)
+    assert at_point.pan_speed == pytest.approx(30)
+    assert at_point.tilt_angle == pytest.approx(10)
+    assert at_point.tilt_speed == pytest.approx(0)
+    end = plan.sample(9)
+    assert end.pan_angle == pytest.approx(270)
+    assert end.pan_speed == pytest.approx(0)
+
+
+def test_path_with_multiple_turns_and_zoom():
+    plan = plan_path(
+        [PointOfMotion(pan_angle=90),
+         PointOfMotion(pan_angle=90, pan_clockwise=False, pan_turns=2,
+                       time=20, zoom_factor=4.0)],
+        pan_acceleration=60, tilt_acceleration=12)
+    assert plan.sample(20).pan_angle == pytest.approx(90 - 720)
+    assert plan.sample(10).zoom_ratio == pytest.approx(2)
+    assert plan.sample(20).zoom_ratio == pytest.approx(4)
+
+
+def test_controller_follows_plan(monkeypatch):
+    current_time = [0.0]
+    monkeypatch.setattr(motion_planning, 'time', lambda: current_time[0])
+    gimbal = Mock(spec=Gimbal(Mock()))
+    gimbal.get_angles = Mock(return_value=GetAnglesInCmd(
+        imu_angle_1=0, target_angle_1=0, target_speed_1=0,
+        imu_angle_2=0, target_angle_2=0, target_speed_2=0,
+        imu_angle_3=0, target_angle_3=from_degree(0), target_speed_3=0))
+    controller = PlannedPathOfMotionCameraController(
+        gimbal, SpeedManager(60), SpeedManager(12))
+    controller.add_point(PointOfMotion(pan_angle=90, time=3))
+    controller.start()
+    camera_speeds = CameraSpeeds()
+    current_time[0] = 1.5
+    controller.update(camera_speeds)
+    expected = controller.plan.sample(1.5)
+    assert expected.pan_angle == pytest.approx(45)
+    # speed is corrected, since the gimbal did not move
+    assert camera_speeds.pan_speed == pytest.approx(expected.pan_speed + 45)
+    assert not controller.is_end_of_path_reached()
+    current_time[0] = 3
+    controller.update(camera_speeds)
+    assert controller.is_end_of_path_reached()
+    assert camera_speeds.pan_speed == 0
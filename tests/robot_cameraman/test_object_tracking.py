@@ -1,13 +1,23 @@
 import pytest
 
 from robot_cameraman.box import Box, Point
+from robot_cameraman.camera_controller import SpeedManager
+from robot_cameraman.ego_motion import EgoMotion
 from robot_cameraman.image_detection import DetectionCandidate
-from robot_cameraman.object_tracking import ObjectTracker
+from robot_cameraman.live_view import ImageSize
+from robot_cameraman.object_tracking import ObjectTracker, \
+    AssignmentObjectTracker, KalmanObjectTracker
+
+
+@pytest.fixture(
+    params=[ObjectTracker, AssignmentObjectTracker, KalmanObjectTracker])
+def object_tracker_class(request):
+    return request.param
 
 
 @pytest.fixture()
-def object_tracker():
-    return ObjectTracker()
+def object_tracker(object_tracker_class):
+    return object_tracker_class()
 
 
 @pytest.fixture()
@@ -67,8 +77,8 @@ def test_candidate_is_updated(
 
 
 def test_candidate_is_deregistered_if_max_disappeared_is_exceeded(
-        first_object_id):
-    object_tracker = ObjectTracker(max_disappeared=1)
+        object_tracker_class, first_object_id):
+    object_tracker = object_tracker_class(max_disappeared=1)
     assert not object_tracker.is_registered(first_object_id)
     c0 = make_candidate_from_coordinates(0, 0, 10, 10)
     candidates = object_tracker.update([c0])
@@ -169,6 +179,108 @@ def test_non_overlapping_candidate_differs_too_much_in_size_to_be_same_object(
                                             first_object_id, second_object_id)
 
 
+def test_assignment_tracker_keeps_candidates_with_same_center(
+        first_object_id, second_object_id):
+    object_tracker = AssignmentObjectTracker()
+    c0 = make_candidate_from_center_and_size(Point(50, 50), 10, 10)
+    c1 = make_candidate_from_center_and_size(Point(50, 50), 30, 30)
+    candidates = object_tracker.update([c0, c1])
+    assert candidates == {first_object_id: c0, second_object_id: c1}
+    candidates = object_tracker.update([c1, c0])
+    assert candidates == {first_object_id: c0, second_object_id: c1}
+
+
+def test_kalman_tracker_predicts_moving_object(first_object_id):
+    object_tracker = KalmanObjectTracker()
+    for t in range(10):
+        c = make_candidate_from_center_and_size(Point(10 + 50 * t, 10), 10, 10)
+        candidates = object_tracker.update([c], timestamp=t)
+        assert list(candidates) == [first_object_id]
+    velocity = object_tracker.velocity(first_object_id)
+    assert velocity.x == pytest.approx(50, abs=1)
+    assert velocity.y == pytest.approx(0, abs=1)
+    box = object_tracker.predicted_box(first_object_id, timestamp=10)
+    assert box.center.x == pytest.approx(510, abs=2)
+    assert box.center.y == pytest.approx(10, abs=1)
+    assert box.width == pytest.approx(10, abs=1)
+
+
+def test_velocity_is_not_estimated_by_centroid_tracker(first_object_id):
+    object_tracker = ObjectTracker()
+    object_tracker.update(
+        [make_candidate_from_center_and_size(Point(10, 10), 10, 10)])
+    assert object_tracker.velocity(first_object_id) is None
+
+
+def test_kalman_tracker_velocity_in_image_of_panning_camera(first_object_id):
+    pan_speed_manager = SpeedManager()
+    ego_motion = EgoMotion(
+        image_size=ImageSize(640, 480),
+        horizontal_field_of_view=90,
+        pan_speed_manager=pan_speed_manager,
+        tilt_speed_manager=SpeedManager())
+    object_tracker = KalmanObjectTracker(ego_motion=ego_motion)
+    pan_speed_manager.current_speed = 10
+    image_vx, _ = ego_motion.velocity()
+    # static object moves in the image, since the camera pans
+    for t in range(10):
+        c = make_candidate_from_center_and_size(
+            Point(600 + image_vx * t, 240), 20, 20)
+        object_tracker.update([c], timestamp=t)
+    velocity = object_tracker.velocity(first_object_id)
+    assert velocity.x == pytest.approx(image_vx, abs=1)
+    assert velocity.y == pytest.approx(0, abs=1)
+
+
+def test_kalman_tracker_keeps_identity_during_occlusion(first_object_id):
+    object_tracker = KalmanObjectTracker()
+    for t in range(10):
+        c = make_candidate_from_center_and_size(Point(10 + 90 * t, 10), 10, 10)
+        object_tracker.update([c], timestamp=t)
+    # object is not detected for 5 frames, but keeps moving
+    for t in range(10, 15):
+        assert object_tracker.update([], timestamp=t) == {}
+    # object is further away from its last position than the distance limit
+    c = make_candidate_from_center_and_size(Point(10 + 90 * 15, 10), 10, 10)
+    assert object_tracker.update([c], timestamp=15) == {first_object_id: c}
+
+
+@pytest.mark.parametrize(
+    'object_tracker_class', [AssignmentObjectTracker, KalmanObjectTracker])
+def test_ego_motion_of_panning_camera_is_compensated(
+        object_tracker_class, first_object_id):
+    pan_speed_manager = SpeedManager()
+    ego_motion = EgoMotion(
+        image_size=ImageSize(640, 480),
+        horizontal_field_of_view=90,
+        pan_speed_manager=pan_speed_manager,
+        tilt_speed_manager=SpeedManager())
+    object_tracker = object_tracker_class(ego_motion=ego_motion)
+    c0 = make_candidate_from_center_and_size(Point(400, 240), 20, 20)
+    object_tracker.update([c0], timestamp=0)
+    # 320 pixels per 45 degree, i.e. the object moves about 200 pixels left
+    pan_speed_manager.current_speed = 28
+    c1 = make_candidate_from_center_and_size(Point(200, 240), 20, 20)
+    assert object_tracker.update([c1], timestamp=1) == {first_object_id: c1}
+
+
+@pytest.mark.parametrize(
+    'object_tracker_class', [AssignmentObjectTracker, KalmanObjectTracker])
+def test_ego_motion_of_zooming_camera_is_compensated(
+        object_tracker_class, first_object_id):
+    ego_motion = EgoMotion(
+        image_size=ImageSize(640, 480),
+        horizontal_field_of_view=90,
+        pan_speed_manager=SpeedManager(),
+        tilt_speed_manager=SpeedManager())
+    object_tracker = object_tracker_class(ego_motion=ego_motion)
+    c0 = make_candidate_from_center_and_size(Point(420, 240), 20, 20)
+    object_tracker.update([c0], timestamp=0)
+    ego_motion.on_zoom_ratio(3.0)
+    c1 = make_candidate_from_center_and_size(Point(620, 240), 60, 60)
+    assert object_tracker.update([c1], timestamp=1) == {first_object_id: c1}
+
+
 def assert_candidates_are_different_objects(
         object_tracker: ObjectTracker,
         c0: DetectionCandidate,
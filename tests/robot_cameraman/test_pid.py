@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from robot_cameraman.box import Box, Point
+from robot_cameraman.live_view import ImageSize
+from robot_cameraman.pid import PidGains, PidController, SimulatedAxis, \
+    autotune, step_target, ramp_target, \
+    integral_of_time_weighted_absolute_error
+from robot_cameraman.tracking import Destination, CameraSpeeds, \
+    PidTrackingStrategy
+
+
+def test_proportional_output_is_limited():
+    controller = PidController(PidGains(proportional=10), output_limit=5)
+    assert controller.update(0.2, 0.1) == pytest.approx(2)
+    assert controller.update(1, 0.1) == pytest.approx(5)
+    assert controller.update(-1, 0.1) == pytest.approx(-5)
+
+
+def test_integral_does_not_wind_up_while_saturated():
+    controller = PidController(PidGains(proportional=1, integral=1),
+                               output_limit=2)
+    for _ in range(100):
+        controller.update(1, 0.1)
+    assert controller.integral == pytest.approx(1)
+    # output decreases as soon as the error changes its sign
+    assert controller.update(-0.5, 0.1) < 1
+
+
+def test_integral_does_not_wind_up_if_acceleration_is_limited():
+    controller = PidController(PidGains(proportional=1, integral=10),
+                               output_limit=100)
+    for _ in range(10):
+        controller.update(1, 0.1, max_output_change=1)
+    assert controller.integral == pytest.approx(0)
+
+
+def test_derivative_is_filtered():
+    controller = PidController(PidGains(proportional=0, derivative=1),
+                               derivative_time_constant=0.1)
+    controller.update(0, 0.1)
+    # raw derivative is 10, but filtered derivative only reaches half of it
+    assert controller.update(1, 0.1) == pytest.approx(5)
+    assert controller.update(1, 0.1) == pytest.approx(2.5)
+
+
+def test_autotune_reduces_error():
+    axis = SimulatedAxis()
+    targets = [step_target(), ramp_target()]
+    initial_gains = PidGains()
+    gains = autotune(axis, targets, initial_gains, iterations=20)
+
+    def cost(g):
+        return sum(integral_of_time_weighted_absolute_error(
+            axis.simulate(g, t), axis.time_step) for t in targets)
+
+    assert cost(gains) < cost(initial_gains) / 2
+
+
+def test_gains_are_scaled_by_zoom_ratio(monkeypatch):
+    monkeypatch.setattr(time, 'time', lambda: 0)
+    image_size = ImageSize(640, 480)
+    strategy = PidTrackingStrategy(
+        Destination(image_size), image_size,
+        pan_gains=PidGains(proportional=10),
+        tilt_gains=PidGains(proportional=10),
+        max_allowed_speed=100)
+    target = Box.from_center_and_size(Point(480, 240), 40, 40)
+    speeds = CameraSpeeds()
+    strategy.update(speeds, target, False)
+    assert speeds.pan_speed == pytest.approx(5)
+    assert speeds.tilt_speed == pytest.approx(0)
+    strategy.on_zoom_ratio(2)
+    strategy.update(speeds, target, False)
+    assert speeds.pan_speed == pytest.approx(2.5)
@@ -0,0 +1,153 @@
+import numpy
+import pytest
+
+from robot_cameraman.box import Box
+from robot_cameraman.image_detection import DetectionCandidate
+from robot_cameraman.object_tracking import ObjectTracker
+from robot_cameraman.reidentification import AppearanceReIdentifier, \
+    AppearanceGallery, appearance_embedding
+
+RED = (200, 30, 30)
+BLUE = (30, 30, 200)
+GREEN = (30, 200, 30)
+
+
+def make_image(*boxes_and_colors):
+    image = numpy.zeros((480, 640, 3), dtype=numpy.uint8)
+    for (x1, y1, x2, y2), color in boxes_and_colors:
+        image[y1:y2, x1:x2] = color
+    return image
+
+
+def make_candidate(x1, y1, x2, y2):
+    return DetectionCandidate(label_id=0, score=1,
+                              bounding_box=Box.from_coordinates(x1, y1, x2, y2))
+
+
+@pytest.fixture()
+def object_tracker():
+    return ObjectTracker(max_disappeared=0)
+
+
+@pytest.fixture()
+def re_identifier(object_tracker):
+    return AppearanceReIdentifier(object_tracker, max_age=10)
+
+
+def update(object_tracker, re_identifier, timestamp, *boxes_and_colors):
+    image = make_image(*boxes_and_colors)
+    candidates = object_tracker.update(
+        [make_candidate(*box) for box, _ in boxes_and_colors])
+    return re_identifier.update(image, candidates, timestamp=timestamp)
+
+
+def test_embedding_of_empty_region_is_none():
+    image = make_image(((0, 0, 10, 10), RED))
+    assert appearance_embedding(
+        image, Box.from_coordinates(700, 0, 710, 10)) is None
+
+
+def test_embeddings_of_same_color_are_equal():
+    image = make_image(((0, 0, 10, 10), RED), ((100, 0, 150, 50), RED))
+    e0 = appearance_embedding(image, Box.from_coordinates(0, 0, 10, 10))
+    e1 = appearance_embedding(image, Box.from_coordinates(100, 0, 150, 50))
+    assert e0 @ e1 == pytest.approx(1)
+
+
+def test_lost_object_is_re_identified(object_tracker, re_identifier):
+    red = (10, 10, 60, 60)
+    blue = (300, 300, 350, 350)
+    candidates = update(object_tracker, re_identifier, 0,
+                        (red, RED), (blue, BLUE))
+    assert set(candidates) == {0, 1}
+    red_id = next(i for i, c in candidates.items()
+                  if c.bounding_box.x == red[0])
+    # red object leaves the frame and is deregistered
+    update(object_tracker, re_identifier, 1, (blue, BLUE))
+    update(object_tracker, re_identifier, 2, (blue, BLUE))
+    assert not re_identifier.is_registered(red_id)
+    assert re_identifier.is_lost(red_id)
+    assert re_identifier.tracker_id(red_id) is None
+    # red object enters the frame somewhere else
+    moved_red = (500, 100, 550, 150)
+    candidates = update(object_tracker, re_identifier, 3,
+                        (blue, BLUE), (moved_red, RED))
+    assert candidates[red_id].bounding_box.x == moved_red[0]
+    assert re_identifier.is_registered(red_id)
+    assert not re_identifier.is_lost(red_id)
+    # object tracker registered the red object with a new ID
+    tracker_id = re_identifier.tracker_id(red_id)
+    assert tracker_id != red_id
+    assert object_tracker.is_registered(tracker_id)
+
+
+def test_lost_object_is_evicted_after_max_age(object_tracker, re_identifier):
+    candidates = update(object_tracker, re_identifier, 0,
+                        ((10, 10, 60, 60), RED))
+    assert set(candidates) == {0}
+    update(object_tracker, re_identifier, 1)
+    update(object_tracker, re_identifier, 2)
+    assert re_identifier.is_lost(0)
+    update(object_tracker, re_identifier, 20)
+    assert not re_identifier.is_lost(0)
+    candidates = update(object_tracker, re_identifier, 21,
+                        ((10, 10, 60, 60), RED))
+    assert 0 not in candidates
+
+
+def test_full_gallery_replaces_least_recently_lost_identity():
+    gallery = AppearanceGallery(dimensions=2, capacity=2)
+    gallery.add(0, numpy.array([1, 0]), timestamp=0)
+    gallery.add(1, numpy.array([0, 1]), timestamp=1)
+    gallery.add(2, numpy.array([1, 0]), timestamp=2)
+    assert 0 not in gallery
+    assert 1 in gallery
+    assert 2 in gallery
+    assert gallery.match(numpy.array([[0, 1], [1, 0]])).tolist() == [1, 2]
+    assert len(gallery) == 0
+
+
+def lose_red_object(object_tracker, re_identifier):
+    red = (10, 10, 60, 60)
+    blue = (300, 300, 350, 350)
+    candidates = update(object_tracker, re_identifier, 0,
+                        (red, RED), (blue, BLUE))
+    red_id = next(i for i, c in candidates.items()
+                  if c.bounding_box.x == red[0])
+    update(object_tracker, re_identifier, 1, (blue, BLUE))
+    update(object_tracker, re_identifier, 2, (blue, BLUE))
+    assert re_identifier.is_lost(red_id)
+    return red_id, (blue, BLUE)
+
+
+def enter_red_object(object_tracker, re_identifier, blue, frames):
+    blue_box, _ = blue
+    red = (500, 100, 550, 150)
+    # red object is only partially visible in its first frame,
+    # i.e. its detected box also covers a green background
+    image = make_image(blue, (red, RED), ((550, 100, 600, 150), GREEN))
+    candidates = object_tracker.update(
+        [make_candidate(*blue_box), make_candidate(500, 100, 600, 150)])
+    results = [re_identifier.update(image, candidates, timestamp=3)]
+    for i in range(frames):
+        results.append(update(object_tracker, re_identifier, 4 + i, blue,
+                              (red, RED)))
+    return results
+
+
+def test_new_object_is_matched_again_in_following_frames(object_tracker):
+    re_identifier = AppearanceReIdentifier(object_tracker, max_age=10)
+    red_id, blue = lose_red_object(object_tracker, re_identifier)
+    results = enter_red_object(object_tracker, re_identifier, blue, 5)
+    assert red_id not in results[0]
+    assert red_id in results[-1]
+    assert not re_identifier.is_lost(red_id)
+
+
+def test_new_object_is_new_identity_after_match_frames(object_tracker):
+    re_identifier = AppearanceReIdentifier(object_tracker, max_age=10,
+                                           match_frames=1)
+    red_id, blue = lose_red_object(object_tracker, re_identifier)
+    results = enter_red_object(object_tracker, re_identifier, blue, 5)
+    assert red_id not in results[-1]
+    assert re_identifier.is_lost(red_id)
@@ -0,0 +1,131 @@
+from typing import List, Set
+
+import numpy
+import pytest
+
+from robot_cameraman.candidate_filter import filter_intersections
+from robot_cameraman.image_detection import DetectionBatch, \
+    DetectionCandidate
+from robot_cameraman.suppression import intersection_over_min_area, \
+    intersection_over_union, non_maximum_suppression, suppress_intersections
+
+
+def filter_intersections_loop(candidates: List[DetectionCandidate]):
+    """
+    Former implementation of filter_intersections that compares each pair of
+    Box objects. It is used as reference.
+    """
+    count = len(candidates)
+    if count == 0:
+        return []
+    excluded: Set[int] = set()
+    result: List[DetectionCandidate] = []
+    for c in range(0, count - 1):
+        if c in excluded:
+            continue
+        current = candidates[c]
+        for o in range(c + 1, count):
+            other = candidates[o]
+            intersection = current.bounding_box.percental_intersection_area(
+                other.bounding_box)
+            if intersection > 0.3:
+                if current.bounding_box.area() < other.bounding_box.area():
+                    excluded.add(c)
+                    break
+                else:
+                    excluded.add(o)
+        else:
+            result.append(current)
+    if (count - 1) not in excluded:
+        result.append(candidates[count - 1])
+    return result
+
+
+def random_coordinates(count: int, random: numpy.random.Generator,
+                       image_width: float = 640, image_height: float = 480):
+    top_left = random.uniform((0, 0), (image_width, image_height),
+                              size=(count, 2))
+    sizes = random.uniform(10, 150, size=(count, 2))
+    return numpy.hstack((top_left, top_left + sizes))
+
+
+def test_intersection_ratios():
+    coordinates = numpy.array([[0, 0, 10, 10],
+                               [5, 0, 10, 10],
+                               [20, 20, 30, 30]], dtype=float)
+    assert intersection_over_min_area(coordinates)[0].tolist() == [1, 1, 0]
+
+
+def test_empty_boxes_do_not_intersect():
+    coordinates = numpy.array([[0, 0, 0, 0], [0, 0, 10, 10]], dtype=float)
+    assert intersection_over_min_area(coordinates)[0, 1] == 0
+
+
+def test_intersection_over_union():
+    coordinates = numpy.array([[0, 0, 10, 10],
+                               [5, 0, 15, 10],
+                               [20, 20, 30, 30],
+                               [0, 0, 0, 0]], dtype=float)
+    ratios = intersection_over_union(coordinates)
+    assert ratios[0].tolist() == pytest.approx([1, 1 / 3, 0, 0])
+    assert ratios[3, 3] == 0
+
+
+def test_smaller_intersecting_box_is_suppressed():
+    coordinates = numpy.array([[0, 0, 5, 5],
+                               [0, 0, 10, 10],
+                               [20, 20, 30, 30]], dtype=float)
+    assert suppress_intersections(coordinates).tolist() == [1, 2]
+
+
+def test_suppress_no_boxes():
+    assert suppress_intersections(numpy.empty((0, 4))).tolist() == []
+
+
+@pytest.mark.parametrize('count', [1, 2, 5, 10, 50, 200])
+@pytest.mark.parametrize('seed', range(5))
+def test_filter_intersections_equals_former_loop(count, seed):
+    random = numpy.random.default_rng(seed)
+    batch = DetectionBatch.from_arrays(
+        label_ids=0,
+        scores=1.0,
+        coordinates=random_coordinates(count, random,
+                                       image_width=200, image_height=200))
+    candidates = batch.candidates()
+    expected = filter_intersections_loop(candidates)
+    assert filter_intersections(batch) == expected
+    assert filter_intersections(candidates) == expected
+
+
+
+def test_non_maximum_suppression_keeps_highest_scores():
+    coordinates = numpy.array([[0, 0, 10, 10],
+                               [1, 0, 11, 10],
+                               [20, 20, 30, 30],
+                               [21, 20, 31, 30]], dtype=float)
+    scores = numpy.array([0.6, 0.9, 0.7, 0.5])
+    assert non_maximum_suppression(coordinates, scores).tolist() == [1, 2]
+
+
+def test_non_maximum_suppression_keeps_boxes_below_threshold():
+    coordinates = numpy.array([[0, 0, 10, 10],
+                               [5, 0, 15, 10]], dtype=float)
+    scores = numpy.array([0.6, 0.9])
+    assert non_maximum_suppression(
+        coordinates, scores, threshold=0.5).tolist() == [1, 0]
+    assert non_maximum_suppression(
+        coordinates, scores, threshold=0.3).tolist() == [1]
+
+
+def test_non_maximum_suppression_max_objects():
+    coordinates = numpy.array([[0, 0, 10, 10],
+                               [20, 20, 30, 30],
+                               [40, 40, 50, 50]], dtype=float)
+    scores = numpy.array([0.6, 0.9, 0.7])
+    assert non_maximum_suppression(
+        coordinates, scores, max_objects=2).tolist() == [1, 2]
+
+
+def test_non_maximum_suppression_of_no_boxes():
+    assert non_maximum_suppression(
+        numpy.empty((0, 4)), numpy.empty(0)).tolist() == []
@@ -0,0 +1,88 @@
+import pytest
+
+from robot_cameraman.box import Box, Point
+from robot_cameraman.live_view import ImageSize
+from robot_cameraman.tracking import Destination, CameraSpeeds, \
+    ConfigurableTrackingStrategy, PredictiveTrackingStrategy, \
+    TrackingStrategyRotationMode
+
+IMAGE_SIZE = ImageSize(640, 480)
+
+
+@pytest.fixture()
+def destination():
+    return Destination(IMAGE_SIZE, variance=50)
+
+
+@pytest.fixture()
+def strategy(destination):
+    strategy = PredictiveTrackingStrategy(
+        destination, IMAGE_SIZE, max_allowed_speed=20,
+        latency=0.1, actuation_delay=0.1, velocity_gain=0.5)
+    strategy.rotation_mode = TrackingStrategyRotationMode.LINEAR
+    return strategy
+
+
+def target_at(x, y=240):
+    return Box.from_center_and_size(Point(x, y), 40, 40)
+
+
+def test_static_target_is_tracked_like_configurable_strategy(
+        destination, strategy):
+    configurable = ConfigurableTrackingStrategy(
+        destination, IMAGE_SIZE, max_allowed_speed=20)
+    configurable.rotation_mode = TrackingStrategyRotationMode.LINEAR
+    expected = CameraSpeeds()
+    speeds = CameraSpeeds()
+    configurable.update(expected, target_at(480), False)
+    strategy.on_target_velocity(Point(0, 0))
+    strategy.update(speeds, target_at(480), False)
+    assert speeds.pan_speed == pytest.approx(expected.pan_speed)
+    assert speeds.tilt_speed == pytest.approx(expected.tilt_speed)
+
+
+def test_moving_target_is_led(destination, strategy):
+    configurable = ConfigurableTrackingStrategy(
+        destination, IMAGE_SIZE, max_allowed_speed=20)
+    configurable.rotation_mode = TrackingStrategyRotationMode.LINEAR
+    expected = CameraSpeeds()
+    speeds = CameraSpeeds()
+    configurable.update(expected, target_at(440), False)
+    # target moves 100 px/s to the right
+    strategy.on_target_velocity(Point(100, 0))
+    strategy.update(speeds, target_at(440), False)
+    # predicted 20 px further to the right and feed-forward of
+    # 0.5 s * 100 px/s / 320 px * 20
+    assert speeds.pan_speed == pytest.approx(
+        expected.pan_speed + 20 / 320 * 20 + 0.5 * 100 / 320 * 20)
+    assert speeds.tilt_speed == pytest.approx(0)
+
+
+def test_feed_forward_of_target_that_camera_keeps_up_with(destination):
+    # static objects move 100 px/s to the left, since the camera pans right
+    strategy = PredictiveTrackingStrategy(
+        destination, IMAGE_SIZE, max_allowed_speed=20,
+        latency=0.1, actuation_delay=0.1, velocity_gain=0.5,
+        camera_velocity=lambda: (-100, 0))
+    strategy.rotation_mode = TrackingStrategyRotationMode.LINEAR
+    speeds = CameraSpeeds()
+    # target does not move in the image, but 100 px/s in the world
+    strategy.on_target_velocity(Point(0, 0))
+    strategy.update(speeds, target_at(440), False)
+    assert speeds.pan_speed == pytest.approx(
+        120 / 320 * 20 + 0.5 * 100 / 320 * 20)
+
+
+def test_unknown_velocity(strategy):
+    speeds = CameraSpeeds()
+    strategy.on_target_velocity(Point(100, 0))
+    strategy.update(speeds, target_at(440), False)
+    strategy.on_target_velocity(None)
+    strategy.update(speeds, target_at(440), False)
+    assert speeds.pan_speed == pytest.approx(120 / 320 * 20)
+
+
+def test_latency_is_smoothed(strategy):
+    strategy.on_pipeline_latency(0.2)
+    assert strategy.latency == pytest.approx(0.11)
+    assert strategy.lead_time() == pytest.approx(0.21)
@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+from robot_cameraman.box import Box
+from robot_cameraman.image_detection import DetectionCandidate
+from robot_cameraman.trajectory import TrajectoryRingBuffer, Trajectories
+
+
+def make_candidate(x, y, size=10):
+    return DetectionCandidate(
+        label_id=0, score=1,
+        bounding_box=Box.from_coordinates(x, y, x + size, y + size))
+
+
+def test_full_buffer_overwrites_oldest_samples():
+    trajectory = TrajectoryRingBuffer(capacity=3)
+    assert len(trajectory) == 0
+    assert trajectory.latest() is None
+    for t in range(5):
+        trajectory.append(t, t, 0, 1, 1, 1)
+    assert len(trajectory) == 3
+    assert trajectory.recent()[:, 0].tolist() == [2, 3, 4]
+    assert trajectory.recent(2)[:, 0].tolist() == [3, 4]
+    assert trajectory.latest()[0] == 4
+
+
+def test_velocity_and_acceleration():
+    trajectory = TrajectoryRingBuffer(capacity=16)
+    assert trajectory.velocity() is None
+    for t in range(20):
+        # x = 0.5 * a * t² with a = 4, y = 3 * t
+        trajectory.append(t, 2 * t ** 2, 3 * t, 10, 10, 1)
+    ax, ay = trajectory.acceleration()
+    assert ax == pytest.approx(4)
+    assert ay == pytest.approx(0, abs=1e-6)
+    vx, vy = trajectory.velocity(window=2)
+    assert vx == pytest.approx(4 * 19 - 2)
+    assert vy == pytest.approx(3)
+
+
+def test_trajectories_of_lost_objects_are_removed():
+    log = io.StringIO()
+    trajectories = Trajectories(max_age=5, log=log)
+    trajectories.update({0: make_candidate(0, 0), 1: make_candidate(50, 50)},
+                        timestamp=0)
+    trajectories.update({0: make_candidate(10, 0)}, timestamp=1)
+    assert trajectories[0].recent()[:, 1].tolist() == [5, 15]
+    trajectories.update({0: make_candidate(20, 0)}, timestamp=6)
+    assert 0 in trajectories
+    assert 1 not in trajectories
+    rows = log.getvalue().splitlines()
+    assert rows[0] == 'id,timestamp,x,y,width,height,score'
+    assert len(rows) == 5
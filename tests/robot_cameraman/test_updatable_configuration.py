@@ -0,0 +1,53 @@
+from unittest.mock import Mock
+
+import pytest
+
+from robot_cameraman.box import Box
+from robot_cameraman.detection_engine.cam_shift import \
+    CamShiftDetectionEngine
+from robot_cameraman.detection_engine.color import ColorDetectionEngine
+from robot_cameraman.image_detection import DetectionEngine, \
+    FusedDetectionEngine
+from robot_cameraman.updatable_configuration import UpdatableConfiguration
+
+
+@pytest.fixture()
+def configuration_file(tmp_path):
+    return tmp_path / 'config.json'
+
+
+class TestUpdatableConfiguration:
+
+    def test_select_tracking_region(self, configuration_file):
+        engine = CamShiftDetectionEngine(target_label_id=1)
+        configuration = UpdatableConfiguration(engine, configuration_file)
+        region = Box.from_coordinates(100, 100, 140, 140)
+        assert configuration.select_tracking_region(region)
+        assert engine._region is region
+
+    def test_select_tracking_region_of_fused_engine(self,
+                                                    configuration_file):
+        engine = CamShiftDetectionEngine(target_label_id=1)
+        configuration = UpdatableConfiguration(
+            FusedDetectionEngine([Mock(spec=DetectionEngine), engine]),
+            configuration_file)
+        region = Box.from_coordinates(100, 100, 140, 140)
+        assert configuration.select_tracking_region(region)
+        assert engine._region is region
+
+    def test_unsupported_region_selection(self, configuration_file):
+        configuration = UpdatableConfiguration(
+            Mock(spec=DetectionEngine), configuration_file)
+        assert not configuration.select_tracking_region(
+            Box.from_coordinates(100, 100, 140, 140))
+
+    def test_update_tracking_color_of_fused_engine(self,
+                                                   configuration_file):
+        engine = ColorDetectionEngine(target_label_id=1)
+        configuration = UpdatableConfiguration(
+            FusedDetectionEngine([Mock(spec=DetectionEngine), engine]),
+            configuration_file)
+        configuration.update_tracking_color(min_hsv=[10, 20, 30])
+        assert list(engine.min_hsv) == [10, 20, 30]
+        assert configuration.configuration['tracking']['color']['min_hsv'] \
+               == [10, 20, 30]
@@ -0,0 +1,59 @@
+import math
+import time
+
+import pytest
+
+from robot_cameraman.tracking import ZoomSpeed
+from robot_cameraman.zoom import ZoomVelocityEstimator, \
+    ClosedLoopZoomController
+
+
+@pytest.fixture()
+def clock(monkeypatch):
+    current_time = [0.0]
+    monkeypatch.setattr(time, 'time', lambda: current_time[0])
+    return current_time
+
+
+def test_velocity_is_measured_per_zoom_speed():
+    estimator = ZoomVelocityEstimator(min_duration=0.5, smoothing=1)
+    estimator.on_zoom_ratio(1.0, 0)
+    estimator.on_zoom_speed(ZoomSpeed.ZOOM_IN_FAST, 0)
+    estimator.on_zoom_ratio(2.0, 0.5)
+    assert estimator.velocity(ZoomSpeed.ZOOM_IN_FAST) == pytest.approx(
+        math.log(2) / 0.5)
+    # zoom limit is reached
+    estimator.on_zoom_ratio(2.0, 1.0)
+    assert estimator.velocity(ZoomSpeed.ZOOM_IN_FAST) == pytest.approx(
+        math.log(2) / 0.5)
+    assert estimator.velocity(ZoomSpeed.ZOOM_IN_SLOW) == pytest.approx(0.2)
+
+
+def test_target_is_framed_without_hunting(clock):
+    # the camera zooms a bit faster than expected
+    velocities = {
+        ZoomSpeed.ZOOM_OUT_FAST: -0.8,
+        ZoomSpeed.ZOOM_OUT_SLOW: -0.3,
+        ZoomSpeed.ZOOM_STOPPED: 0.0,
+        ZoomSpeed.ZOOM_IN_SLOW: 0.3,
+        ZoomSpeed.ZOOM_IN_FAST: 0.8,
+    }
+    controller = ClosedLoopZoomController(stop_delay=0.2)
+    time_step = 0.04
+    zoom_ratio = 1.0
+    # target height at zoom ratio 1.0x
+    height = 40
+    desired_height = 200
+    zoom_speed = ZoomSpeed.ZOOM_STOPPED
+    zoom_speeds = []
+    for step in range(500):
+        clock[0] = step * time_step
+        controller.on_zoom_ratio(round(zoom_ratio, 1))
+        zoom_speed = controller.zoom_speed(height * zoom_ratio, desired_height)
+        zoom_speeds.append(zoom_speed)
+        zoom_ratio *= math.exp(velocities[zoom_speed] * time_step)
+    assert zoom_speed is ZoomSpeed.ZOOM_STOPPED
+    assert height * zoom_ratio == pytest.approx(desired_height, rel=0.1)
+    changes = [s for p, s in zip(zoom_speeds, zoom_speeds[1:]) if p is not s]
+    assert ZoomSpeed.ZOOM_OUT_SLOW not in changes
+    assert ZoomSpeed.ZOOM_OUT_FAST not in changes
@@ -0,0 +1,101 @@
+import threading
+import time
+from unittest.mock import Mock
+
+import pytest
+
+from robot_cameraman.tracking import ZoomSpeed
+from robot_cameraman.zoom_command_worker import ZoomCommandWorker
+
+
+class BlockingSender:
+    """Records sent commands. Each command blocks until it is released."""
+
+    def __init__(self):
+        self.sent = []
+        self.is_sending = threading.Event()
+        self.release = threading.Semaphore(0)
+        self.fail = False
+
+    def __call__(self, _camera, zoom_speed):
+        self.is_sending.set()
+        self.release.acquire()
+        self.sent.append(zoom_speed)
+        if self.fail:
+            raise IOError('camera is not reachable')
+
+
+@pytest.fixture()
+def sender():
+    return BlockingSender()
+
+
+@pytest.fixture()
+def worker(sender):
+    camera_manager = Mock()
+    camera_manager.camera = Mock()
+    worker = ZoomCommandWorker(camera_manager, send=sender)
+    worker.start()
+    yield worker
+    worker.cancel()
+    for _ in range(10):
+        sender.release.release()
+    worker.join(timeout=1)
+
+
+def send_blocked(worker, sender, zoom_speed):
+    """Submit a command and wait till the worker blocks sending it."""
+    sender.is_sending.clear()
+    worker.submit(zoom_speed)
+    assert sender.is_sending.wait(timeout=1)
+
+
+def finish(worker, sender, count):
+    for _ in range(count):
+        sender.release.release()
+    worker.cancel()
+    worker.join(timeout=1)
+    assert not worker.is_alive()
+
+
+def test_superseded_commands_are_dropped(worker, sender):
+    send_blocked(worker, sender, ZoomSpeed.ZOOM_IN_FAST)
+    worker.submit(ZoomSpeed.ZOOM_IN_SLOW)
+    worker.submit(ZoomSpeed.ZOOM_OUT_SLOW)
+    worker.submit(ZoomSpeed.ZOOM_OUT_FAST)
+    finish(worker, sender, 2)
+    assert sender.sent == [ZoomSpeed.ZOOM_IN_FAST, ZoomSpeed.ZOOM_OUT_FAST]
+    statistics = worker.statistics()
+    assert statistics.sent == 2
+    assert statistics.superseded == 2
+
+
+def test_stop_is_sent_before_newer_command(worker, sender):
+    send_blocked(worker, sender, ZoomSpeed.ZOOM_IN_FAST)
+    worker.submit(ZoomSpeed.ZOOM_STOPPED)
+    worker.submit(ZoomSpeed.ZOOM_OUT_FAST)
+    finish(worker, sender, 3)
+    assert sender.sent == [ZoomSpeed.ZOOM_IN_FAST, ZoomSpeed.ZOOM_STOPPED,
+                           ZoomSpeed.ZOOM_OUT_FAST]
+
+
+def test_repeated_commands_are_sent_once(worker, sender):
+    send_blocked(worker, sender, ZoomSpeed.ZOOM_IN_FAST)
+    worker.submit(ZoomSpeed.ZOOM_IN_FAST)
+    finish(worker, sender, 1)
+    assert sender.sent == [ZoomSpeed.ZOOM_IN_FAST]
+
+
+def test_failed_command_is_retried(worker, sender):
+    sender.fail = True
+    send_blocked(worker, sender, ZoomSpeed.ZOOM_IN_FAST)
+    sender.release.release()
+    while worker.statistics().failed == 0:
+        time.sleep(0.001)
+    sender.fail = False
+    worker.submit(ZoomSpeed.ZOOM_IN_FAST)
+    finish(worker, sender, 1)
+    assert sender.sent == [ZoomSpeed.ZOOM_IN_FAST, ZoomSpeed.ZOOM_IN_FAST]
+    statistics = worker.statistics()
+    assert statistics.failed == 1
+    assert statistics.sent == 1
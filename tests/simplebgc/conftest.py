@@ -0,0 +1,22 @@
+import pytest
+
+from simplebgc.transport import SerialTransport
+
+
+@pytest.fixture()
+def transports():
+    transports = []
+    yield transports
+    for transport in transports:
+        transport.close(timeout=1)
+
+
+@pytest.fixture()
+def create_transport(transports):
+    def create(connection, **kwargs) -> SerialTransport:
+        transport = SerialTransport(connection, **kwargs)
+        transport.start()
+        transports.append(transport)
+        return transport
+
+    return create
@@ -0,0 +1,64 @@
+import threading
+
+from simplebgc.command_ids import CMD_CONFIRM
+from simplebgc.serial_example import create_message, pack_message
+
+
+def pack(command_id: int, payload: bytes = b'') -> bytes:
+    return pack_message(create_message(command_id, payload))
+
+
+class FakeConnection:
+    """Serial connection that records written data. Data that is received
+    from the gimbal is passed to receive or returned by respond."""
+
+    def __init__(self, respond=None):
+        self.written = []
+        self.respond = respond
+        self._buffer = bytearray()
+        self._condition = threading.Condition()
+        self.error = None
+        self.is_open = True
+
+    def fail(self, error: Exception) -> None:
+        """Raise error on following reads, e.g. if the device is
+        unplugged."""
+        self.error = error
+
+    def close(self) -> None:
+        self.is_open = False
+
+    @property
+    def in_waiting(self) -> int:
+        if self.error is not None:
+            raise self.error
+        with self._condition:
+            return len(self._buffer)
+
+    def receive(self, data: bytes) -> None:
+        with self._condition:
+            self._buffer.extend(data)
+            self._condition.notify_all()
+
+    def write(self, data: bytes) -> int:
+        self.written.append(data)
+        if self.respond is not None:
+            response = self.respond(data)
+            if response:
+                self.receive(response)
+        return len(data)
+
+    def read(self, size: int = 1) -> bytes:
+        if self.error is not None:
+            raise self.error
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._buffer) >= size,
+                                     timeout=0.1)
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            return data
+
+
+def confirm(data: bytes) -> bytes:
+    # command ID is the second byte of a message
+    return pack(CMD_CONFIRM, bytes([data[1]]))
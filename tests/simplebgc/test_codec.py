@@ -0,0 +1,42 @@
+import struct
+
+import pytest
+
+from simplebgc.codec import INCOMING_CODECS, OUTGOING_CODECS, encode_message
+from simplebgc.command_ids import CMD_CONTROL, CMD_GET_ANGLES, \
+    CMD_BOARD_INFO, CMD_BOARD_INFO_3, CMD_READ_PARAMS_3, CMD_READ_PARAMS_EXT, \
+    CMD_REALTIME_DATA_3, CMD_REALTIME_DATA_4
+from simplebgc.command_parser import parse_cmd
+from simplebgc.commands import ControlOutCmd, GetAnglesInCmd, RawCmd
+from simplebgc.serial_example import create_message, pack_message, \
+    unpack_message
+
+
+@pytest.mark.parametrize('command_id', [
+    CMD_BOARD_INFO, CMD_BOARD_INFO_3, CMD_READ_PARAMS_3, CMD_READ_PARAMS_EXT,
+    CMD_REALTIME_DATA_3, CMD_REALTIME_DATA_4, CMD_GET_ANGLES])
+def test_unpack_incoming_command(command_id):
+    codec = INCOMING_CODECS[command_id]
+    cmd = codec.unpack(bytes(codec.size))
+    assert cmd == parse_cmd(RawCmd(command_id, bytes(codec.size)))
+
+
+def test_unpack_from_memoryview():
+    angles = GetAnglesInCmd(*range(-4, 5))
+    data = memoryview(b'\x00\x00' + struct.pack('<9h', *angles))
+    assert INCOMING_CODECS[CMD_GET_ANGLES].unpack(data, offset=2) == angles
+
+
+def test_pack_control():
+    control = ControlOutCmd(1, 2, 3, -100, 200, -300, 400, -500, 600)
+    payload = OUTGOING_CODECS[CMD_CONTROL].pack(control)
+    assert payload == control.pack()
+    assert struct.unpack('<BBBhhhhhh', payload) == tuple(control)
+
+
+@pytest.mark.parametrize('payload', [b'', b'\x01', bytes(range(200))])
+def test_encode_message(payload):
+    data = encode_message(CMD_CONTROL, payload)
+    assert data == pack_message(create_message(CMD_CONTROL, payload))
+    assert unpack_message(data, len(payload)) \
+           == create_message(CMD_CONTROL, payload)
@@ -0,0 +1,119 @@
+import io
+import struct
+import threading
+import time
+
+import pytest
+
+from simplebgc.command_ids import CMD_DATA_STREAM_INTERVAL, CMD_GET_ANGLES
+from simplebgc.commands import GetAnglesInCmd
+from simplebgc.data_stream import AnglesStream, GimbalState, GimbalStateLog
+from simplebgc.gimbal import PipelinedGimbal
+from simplebgc.units import from_degree
+from tests.simplebgc.fake_connection import FakeConnection, pack, confirm
+
+
+def pack_angles(angles: GetAnglesInCmd) -> bytes:
+    return pack(CMD_GET_ANGLES, struct.pack('<9h', *angles))
+
+
+def create_angles(pan_angle: float) -> GetAnglesInCmd:
+    return GetAnglesInCmd(0, 0, 0, 0, 0, 0,
+                          from_degree(pan_angle), from_degree(pan_angle), 0)
+
+
+class TestAnglesStream:
+
+    def test_start_and_stop(self, create_transport):
+        connection = FakeConnection(respond=confirm)
+        stream = AnglesStream(create_transport(connection), interval=0.02)
+        stream.start().result(timeout=1)
+        stream.stop().result(timeout=1)
+        assert connection.written == [
+            pack(CMD_DATA_STREAM_INTERVAL,
+                 struct.pack('<BH', CMD_GET_ANGLES, 20) + bytes(18)),
+            pack(CMD_DATA_STREAM_INTERVAL,
+                 struct.pack('<BH', CMD_GET_ANGLES, 0) + bytes(18))]
+
+    def test_latest_state(self, create_transport):
+        connection = FakeConnection(respond=confirm)
+        stream = AnglesStream(create_transport(connection))
+        states = []
+        is_received = threading.Event()
+
+        def listener(state):
+            states.append(state)
+            if len(states) == 2:
+                is_received.set()
+
+        stream.add_listener(listener)
+        assert stream.latest is None
+        stream.start().result(timeout=1)
+        connection.receive(pack_angles(create_angles(10))
+                           + pack_angles(create_angles(20)))
+        assert is_received.wait(timeout=1)
+        assert stream.latest is states[-1]
+        assert stream.latest.pan_angle == pytest.approx(20, abs=0.1)
+
+
+class TestPipelinedGimbalWithAnglesStream:
+
+    def test_get_streamed_angles(self, create_transport):
+        connection = FakeConnection(respond=confirm)
+        gimbal = PipelinedGimbal(create_transport(connection),
+                                 angles_stream_interval=0.02)
+        is_received = threading.Event()
+        gimbal.angles_stream.add_listener(lambda _: is_received.set())
+        connection.receive(pack_angles(create_angles(10)))
+        assert is_received.wait(timeout=1)
+        written = len(connection.written)
+        assert gimbal.get_angles() == create_angles(10)
+        assert len(connection.written) == written
+
+    def test_request_angles_if_stream_is_stale(self, create_transport):
+        def respond(data):
+            if data[1] == CMD_GET_ANGLES:
+                return pack_angles(create_angles(20))
+            return confirm(data)
+
+        gimbal = PipelinedGimbal(create_transport(FakeConnection(respond)),
+                                 angles_stream_interval=0.02,
+                                 max_state_age=0.1)
+        gimbal.angles_stream._latest = GimbalState(0, create_angles(10))
+        assert gimbal.get_angles() == create_angles(20)
+
+
+    def test_recent_state(self, create_transport):
+        gimbal = PipelinedGimbal(
+            create_transport(FakeConnection(respond=confirm)),
+            angles_stream_interval=0.02,
+            max_state_age=0.1)
+        assert gimbal.recent_state is None
+        state = GimbalState(time.time(), create_angles(10))
+        gimbal.angles_stream._latest = state
+        assert gimbal.recent_state is state
+        gimbal.angles_stream._latest = GimbalState(0, create_angles(10))
+        assert gimbal.recent_state is None
+
+
+def test_gimbal_state_log():
+    log = io.StringIO()
+    GimbalStateLog(log)(GimbalState(1.5, create_angles(10)))
+    header, row = log.getvalue().splitlines()
+    assert header.split(',') == list(GimbalStateLog.FIELDS)
+    values = [float(v) for v in row.split(',')]
+    assert values[0] == 1.5
+    assert values[1] == pytest.approx(10, abs=0.1)
+
+
+def test_gimbal_state_angles():
+    # imu_angle_1, target_angle_1, target_speed_1, imu_angle_2, ...
+    state = GimbalState(0, GetAnglesInCmd(
+        0, 0, 0,
+        from_degree(-10), from_degree(-12), 0,
+        from_degree(30), from_degree(35), 0))
+    # same angles as used by the camera controllers
+    assert state.pan_angle == pytest.approx(35, abs=0.1)
+    assert state.tilt_angle == pytest.approx(-12, abs=0.1)
+    assert state.imu_pan_angle == pytest.approx(30, abs=0.1)
+    assert state.imu_tilt_angle == pytest.approx(-10, abs=0.1)
@@ -0,0 +1,80 @@
+import pytest
+
+from simplebgc.command_ids import CMD_CONFIRM, CMD_GET_ANGLES
+from simplebgc.commands import RawCmd
+from simplebgc.frame_parser import FrameParser
+from tests.simplebgc.fake_connection import pack
+
+
+@pytest.fixture()
+def parser():
+    return FrameParser()
+
+
+class TestFrameParser:
+
+    def test_parse_complete_frames(self, parser):
+        data = pack(CMD_CONFIRM, b'\x43') + pack(CMD_GET_ANGLES, bytes(18))
+        assert parser.feed(data) == [RawCmd(CMD_CONFIRM, b'\x43'),
+                                     RawCmd(CMD_GET_ANGLES, bytes(18))]
+        assert len(parser) == 0
+        assert parser.statistics.frames == 2
+
+    def test_parse_empty_payload(self, parser):
+        assert parser.feed(pack(CMD_GET_ANGLES)) == \
+               [RawCmd(CMD_GET_ANGLES, b'')]
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7])
+    def test_parse_chunks(self, parser, chunk_size):
+        data = pack(CMD_CONFIRM, b'\x43') + pack(CMD_GET_ANGLES, b'\x01\x02')
+        commands = []
+        for i in range(0, len(data), chunk_size):
+            commands += parser.feed(data[i:i + chunk_size])
+        assert commands == [RawCmd(CMD_CONFIRM, b'\x43'),
+                            RawCmd(CMD_GET_ANGLES, b'\x01\x02')]
+        assert parser.statistics.resyncs == 0
+
+    def test_wait_for_incomplete_frame(self, parser):
+        data = pack(CMD_GET_ANGLES, b'\x01\x02')
+        assert parser.feed(data[:-1]) == []
+        assert len(parser) == len(data) - 1
+        assert parser.feed(data[-1:]) == [RawCmd(CMD_GET_ANGLES, b'\x01\x02')]
+
+    def test_skip_garbage(self, parser):
+        data = b'\x00\x01' + pack(CMD_CONFIRM, b'\x43') + b'\x02'
+        assert parser.feed(data) == [RawCmd(CMD_CONFIRM, b'\x43')]
+        assert parser.statistics.resyncs == 2
+        assert parser.statistics.skipped_bytes == 3
+        assert len(parser) == 0
+
+    def test_count_garbage_in_multiple_chunks_as_one_resync(self, parser):
+        parser.feed(b'\x00\x01')
+        parser.feed(b'\x02')
+        assert parser.feed(pack(CMD_CONFIRM, b'\x43')) == \
+               [RawCmd(CMD_CONFIRM, b'\x43')]
+        assert parser.statistics.resyncs == 1
+        assert parser.statistics.skipped_bytes == 3
+
+    def test_resync_after_header_checksum_error(self, parser):
+        corrupted = bytearray(pack(CMD_GET_ANGLES, b'\x01\x02'))
+        corrupted[3] ^= 0xFF
+        data = bytes(corrupted) + pack(CMD_CONFIRM, b'\x43')
+        assert parser.feed(data) == [RawCmd(CMD_CONFIRM, b'\x43')]
+        assert parser.statistics.header_checksum_errors == 1
+        assert parser.statistics.resyncs == 1
+
+    def test_resync_after_payload_checksum_error(self, parser):
+        corrupted = bytearray(pack(CMD_GET_ANGLES, b'\x01\x02'))
+        corrupted[4] ^= 0xFF
+        data = bytes(corrupted) + pack(CMD_CONFIRM, b'\x43')
+        assert parser.feed(data) == [RawCmd(CMD_CONFIRM, b'\x43')]
+        assert parser.statistics.payload_checksum_errors == 1
+
+    def test_resync_after_lost_byte(self, parser):
+        data = pack(CMD_GET_ANGLES, b'\x01\x02\x03')
+        # lost byte is replaced by the start of the next frame
+        data = data[:-2] + pack(CMD_CONFIRM, b'\x43') \
+            + pack(CMD_CONFIRM, b'\x44')
+        commands = parser.feed(data)
+        assert commands[-1] == RawCmd(CMD_CONFIRM, b'\x44')
+        assert RawCmd(CMD_GET_ANGLES, b'\x01\x02\x03') not in commands
@@ -0,0 +1,173 @@
+import io
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import pytest
+from serial import SerialException
+
+from simplebgc.command_ids import CMD_CONTROL, CMD_CONFIRM, CMD_GET_ANGLES, \
+    CMD_REALTIME_DATA_3
+from simplebgc.commands import GetAnglesInCmd
+from simplebgc.gimbal import PipelinedGimbal
+from simplebgc.transport import RoundTripTimeHistogram
+from tests.simplebgc.fake_connection import FakeConnection, pack, confirm
+
+
+class TestSerialTransport:
+
+    def test_resolve_future_with_confirmation(self, create_transport):
+        connection = FakeConnection(respond=confirm)
+        transport = create_transport(connection)
+        future = transport.send(CMD_CONTROL, b'\x01', response_id=CMD_CONFIRM)
+        response = future.result(timeout=1)
+        assert response.id == CMD_CONFIRM
+        assert response.payload == bytes([CMD_CONTROL])
+        assert connection.written == [pack(CMD_CONTROL, b'\x01')]
+        statistics = transport.statistics()
+        assert statistics.sent == 1
+        assert statistics.received == 1
+        assert statistics.round_trip_times.count == 1
+
+    def test_fire_and_forget(self, create_transport):
+        connection = FakeConnection()
+        transport = create_transport(connection)
+        assert transport.send(CMD_CONTROL, b'\x01').result(timeout=1) is None
+        assert connection.written == [pack(CMD_CONTROL, b'\x01')]
+
+    def test_timeout(self, create_transport):
+        transport = create_transport(FakeConnection())
+        future = transport.send(CMD_GET_ANGLES, response_id=CMD_GET_ANGLES,
+                                timeout=0.05)
+        with pytest.raises(TimeoutError):
+            future.result(timeout=1)
+        assert transport.statistics().timeouts == 1
+
+    def test_match_responses_in_order(self, create_transport):
+        connection = FakeConnection()
+        transport = create_transport(connection)
+        first = transport.send(CMD_GET_ANGLES, response_id=CMD_GET_ANGLES)
+        second = transport.send(CMD_GET_ANGLES, response_id=CMD_GET_ANGLES)
+        connection.receive(pack(CMD_GET_ANGLES, b'\x01')
+                           + pack(CMD_GET_ANGLES, b'\x02'))
+        assert first.result(timeout=1).payload == b'\x01'
+        assert second.result(timeout=1).payload == b'\x02'
+
+    def test_skip_corrupted_data(self, create_transport):
+        connection = FakeConnection()
+        transport = create_transport(connection)
+        future = transport.send(CMD_GET_ANGLES, response_id=CMD_GET_ANGLES)
+        response = pack(CMD_GET_ANGLES, b'\x01')
+        connection.receive(b'\x00' + response[:-2])
+        connection.receive(response)
+        assert future.result(timeout=1).payload == b'\x01'
+        assert transport.statistics().frames.resyncs >= 1
+
+    def test_record_received_data(self, create_transport):
+        connection = FakeConnection(respond=confirm)
+        recording = io.BytesIO()
+        transport = create_transport(connection, recording=recording)
+        transport.send(CMD_CONTROL, response_id=CMD_CONFIRM).result(timeout=1)
+        assert recording.getvalue() == confirm(pack(CMD_CONTROL))
+
+    def test_subscribe(self, create_transport):
+        connection = FakeConnection()
+        transport = create_transport(connection)
+        received = []
+        is_received = threading.Event()
+
+        def subscriber(cmd):
+            received.append(cmd)
+            is_received.set()
+
+        transport.subscribe(CMD_REALTIME_DATA_3, subscriber)
+        connection.receive(pack(CMD_REALTIME_DATA_3, b'\x01\x02'))
+        assert is_received.wait(timeout=1)
+        assert received[0].payload == b'\x01\x02'
+        transport.unsubscribe(CMD_REALTIME_DATA_3, subscriber)
+        connection.receive(pack(CMD_REALTIME_DATA_3, b'\x03'))
+        deadline = time.monotonic() + 1
+        while (transport.statistics().unexpected == 0
+               and time.monotonic() < deadline):
+            time.sleep(0.01)
+        assert transport.statistics().unexpected == 1
+        assert len(received) == 1
+
+    def test_close_cancels_pending_requests(self, create_transport):
+        connection = FakeConnection()
+        transport = create_transport(connection)
+        future = transport.send(CMD_GET_ANGLES, response_id=CMD_GET_ANGLES,
+                                timeout=10)
+        transport.close(timeout=1)
+        assert future.cancelled()
+        assert transport.send(CMD_CONTROL, b'\x01').cancelled()
+        assert not connection.is_open
+
+    def test_cancel_while_response_is_dispatched(self, create_transport):
+        connection = FakeConnection()
+        transport = create_transport(connection)
+        cancelled = transport.send(CMD_GET_ANGLES,
+                                   response_id=CMD_GET_ANGLES)
+        # caller cancels after the I/O thread checked the future
+        cancelled.cancel()
+        cancelled.done = lambda: False
+        connection.receive(pack(CMD_GET_ANGLES, b'\x01'))
+        # I/O thread is still running
+        future = transport.send(CMD_GET_ANGLES, response_id=CMD_GET_ANGLES)
+        connection.receive(pack(CMD_GET_ANGLES, b'\x02'))
+        assert future.result(timeout=1).payload == b'\x02'
+
+    def test_connection_error_fails_requests(self, create_transport):
+        connection = FakeConnection()
+        transport = create_transport(connection)
+        future = transport.send(CMD_GET_ANGLES, response_id=CMD_GET_ANGLES,
+                                timeout=10)
+        error = SerialException('device disconnected')
+        connection.fail(error)
+        with pytest.raises(SerialException):
+            future.result(timeout=1)
+        # transport is closed
+        with pytest.raises(SerialException):
+            transport.send(CMD_CONTROL, b'\x01').result(timeout=1)
+
+
+class TestRoundTripTimeHistogram:
+
+    def test_add(self):
+        histogram = RoundTripTimeHistogram(bucket_bounds=(1, 10))
+        for round_trip_time in (0.0005, 0.001, 0.005, 0.5):
+            histogram.add(round_trip_time)
+        assert histogram.counts == [2, 1, 1]
+        assert histogram.max == pytest.approx(500)
+        assert histogram.percentile(50) == 1
+        assert histogram.percentile(75) == 10
+        assert histogram.percentile(100) == pytest.approx(500)
+
+
+class TestPipelinedGimbal:
+
+    def test_control_does_not_wait_for_confirmation(self, create_transport):
+        connection = FakeConnection()
+        gimbal = PipelinedGimbal(create_transport(connection))
+        future = gimbal.control(yaw_speed=10)
+        assert not future.done()
+        connection.receive(pack(CMD_CONFIRM, bytes([CMD_CONTROL])))
+        assert future.result(timeout=1).id == CMD_CONFIRM
+
+    def test_get_angles(self, create_transport):
+        angles = GetAnglesInCmd(*range(9))
+
+        def respond(data):
+            if data[1] == CMD_GET_ANGLES:
+                return pack(CMD_GET_ANGLES,
+                            b''.join(a.to_bytes(2, 'little') for a in angles))
+
+        gimbal = PipelinedGimbal(create_transport(FakeConnection(respond)))
+        assert gimbal.get_angles() == angles
+
+    def test_get_angles_of_failed_connection(self, create_transport):
+        connection = FakeConnection()
+        connection.fail(SerialException('device disconnected'))
+        gimbal = PipelinedGimbal(create_transport(connection))
+        with pytest.raises(SerialException):
+            gimbal.get_angles()